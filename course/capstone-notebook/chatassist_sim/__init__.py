@@ -1,7 +1,16 @@
 """chatassist_sim — In-process simulator for the ChatAssist GenAI API."""
 
 from .simulator import ChatAssistSimulator
+from .farm import SimulatorFarm
 from .response import SimulatedResponse
 from .streaming import StreamingResponse
+from .stream_faults import StreamFault, StreamInterrupted
 
-__all__ = ["ChatAssistSimulator", "SimulatedResponse", "StreamingResponse"]
+__all__ = [
+    "ChatAssistSimulator",
+    "SimulatorFarm",
+    "SimulatedResponse",
+    "StreamingResponse",
+    "StreamFault",
+    "StreamInterrupted",
+]
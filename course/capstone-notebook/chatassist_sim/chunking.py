@@ -0,0 +1,111 @@
+"""Chunking strategies for streamed responses.
+
+Each strategy is a function ``text -> iterator of str`` that yields the
+pieces of *text* lazily, so ``"".join(chunker(text)) == text`` and no
+per-stream list is built.  :func:`make_chunker` resolves a strategy name
+from the simulator config into a chunker plus the matching frame delay.
+
+Available strategies:
+
+* ``"word"``     -- one word per frame (the historical default)
+* ``"token"``    -- one simulator token per frame (see :mod:`.tokenizer`)
+* ``"chars"``    -- fixed *chars*-sized slices
+* ``"window"``   -- tokens coalesced into *window_ms* flush windows
+* ``"sentence"`` -- whole sentences (or lines)
+"""
+
+import re
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, Tuple, Union
+
+from .tokenizer import iter_tokens
+
+Chunker = Callable[[str], Iterable[str]]
+
+_WORD_PATTERN = re.compile(r"\A[^ ]*| [^ ]*")
+_SENTENCE_PATTERN = re.compile(r".*?(?:[.!?]+(?:\s+|\Z)|\n+|\Z)", re.DOTALL)
+
+
+def iter_word_chunks(text: str) -> Iterator[str]:
+    """Yield words, each but the first preceded by its space."""
+    for match in _WORD_PATTERN.finditer(text):
+        yield match.group(0)
+
+
+def iter_token_chunks(text: str) -> Iterator[str]:
+    """Yield one simulator token at a time."""
+    return iter_tokens(text)
+
+
+def iter_char_chunks(text: str, size: int = 16) -> Iterator[str]:
+    """Yield consecutive slices of *size* characters."""
+    if size < 1:
+        raise ValueError(f"size must be at least 1, got {size}")
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def iter_sentence_chunks(text: str) -> Iterator[str]:
+    """Yield sentences with their trailing whitespace attached."""
+    for match in _SENTENCE_PATTERN.finditer(text):
+        if match.group(0):
+            yield match.group(0)
+
+
+def iter_window_chunks(
+    text: str, window_ms: int = 100, token_ms: int = 30
+) -> Iterator[str]:
+    """Yield the tokens generated within each *window_ms* flush window.
+
+    Tokens are assumed to be produced every *token_ms*; a server that
+    flushes once per window sends all of them in one frame.  A *token_ms*
+    below 1 counts as 1, so frames still hold at most *window_ms* tokens.
+    """
+    per_window = max(1, window_ms // max(1, token_ms))
+    pending = []
+    for token in iter_tokens(text):
+        pending.append(token)
+        if len(pending) == per_window:
+            yield "".join(pending)
+            pending = []
+    if pending:
+        yield "".join(pending)
+
+
+CHUNKING_STRATEGIES: Dict[str, Callable[..., Iterator[str]]] = {
+    "word": iter_word_chunks,
+    "token": iter_token_chunks,
+    "chars": iter_char_chunks,
+    "window": iter_window_chunks,
+    "sentence": iter_sentence_chunks,
+}
+
+
+def make_chunker(
+    strategy: Union[str, Chunker] = "word",
+    chunk_delay_ms: int = 30,
+    chars: int = 16,
+    window_ms: int = 100,
+) -> Tuple[Chunker, int]:
+    """Return ``(chunker, frame_delay_ms)`` for *strategy*.
+
+    *strategy* may be a name from :data:`CHUNKING_STRATEGIES` or any
+    callable following the chunker contract.  *chunk_delay_ms* is the
+    per-frame delay, except for ``"window"`` where it is the per-token
+    generation interval and frames are spaced *window_ms* apart.  A
+    *chunk_delay_ms* of 0 means no delay for every strategy, ``"window"``
+    included.
+    """
+    if callable(strategy):
+        return strategy, chunk_delay_ms
+    if strategy not in CHUNKING_STRATEGIES:
+        raise ValueError(
+            f"Unknown chunking strategy: {strategy!r}. "
+            f"Expected one of {sorted(CHUNKING_STRATEGIES)}"
+        )
+    if strategy == "chars":
+        return partial(iter_char_chunks, size=chars), chunk_delay_ms
+    if strategy == "window":
+        chunker = partial(iter_window_chunks, window_ms=window_ms, token_ms=chunk_delay_ms)
+        return chunker, window_ms if chunk_delay_ms else 0
+    return CHUNKING_STRATEGIES[strategy], chunk_delay_ms
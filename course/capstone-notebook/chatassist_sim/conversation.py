@@ -0,0 +1,223 @@
+"""Incremental per-conversation analysis for multi-turn requests.
+
+Every chat request resends the whole conversation, so re-scanning every
+message for PII, order IDs and tool results on each turn costs O(T) per
+turn and O(T²) per session.  :class:`ConversationCache` instead keys a
+:class:`ConversationState` on a rolling hash of the message prefix and
+only analyses the messages that follow the longest prefix it has seen.
+"""
+
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .tokenizer import count_tokens
+
+_ORDER_ID_PATTERN = re.compile(r"(?:ORD-|#)(\d+)", re.IGNORECASE)
+_ORDER_ID_LOOSE = re.compile(r"order\s*#?\s*(\w+)", re.IGNORECASE)
+
+_CREDIT_CARD_PATTERN = re.compile(r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b")
+_EMAIL_PATTERN = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
+_SSN_PATTERN = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+
+# Marks tool-result fields that no tool message has set yet.
+_UNSET = object()
+
+_EMPTY_DIGEST = b"\x00" * 16
+
+# Tokens of role/separator framing added to every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _message_digest(message: Dict[str, Any]) -> bytes:
+    """Return a stable 16-byte digest of a single message."""
+    h = hashlib.blake2b(digest_size=16)
+    content = message.get("content")
+    if isinstance(content, str) and message.keys() == {"role", "content"}:
+        # Fast path for plain {"role", "content"} messages.
+        h.update(str(message.get("role")).encode())
+        h.update(b"\x00")
+        h.update(content.encode())
+    else:
+        h.update(json.dumps(message, sort_keys=True, default=str).encode())
+    return h.digest()
+
+
+def _rolling_digest(prefix_digest: bytes, message: Dict[str, Any]) -> bytes:
+    """Hash of a prefix extended by *message*."""
+    return hashlib.blake2b(
+        prefix_digest + _message_digest(message), digest_size=16
+    ).digest()
+
+
+def _message_tokens(message: Dict[str, Any]) -> int:
+    """Return the prompt tokens *message* contributes, framing included."""
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += count_tokens(content)
+    elif isinstance(content, list):
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "text":
+                tokens += count_tokens(part.get("text", ""))
+    if message.get("tool_calls"):
+        tokens += count_tokens(json.dumps(message["tool_calls"]))
+    return tokens
+
+
+def _extract_order_id(text: str) -> Optional[str]:
+    """Return the order ID mentioned in *text*, if any."""
+    match = _ORDER_ID_PATTERN.search(text)
+    if match:
+        prefix = "ORD-" if "ORD-" in text[max(0, match.start() - 4): match.end()] else "#"
+        return f"ORD-{match.group(1)}" if prefix == "ORD-" else match.group(0)
+    match = _ORDER_ID_LOOSE.search(text)
+    if match:
+        return match.group(1)
+    return None
+
+
+class ConversationState:
+    """Accumulated analysis of a message prefix.
+
+    Attributes:
+        digest: Rolling hash of the prefix.
+        length: Number of messages in the prefix.
+        tokens: Prompt tokens of the prefix, message framing included.
+        parent: State of the prefix one message shorter (None at the root).
+        has_pii: A message contains a card number, email or SSN.
+        order_id: Order ID from the most recent message mentioning one
+            (tool results take precedence), or ``"UNKNOWN"``.
+        has_tool_result: A ``role == "tool"`` message is present.
+        tool_status: ``status`` from the latest tool result (default
+            ``"shipped"``).
+    """
+
+    __slots__ = (
+        "digest", "length", "tokens", "parent", "has_pii", "has_tool_result",
+        "_text_order_id", "_tool_order_id", "_tool_status",
+    )
+
+    def __init__(self):
+        self.digest: bytes = _EMPTY_DIGEST
+        self.length: int = 0
+        self.tokens: int = 0
+        self.parent: Optional["ConversationState"] = None
+        self.has_pii: bool = False
+        self.has_tool_result: bool = False
+        self._text_order_id: Optional[str] = None
+        self._tool_order_id: Any = _UNSET
+        self._tool_status: Any = _UNSET
+
+    @property
+    def order_id(self) -> Any:
+        if self._tool_order_id is not _UNSET:
+            return self._tool_order_id
+        return self._text_order_id or "UNKNOWN"
+
+    @property
+    def tool_status(self) -> Any:
+        if self._tool_status is not _UNSET:
+            return self._tool_status
+        return "shipped"
+
+    def extend(
+        self, message: Dict[str, Any], digest: Optional[bytes] = None
+    ) -> "ConversationState":
+        """Return a new state covering this prefix plus *message*.
+
+        *digest* is the already-computed rolling hash of the new prefix.
+        """
+        state = ConversationState()
+        state.digest = digest or _rolling_digest(self.digest, message)
+        state.length = self.length + 1
+        state.tokens = self.tokens + _message_tokens(message)
+        state.parent = self
+        state.has_pii = self.has_pii
+        state.has_tool_result = self.has_tool_result
+        state._text_order_id = self._text_order_id
+        state._tool_order_id = self._tool_order_id
+        state._tool_status = self._tool_status
+        state._analyze(message)
+        return state
+
+    def _analyze(self, message: Dict[str, Any]) -> None:
+        text = message.get("content", "")
+        if isinstance(text, str):
+            if not self.has_pii:
+                self.has_pii = bool(
+                    _CREDIT_CARD_PATTERN.search(text)
+                    or _EMAIL_PATTERN.search(text)
+                    or _SSN_PATTERN.search(text)
+                )
+            self._text_order_id = _extract_order_id(text) or self._text_order_id
+
+        if message.get("role") == "tool":
+            self.has_tool_result = True
+            try:
+                tool_data = json.loads(message.get("content", "{}"))
+            except (json.JSONDecodeError, TypeError):
+                return
+            if isinstance(tool_data, dict):
+                self._tool_status = tool_data.get("status", self.tool_status)
+                if "order_id" in tool_data:
+                    self._tool_order_id = tool_data["order_id"]
+
+
+class ConversationCache:
+    """LRU cache of :class:`ConversationState` keyed by prefix hash.
+
+    Usage::
+
+        cache = ConversationCache(max_entries=256)
+        state = cache.analyze(messages)
+        state.has_pii, state.order_id, state.tool_status
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._states: "OrderedDict[bytes, ConversationState]" = OrderedDict()
+        self.messages_reused: int = 0
+        self.messages_analyzed: int = 0
+
+    def analyze(self, messages: List[Dict[str, Any]]) -> ConversationState:
+        """Return the state for *messages*, analysing only the new suffix."""
+        digests: List[bytes] = []
+        rolling = _EMPTY_DIGEST
+        for message in messages:
+            rolling = _rolling_digest(rolling, message)
+            digests.append(rolling)
+
+        state = ConversationState()
+        for i in range(len(digests) - 1, -1, -1):
+            cached = self._states.get(digests[i])
+            if cached is not None:
+                self._states.move_to_end(digests[i])
+                state = cached
+                break
+
+        self.messages_reused += state.length
+        for i in range(state.length, len(messages)):
+            state = state.extend(messages[i], digests[i])
+            self._store(state)
+            self.messages_analyzed += 1
+        return state
+
+    def clear(self) -> None:
+        self._states.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._states),
+            "messages_reused": self.messages_reused,
+            "messages_analyzed": self.messages_analyzed,
+        }
+
+    def _store(self, state: ConversationState) -> None:
+        if self.max_entries <= 0:
+            return
+        self._states[state.digest] = state
+        if len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
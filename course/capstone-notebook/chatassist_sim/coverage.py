@@ -0,0 +1,157 @@
+"""Path coverage counters for the simulator.
+
+Every behaviour a test can exercise — a routing branch, a variant of a
+response pool, a ``finish_reason``, an error type or an injected fault —
+gets a fixed slot in one integer array when the :class:`CoverageMap` is
+built, so recording a hit is a dict lookup and an increment and can stay
+on for every request.  Snapshot the counters before a suite and report
+after it to see which variants and branches the suite never reached.
+"""
+
+from array import array
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .stream_faults import STREAM_FAULT_KINDS
+
+ROUTES = (
+    "completion",
+    "streaming",
+    "structured_output",
+    "structured_output.stream",
+    "tool_calling.followup",
+    "tool_calling.followup.stream",
+    "tool_calling.inventory",
+    "tool_calling.inventory.stream",
+    "tool_calling.order_lookup",
+    "tool_calling.order_lookup.stream",
+    "safety_block",
+    "response_cache",
+)
+FINISH_REASONS = ("stop", "length", "tool_calls", "safety")
+ERROR_TYPES = (
+    "authentication_error",
+    "invalid_request",
+    "not_found",
+    "rate_limit_error",
+    "quota_exceeded",
+    "server_error",
+    "overloaded",
+)
+# inject_fault() names, keyed by the _fault_config entry each one sets.
+FAULTS = {
+    "force_rate_limit": "rate_limit",
+    "force_500": "server_error",
+    "force_503": "overloaded",
+    "response_delay_s": "timeout",
+    "truncate_response": "malformed_json",
+    "force_safety_block": "safety_block",
+}
+_CATEGORIES = (
+    ("routes", ROUTES),
+    ("finish_reasons", FINISH_REASONS),
+    ("errors", ERROR_TYPES),
+    ("faults", tuple(FAULTS.values()) + tuple(f"stream_{kind}" for kind in STREAM_FAULT_KINDS)),
+)
+
+
+class CoverageMap:
+    """Hit counters for routes, pool variants, finish reasons, errors and faults.
+
+    Usage::
+
+        coverage = CoverageMap(RESPONSE_POOLS)
+        before = coverage.snapshot()
+        ...                                   # run the suite
+        coverage.report(since=before)["missing"]
+    """
+
+    def __init__(self, pools: Mapping[str, List[Any]]):
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._labels: List[Tuple[str, str]] = []
+        for category, names in _CATEGORIES:
+            for name in names:
+                self._add(category, name)
+        # id(pool) -> (pool, slot of variant 0); the pool is kept to
+        # recognise a recycled id.
+        self._pools: Dict[int, Tuple[List[Any], int]] = {}
+        for name, pool in pools.items():
+            self._pools[id(pool)] = (pool, len(self._labels))
+            for index in range(len(pool)):
+                self._add("variants", f"{name}[{index}]")
+        self.counts = array("Q", bytes(8 * len(self._labels)))
+        self.unregistered = 0
+
+    def _add(self, category: str, name: str) -> None:
+        self._slots[(category, name)] = len(self._labels)
+        self._labels.append((category, name))
+
+    # ------------------------------------------------------------------ #
+    #  Recording
+    # ------------------------------------------------------------------ #
+
+    def hit(self, category: str, name: str) -> None:
+        """Count one hit of *name* in *category* (``"routes"``, ``"errors"``, ...)."""
+        slot = self._slots.get((category, name))
+        if slot is None:
+            self.unregistered += 1
+        else:
+            self.counts[slot] += 1
+
+    def hit_variant(self, pool: List[Any], index: int) -> None:
+        """Count variant *index* of *pool* (the list object from the pools)."""
+        entry = self._pools.get(id(pool))
+        if entry is None or entry[0] is not pool or index >= len(pool):
+            self.unregistered += 1
+        else:
+            self.counts[entry[1] + index] += 1
+
+    def hit_faults(self, fault_config: Mapping[str, Any]) -> None:
+        """Count every fault active in a simulator's ``_fault_config``."""
+        for key, value in fault_config.items():
+            if not value:
+                continue
+            if key == "stream_faults":
+                for fault in value:
+                    self.hit("faults", f"stream_{fault.kind}")
+            else:
+                self.hit("faults", FAULTS.get(key, key))
+
+    # ------------------------------------------------------------------ #
+    #  Snapshots and report
+    # ------------------------------------------------------------------ #
+
+    def snapshot(self) -> array:
+        """A copy of the counters, to pass as ``since`` to :meth:`report`."""
+        return array("Q", self.counts)
+
+    def reset(self) -> None:
+        self.counts = array("Q", bytes(8 * len(self._labels)))
+        self.unregistered = 0
+
+    def report(self, since: Optional[array] = None) -> Dict[str, Any]:
+        """Hits per item and the items never hit (since *since*, if given).
+
+        ``variants`` maps each pool to its per-variant hit list;
+        ``missing`` lists what was not exercised, per category, with
+        variants named ``pool[index]``.
+        """
+        counts = self.counts
+        if since is not None:
+            counts = [now - before for now, before in zip(counts, since)]
+        report: Dict[str, Any] = {category: {} for category, _ in _CATEGORIES}
+        report["variants"] = {}
+        missing: Dict[str, List[str]] = {category: [] for category in report}
+        for (category, name), count in zip(self._labels, counts):
+            if category == "variants":
+                pool = name.partition("[")[0]
+                report["variants"].setdefault(pool, []).append(count)
+            else:
+                report[category][name] = count
+            if not count:
+                missing[category].append(name)
+        covered = sum(1 for count in counts if count)
+        report["missing"] = missing
+        report["covered"] = covered
+        report["total"] = len(self._labels)
+        report["coverage"] = covered / len(self._labels) if self._labels else 0.0
+        return report
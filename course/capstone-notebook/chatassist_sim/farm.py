@@ -0,0 +1,259 @@
+"""Multi-process simulator farm.
+
+A single :class:`ChatAssistSimulator` is bound to one core by the GIL.
+:class:`SimulatorFarm` runs one simulator per worker process behind a
+dispatcher so simulated traffic scales with the number of cores.  Request
+and rate-limit counters live in shared memory, so limits are enforced
+globally rather than per worker; so are the per-key token quotas of
+:class:`~chatassist_sim.quota.QuotaLedger` for the simulator's API key.
+
+Usage::
+
+    with SimulatorFarm(workers=4, seed=42, config={"rate_limit": 100_000}) as farm:
+        responses = farm.map(requests, headers=HEADERS)
+        print(farm.stats(), farm.quota_report())
+"""
+
+import multiprocessing
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .quota import QuotaLedger
+from .response import SimulatedResponse
+from .simulator import ChatAssistSimulator
+
+
+class SharedCounters:
+    """Integer counters in shared memory, guarded by one process lock.
+
+    Besides plain counters it keeps a fixed one-minute window used to
+    enforce the requests-per-minute limit across all workers.
+    """
+
+    FIELDS = (
+        "requests",
+        "rate_limited",
+        "workers_started",
+        "window_start",
+        "window_count",
+    )
+
+    def __init__(self, context=None):
+        context = context or multiprocessing.get_context()
+        self._values = context.Array("q", len(self.FIELDS), lock=False)
+        self._lock = context.Lock()
+        self._index = {name: i for i, name in enumerate(self.FIELDS)}
+
+    def increment(self, name: str, amount: int = 1) -> int:
+        """Add *amount* to counter *name* and return the new value."""
+        i = self._index[name]
+        with self._lock:
+            self._values[i] += amount
+            return self._values[i]
+
+    def admit(self, limit: int, now: Optional[float] = None) -> Tuple[bool, int, int]:
+        """Count one request against the global per-minute *limit*.
+
+        Returns ``(allowed, remaining, reset_epoch_s)``.
+        """
+        now = int(now if now is not None else time.time())
+        window = now - now % 60
+        ws, wc = self._index["window_start"], self._index["window_count"]
+        with self._lock:
+            if self._values[ws] != window:
+                self._values[ws] = window
+                self._values[wc] = 0
+            allowed = self._values[wc] < limit
+            if allowed:
+                self._values[wc] += 1
+                self._values[self._index["requests"]] += 1
+            else:
+                self._values[self._index["rate_limited"]] += 1
+            return allowed, max(0, limit - self._values[wc]), window + 60
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {name: self._values[i] for name, i in self._index.items()}
+
+
+# ------------------------------------------------------------------ #
+#  Worker-process state
+# ------------------------------------------------------------------ #
+
+_worker_sim: Optional[ChatAssistSimulator] = None
+_worker_counters: Optional[SharedCounters] = None
+_worker_enforce: bool = True
+
+
+def _init_worker(
+    config: Optional[Dict[str, Any]],
+    seed: Optional[int],
+    per_request_seed: bool,
+    counters: SharedCounters,
+    enforce_rate_limit: bool,
+    quota_storage=None,
+    quota_lock=None,
+) -> None:
+    global _worker_sim, _worker_counters, _worker_enforce
+    worker_index = counters.increment("workers_started") - 1
+    _worker_sim = ChatAssistSimulator(config)
+    if seed is not None:
+        # Per-request seeding makes responses worker-independent; otherwise
+        # give each worker its own stream so they don't repeat each other.
+        _worker_sim.set_seed(
+            seed if per_request_seed else seed + worker_index,
+            per_request=per_request_seed,
+        )
+    if quota_storage is not None:
+        _worker_sim._quota.attach(
+            ChatAssistSimulator.VALID_API_KEY, quota_storage, quota_lock
+        )
+    _worker_counters = counters
+    _worker_enforce = enforce_rate_limit
+
+
+def _worker_call(
+    request_body: Dict[str, Any], headers: Optional[Dict[str, str]]
+) -> SimulatedResponse:
+    sim = _worker_sim
+    limit = sim._sim_config["rate_limit"]
+    if _worker_enforce:
+        allowed, remaining, reset = _worker_counters.admit(limit)
+        if not allowed:
+            retry_after = max(1, reset - int(time.time()))
+            return sim._build_error_response(
+                429,
+                "rate_limit_error",
+                f"Rate limit exceeded. Try again in {retry_after} seconds.",
+                extra_headers={
+                    "Retry-After": str(retry_after),
+                    "X-RateLimit-Limit": str(limit),
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(reset),
+                },
+            )
+    else:
+        _worker_counters.increment("requests")
+        remaining = None
+
+    response = sim.chat_completions(request_body, headers)
+    if remaining is not None and "X-RateLimit-Remaining" in response.headers:
+        response.headers["X-RateLimit-Remaining"] = str(remaining)
+        response.headers["X-RateLimit-Reset"] = str(reset)
+    return response
+
+
+def _worker_call_args(args: Tuple[Dict[str, Any], Optional[Dict[str, str]]]):
+    return _worker_call(*args)
+
+
+# ------------------------------------------------------------------ #
+#  Dispatcher
+# ------------------------------------------------------------------ #
+
+class SimulatorFarm:
+    """Dispatch ``chat_completions`` calls across worker processes.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Number of worker processes (default: CPU count).
+    config : dict, optional
+        Simulator config passed to every worker.
+    seed : int, optional
+        Seed for reproducible runs.  With *per_request_seed* (the default)
+        each response depends only on its request, not on which worker
+        handled it — see :meth:`ChatAssistSimulator.set_seed`.
+    enforce_rate_limit : bool
+        Reject requests beyond the global ``rate_limit`` (requests per
+        minute) with 429, counted across all workers.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+        per_request_seed: bool = True,
+        enforce_rate_limit: bool = True,
+        context=None,
+    ):
+        context = context or multiprocessing.get_context()
+        self.workers = workers or multiprocessing.cpu_count()
+        self._api_tier = (config or {}).get("api_tier", "standard")
+        self.counters = SharedCounters(context)
+        self._quota_storage = context.Array("q", QuotaLedger.SLOTS, lock=False)
+        self._quota_lock = context.Lock()
+        self._pool = context.Pool(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(
+                config, seed, per_request_seed, self.counters, enforce_rate_limit,
+                self._quota_storage, self._quota_lock,
+            ),
+        )
+
+    def chat_completions(
+        self,
+        request_body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> SimulatedResponse:
+        """Simulate one request on whichever worker is free."""
+        return self._pool.apply(_worker_call, (request_body, headers))
+
+    def map(
+        self,
+        requests: Iterable[Dict[str, Any]],
+        headers: Optional[Dict[str, str]] = None,
+        chunksize: int = 32,
+    ) -> List[SimulatedResponse]:
+        """Simulate many requests in parallel, preserving order.
+
+        Larger *chunksize* values amortise inter-process overhead.
+        """
+        args = [(body, headers) for body in requests]
+        return self._pool.map(_worker_call_args, args, chunksize)
+
+    def imap(
+        self,
+        requests: Iterable[Dict[str, Any]],
+        headers: Optional[Dict[str, str]] = None,
+        chunksize: int = 32,
+    ):
+        """Lazy, order-preserving variant of :meth:`map`."""
+        args = ((body, headers) for body in requests)
+        return self._pool.imap(_worker_call_args, args, chunksize)
+
+    def stats(self) -> Dict[str, int]:
+        """Global counters shared by all workers."""
+        snapshot = self.counters.snapshot()
+        return {
+            "workers": self.workers,
+            "requests": snapshot["requests"],
+            "rate_limited": snapshot["rate_limited"],
+        }
+
+    def quota_report(self) -> Dict[str, Dict[str, Any]]:
+        """Quota usage of the simulator's API key, summed over all workers.
+
+        Same shape as :meth:`ChatAssistSimulator.quota_report`, read from
+        the ledger storage the workers share.
+        """
+        ledger = QuotaLedger()
+        ledger.attach(
+            ChatAssistSimulator.VALID_API_KEY,
+            self._quota_storage,
+            self._quota_lock,
+            tier=self._api_tier,
+        )
+        return ledger.report()
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self) -> "SimulatorFarm":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -3,6 +3,8 @@
 from contextlib import contextmanager
 import copy
 
+from .stream_faults import StreamFault
+
 
 @contextmanager
 def inject_fault(simulator, fault_type, **kwargs):
@@ -16,6 +18,17 @@ def inject_fault(simulator, fault_type, **kwargs):
     * ``"timeout"``        -- sleep for *delay* seconds (default 15)
     * ``"malformed_json"`` -- truncate response body
     * ``"safety_block"``   -- force a safety-blocked response
+
+    Streaming faults apply to ``stream=True`` responses and stack when
+    nested.  Each accepts ``at`` (frame position, ``-1`` for ``[DONE]``)
+    and/or ``probability`` (per frame):
+
+    * ``"stream_stall"``      -- pause *delay* seconds before a chunk
+    * ``"stream_disconnect"`` -- drop the connection (``raise_error=True``
+      raises :class:`~chatassist_sim.stream_faults.StreamInterrupted`)
+    * ``"stream_duplicate"``  -- send a frame twice
+    * ``"stream_split"``      -- deliver a frame as two partial lines
+    * ``"stream_heartbeat"``  -- send an SSE comment line before a frame
     """
     original = copy.copy(simulator._fault_config)
 
@@ -31,6 +44,11 @@ def inject_fault(simulator, fault_type, **kwargs):
         simulator._fault_config["truncate_response"] = True
     elif fault_type == "safety_block":
         simulator._fault_config["force_safety_block"] = True
+    elif fault_type.startswith("stream_"):
+        fault = StreamFault(fault_type[len("stream_"):], **kwargs)
+        simulator._fault_config["stream_faults"] = (
+            list(original.get("stream_faults", [])) + [fault]
+        )
     else:
         raise ValueError(f"Unknown fault type: {fault_type!r}")
 
@@ -0,0 +1,237 @@
+"""Opt-in per-stage timing.
+
+:class:`StageTimer` wraps selected methods of an object with
+``time.perf_counter_ns`` timers and aggregates the measurements in
+:class:`LatencyHistogram` objects with power-of-two nanosecond buckets,
+so recording is a couple of integer operations.  Nothing is wrapped until
+:meth:`StageTimer.install` is called and :meth:`StageTimer.uninstall`
+restores the original methods, so a disabled timer costs nothing.
+
+Stage times are *exclusive*: time spent in a nested timed stage is
+charged to that stage, not to its caller, so the stages of one request
+add up to its total (recorded separately as the ``total`` stage).
+"""
+
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+_BUCKETS = 64
+
+
+class _Layer:
+    """One :func:`patch_method` wrapper's link to the method it wraps.
+
+    Wrappers call the method through the layer, so a layer in the middle
+    of a chain can be unlinked by pointing the layer above it further
+    down.
+    """
+
+    __slots__ = ("inner", "previous")
+
+    def __init__(self, inner: Callable, previous: Any):
+        self.inner = inner
+        # Instance attribute to put back once no wrapper is left above it.
+        self.previous = previous
+
+    def __call__(self, *args, **kwargs):
+        return self.inner(*args, **kwargs)
+
+
+# (owner, attribute name, layer, installed wrapper)
+Patch = Tuple[Any, str, _Layer, Callable]
+
+
+def patch_method(target: Any, path: str, wrap: Callable[[Callable], Callable]) -> Patch:
+    """Replace method *path* of *target* with ``wrap(method)`` on the instance.
+
+    A dotted path (``"_cache.get"``) patches a method of an attribute.
+    """
+    owner = target
+    *parents, name = path.split(".")
+    for parent in parents:
+        owner = getattr(owner, parent)
+    layer = _Layer(getattr(owner, name), vars(owner).get(name))
+    wrapper = wrap(layer)
+    wrapper._patch_layer = layer
+    setattr(owner, name, wrapper)
+    return owner, name, layer, wrapper
+
+
+def restore_methods(patches: List[Patch]) -> None:
+    """Undo :func:`patch_method` calls, newest first.
+
+    A method patched again since (by another timer or tracer) keeps the
+    newer wrapper, which from then on calls past the removed one, so
+    instrumentation can be disabled in any order.
+    """
+    for owner, name, layer, wrapper in reversed(patches):
+        current = vars(owner).get(name)
+        if current is wrapper:
+            if layer.previous is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, layer.previous)
+            continue
+        while current is not None:
+            above = getattr(current, "_patch_layer", None)
+            if above is None:
+                break
+            if above.inner is wrapper:
+                above.inner = layer.inner
+                above.previous = layer.previous
+                break
+            current = above.inner
+
+
+class LatencyHistogram:
+    """Count of durations per power-of-two bucket, plus count/sum/min/max.
+
+    Bucket ``b`` holds durations below ``2**b`` ns (and at least
+    ``2**(b-1)``); percentiles are reported as the bucket's upper bound.
+    """
+
+    __slots__ = ("buckets", "count", "sum_ns", "min_ns", "max_ns")
+
+    def __init__(self):
+        self.buckets = [0] * _BUCKETS
+        self.count = 0
+        self.sum_ns = 0
+        self.min_ns: Optional[int] = None
+        self.max_ns = 0
+
+    def record(self, ns: int) -> None:
+        self.buckets[ns.bit_length()] += 1
+        self.count += 1
+        self.sum_ns += ns
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, p: float) -> int:
+        """Upper bound (ns) of the bucket holding the *p*-th percentile."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for b, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(1 << b, self.max_ns)
+        return self.max_ns
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ns": self.sum_ns,
+            "mean_ns": self.sum_ns / self.count if self.count else 0.0,
+            "min_ns": self.min_ns or 0,
+            "max_ns": self.max_ns,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "buckets": {1 << b: n for b, n in enumerate(self.buckets) if n},
+        }
+
+
+class StageTimer:
+    """Time methods of one object per named stage.
+
+    Usage::
+
+        timer = StageTimer()
+        timer.install(sim, {"routing": "_route", "conversation": "_conversations.analyze"})
+        ...
+        timer.uninstall()
+        timer.as_dict()["routing"]["p99_ns"]
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        # Per active timed call: nanoseconds spent in nested timed stages.
+        self._stack: List[int] = []
+        self._installed: List[Patch] = []
+
+    @property
+    def installed(self) -> bool:
+        return bool(self._installed)
+
+    def install(self, target: Any, stages: Mapping[str, str]) -> None:
+        """Wrap ``target.<path>`` for each ``stage: path`` in *stages*.
+
+        A dotted path (``"_cache.get"``) wraps a method of an attribute.
+        """
+        self.uninstall()
+        for stage, path in stages.items():
+            self._installed.append(
+                patch_method(target, path, partial(self._wrap, stage))
+            )
+
+    def uninstall(self) -> None:
+        """Restore every wrapped method."""
+        restore_methods(self._installed)
+        self._installed = []
+        self._stack = []
+
+    def reset(self) -> None:
+        self.histograms = {}
+
+    def _histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        return histogram
+
+    def _wrap(self, stage: str, method: Callable) -> Callable:
+        clock = time.perf_counter_ns
+        timer = self
+
+        def timed(*args, **kwargs):
+            stack = timer._stack
+            stack.append(0)
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                nested = stack.pop()
+                timer._histogram(stage).record(max(0, elapsed - nested))
+                if stack:
+                    stack[-1] += elapsed
+                else:
+                    timer._histogram("total").record(elapsed)
+
+        timed.__wrapped__ = method
+        return timed
+
+    # ------------------------------------------------------------------ #
+    #  Export
+    # ------------------------------------------------------------------ #
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """``{stage: histogram summary}``, stages in first-seen order."""
+        return {stage: h.as_dict() for stage, h in self.histograms.items()}
+
+    def to_prometheus(self, metric: str = "chatassist_sim_stage_seconds") -> str:
+        """Render the histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {metric} Time per simulator stage, excluding nested stages.",
+            f"# TYPE {metric} histogram",
+        ]
+        used = [
+            b for b in range(_BUCKETS)
+            if any(h.buckets[b] for h in self.histograms.values())
+        ]
+        # Every series shares the same bucket bounds.
+        bounds = range(used[0], used[-1] + 1) if used else range(0)
+        for stage, h in self.histograms.items():
+            label = f'stage="{stage}"'
+            cumulative = 0
+            for b in bounds:
+                cumulative += h.buckets[b]
+                lines.append(f'{metric}_bucket{{{label},le="{(1 << b) / 1e9:.9g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {h.count}')
+            lines.append(f"{metric}_sum{{{label}}} {h.sum_ns / 1e9:.9g}")
+            lines.append(f"{metric}_count{{{label}}} {h.count}")
+        return "\n".join(lines) + "\n"
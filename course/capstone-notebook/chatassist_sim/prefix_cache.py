@@ -0,0 +1,136 @@
+"""Prompt-prefix caching simulation.
+
+Providers that cache prompt prefixes charge less and answer faster when a
+request starts with tokens they have recently processed for the same API
+key — typically a long system prompt plus tool definitions.
+:class:`PrefixCacheIndex` remembers, per API key, the prefix hashes of
+recent prompts (tool definitions first, then each message) and reports
+how many leading tokens of a new prompt were already seen.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .conversation import ConversationState
+from .tokenizer import count_tokens
+
+# Serialized tool list -> (digest, tokens); deployments reuse a handful.
+_TOOLS_MEMO: Dict[str, Tuple[bytes, int]] = {}
+_TOOLS_MEMO_SIZE = 64
+
+
+def tools_fingerprint(tools: Optional[List[Dict[str, Any]]]) -> Tuple[bytes, int]:
+    """Return ``(digest, tokens)`` for a tool-definition list.
+
+    Tool definitions are re-sent unchanged on every request, so their
+    token counts are memoized by serialized form.
+    """
+    if not tools:
+        return b"", 0
+    raw = json.dumps(tools, sort_keys=True)
+    cached = _TOOLS_MEMO.get(raw)
+    if cached is None:
+        digest = hashlib.blake2b(raw.encode(), digest_size=16).digest()
+        cached = (digest, count_tokens(raw))
+        if len(_TOOLS_MEMO) < _TOOLS_MEMO_SIZE:
+            _TOOLS_MEMO[raw] = cached
+    return cached
+
+
+class PrefixCacheIndex:
+    """Per-API-key LRU index of recently processed prompt prefixes.
+
+    Parameters
+    ----------
+    max_prefixes : int
+        Prefixes remembered per API key.
+    min_tokens : int
+        Shortest prefix eligible for caching.
+    ttl_s : float
+        Seconds a prefix stays cached after it was last used.
+    """
+
+    def __init__(
+        self,
+        max_prefixes: int = 1024,
+        min_tokens: int = 128,
+        ttl_s: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_prefixes = max_prefixes
+        self.min_tokens = min_tokens
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._keys: Dict[str, "OrderedDict[bytes, float]"] = {}
+        self.requests = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def lookup_and_record(
+        self,
+        api_key: str,
+        tools: Optional[List[Dict[str, Any]]],
+        conversation: ConversationState,
+    ) -> Tuple[int, int]:
+        """Return ``(prompt_tokens, cached_tokens)`` and record the prompt."""
+        tools_digest, tools_tokens = tools_fingerprint(tools)
+        index = self._keys.setdefault(api_key, OrderedDict())
+        now = self._clock()
+
+        cached_tokens = 0
+        state = conversation
+        while state is not None and state.length > 0:
+            seen_at = index.get(tools_digest + state.digest)
+            if seen_at is not None and now - seen_at <= self.ttl_s:
+                cached_tokens = tools_tokens + state.tokens
+                break
+            state = state.parent
+
+        # Record every eligible prefix of this prompt as freshly used.  A
+        # prefix already in the index was recorded with its ancestors.
+        state = conversation
+        while state is not None and state.length > 0:
+            if tools_tokens + state.tokens < self.min_tokens:
+                break
+            key = tools_digest + state.digest
+            known = key in index
+            index[key] = now
+            index.move_to_end(key)
+            if known:
+                break
+            state = state.parent
+        while len(index) > self.max_prefixes:
+            index.popitem(last=False)
+
+        prompt_tokens = tools_tokens + conversation.tokens
+        self.requests += 1
+        self.hits += cached_tokens > 0
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        return prompt_tokens, cached_tokens
+
+    def clear(self) -> None:
+        self._keys.clear()
+
+    def stats(self, cached_price_factor: float = 0.5) -> Dict[str, Any]:
+        """Hit rate and token savings across all keys.
+
+        ``billed_prompt_tokens`` charges cached tokens at
+        *cached_price_factor* of the normal rate.
+        """
+        uncached = self.prompt_tokens - self.cached_tokens
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.requests if self.requests else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_fraction": (
+                self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+            ),
+            "billed_prompt_tokens": uncached + self.cached_tokens * cached_price_factor,
+        }
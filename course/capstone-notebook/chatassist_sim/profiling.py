@@ -0,0 +1,253 @@
+"""Allocation profiling for long simulator runs.
+
+:class:`MemoryProfiler` wraps a request method while ``tracemalloc`` is
+running.  Every call's net allocation (traced bytes when it returns minus
+before it started, so the returned response included) is recorded against
+the tags its nested calls produced, e.g. the response pools it drew from.
+Every *every* requests a snapshot is taken: the first is the baseline,
+taken once caches are warm, and the latest is diffed against it so growth
+can be attributed to the innermost function of the profiled package that
+allocated it.
+"""
+
+import ast
+import fnmatch
+import os
+import time
+import tracemalloc
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from .instrumentation import Patch, patch_method, restore_methods
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class MemoryProfiler:
+    """Snapshot-based allocation profiling of one object's requests.
+
+    Parameters
+    ----------
+    every : int
+        Requests between ``tracemalloc`` snapshots.
+    frames : int
+        Frames stored per allocation; enough to reach the package's own
+        frame from inside ``json``/``copy``/``uuid``.
+    package_dir : str
+        Allocations are attributed to functions defined under this
+        directory (default: ``chatassist_sim``).
+
+    Usage::
+
+        profiler = MemoryProfiler(every=1000)
+        profiler.install(sim, "_chat_completions", {"_select_from_pool_raw": pool_tag})
+        ...
+        profiler.report()["growth_bytes_per_request"]
+        profiler.uninstall()
+    """
+
+    def __init__(self, every: int = 1000, frames: int = 16, package_dir: str = _PACKAGE_DIR):
+        if every < 1:
+            raise ValueError(f"every must be at least 1, got {every}")
+        self.every = every
+        self.frames = frames
+        self.package_dir = package_dir
+        self.requests = 0
+        self.net_bytes = 0
+        self.snapshots: "deque[Dict[str, Any]]" = deque(maxlen=1024)
+        self._by_tag: Dict[str, List[int]] = {}
+        self._tags: Optional[List[str]] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._baseline_summary: Optional[Dict[str, Any]] = None
+        self._latest: Optional[tracemalloc.Snapshot] = None
+        self._started = time.monotonic()
+        self._installed: List[Patch] = []
+        self._owns_tracemalloc = False
+        self._functions: Dict[str, List[Tuple[int, int, str]]] = {}
+
+    # ------------------------------------------------------------------ #
+    #  Instrumentation
+    # ------------------------------------------------------------------ #
+
+    def install(
+        self,
+        target: Any,
+        request_path: str,
+        tags: Optional[Mapping[str, Callable[[tuple], str]]] = None,
+    ) -> None:
+        """Profile calls to ``target.<request_path>``.
+
+        *tags* maps nested method paths to a function of their positional
+        arguments returning a label that the request is counted under.
+        """
+        self.uninstall()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owns_tracemalloc = True
+        self._installed.append(patch_method(target, request_path, self._wrap_request))
+        for path, tag in (tags or {}).items():
+            self._installed.append(patch_method(target, path, partial(self._wrap_tag, tag)))
+
+    def uninstall(self) -> None:
+        """Restore the wrapped methods and stop ``tracemalloc`` if we started it."""
+        restore_methods(self._installed)
+        self._installed = []
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def _wrap_request(self, method: Callable) -> Callable:
+        profiler = self
+        traced_memory = tracemalloc.get_traced_memory
+
+        def profiled(*args, **kwargs):
+            tags = profiler._tags = []
+            before = traced_memory()[0]
+            try:
+                return method(*args, **kwargs)
+            finally:
+                net = traced_memory()[0] - before
+                profiler._tags = None
+                profiler.requests += 1
+                profiler.net_bytes += net
+                for tag in set(tags) or ("<untagged>",):
+                    counts = profiler._by_tag.get(tag)
+                    if counts is None:
+                        counts = profiler._by_tag[tag] = [0, 0]
+                    counts[0] += 1
+                    counts[1] += net
+                if profiler.requests % profiler.every == 0:
+                    profiler.snapshot()
+
+        profiled.__wrapped__ = method
+        return profiled
+
+    def _wrap_tag(self, tag: Callable[[tuple], str], method: Callable) -> Callable:
+        profiler = self
+
+        def tagged(*args, **kwargs):
+            if profiler._tags is not None:
+                profiler._tags.append(tag(args))
+            return method(*args, **kwargs)
+
+        tagged.__wrapped__ = method
+        return tagged
+
+    # ------------------------------------------------------------------ #
+    #  Snapshots and report
+    # ------------------------------------------------------------------ #
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Take a snapshot now (also done automatically every *every* requests)."""
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(True, os.path.join(self.package_dir, "*"), all_frames=True),
+            # The profiler's own bookkeeping and the snapshots themselves.
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ])
+        summary = {
+            "requests": self.requests,
+            "elapsed_s": time.monotonic() - self._started,
+            "traced_bytes": tracemalloc.get_traced_memory()[0],
+            "package_bytes": sum(trace.size for trace in snapshot.traces),
+        }
+        if self._baseline is None:
+            self._baseline = snapshot
+            self._baseline_summary = summary
+        else:
+            self._latest = snapshot
+        self.snapshots.append(summary)
+        return summary
+
+    def report(self, limit: int = 20) -> Dict[str, Any]:
+        """Bytes per request, growth since the baseline, and where it went.
+
+        ``growth_*`` compare the latest snapshot with the first one;
+        ``by_function`` lists the *limit* functions whose live allocations
+        grew the most in between, ``by_tag`` the net bytes per request of
+        requests carrying each tag.
+        """
+        report: Dict[str, Any] = {
+            "requests": self.requests,
+            "net_bytes_per_request": self.net_bytes / self.requests if self.requests else 0.0,
+            "growth_bytes_per_request": 0.0,
+            "growth_bytes_per_s": 0.0,
+            "by_function": {},
+            "by_tag": {
+                tag: {
+                    "requests": requests,
+                    "net_bytes": net,
+                    "bytes_per_request": net / requests,
+                }
+                for tag, (requests, net) in sorted(self._by_tag.items())
+            },
+            "snapshots": list(self.snapshots),
+        }
+        if self._latest is None:
+            return report
+
+        first, last = self._baseline_summary, self.snapshots[-1]
+        growth = last["package_bytes"] - first["package_bytes"]
+        requests = last["requests"] - first["requests"]
+        seconds = last["elapsed_s"] - first["elapsed_s"]
+        report["growth_bytes_per_request"] = growth / requests if requests else 0.0
+        report["growth_bytes_per_s"] = growth / seconds if seconds else 0.0
+
+        by_function: Dict[str, int] = {}
+        for stat in self._latest.compare_to(self._baseline, "traceback"):
+            where = self._attribute(stat.traceback)
+            if stat.size_diff and where is not None:
+                by_function[where] = by_function.get(where, 0) + stat.size_diff
+        ranked = sorted(by_function.items(), key=lambda item: -item[1])
+        report["by_function"] = dict(ranked[:limit])
+        return report
+
+    def _attribute(self, traceback: tracemalloc.Traceback) -> Optional[str]:
+        """``module.qualname`` of the innermost frame inside the package.
+
+        None for allocations made by the profiler itself.
+        """
+        pattern = os.path.join(self.package_dir, "*")
+        for frame in reversed(traceback):
+            if frame.filename == __file__:
+                return None
+            if fnmatch.fnmatch(frame.filename, pattern):
+                module = os.path.splitext(os.path.basename(frame.filename))[0]
+                return f"{module}.{self._function_at(frame.filename, frame.lineno)}"
+        return "<outside package>"
+
+    def _function_at(self, filename: str, lineno: int) -> str:
+        functions = self._functions.get(filename)
+        if functions is None:
+            functions = self._functions[filename] = _function_ranges(filename)
+        # Ranges are sorted by start, so the last match is the innermost.
+        name = "<module>"
+        for start, end, qualname in functions:
+            if start > lineno:
+                break
+            if lineno <= end:
+                name = qualname
+        return name
+
+
+def _function_ranges(filename: str) -> List[Tuple[int, int, str]]:
+    """``(first line, last line, qualname)`` of every function in *filename*."""
+    with open(filename) as f:
+        tree = ast.parse(f.read(), filename)
+    ranges = []
+
+    def visit(node, prefix):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualname = prefix + child.name
+                ranges.append((child.lineno, child.end_lineno, qualname))
+                visit(child, qualname + ".")
+            elif isinstance(child, ast.ClassDef):
+                visit(child, prefix + child.name + ".")
+            else:
+                visit(child, prefix)
+
+    visit(tree, "")
+    ranges.sort()
+    return ranges
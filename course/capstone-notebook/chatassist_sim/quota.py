@@ -0,0 +1,253 @@
+"""Per-key request and token quota ledger.
+
+Tracks, per API key, requests and tokens over sliding one-minute and
+one-day windows against the tier limits from the API spec, and reports
+how close each key is to saturating its tier.
+
+Each window is a ring of fixed-width buckets with a running total, so
+recording and checking are amortised O(1): a bucket is cleared at most
+once per lap of the ring.  All counters for one key live in a single
+flat integer array, which :class:`~chatassist_sim.farm.SimulatorFarm`
+places in shared memory so limits hold across worker processes.
+"""
+
+import time
+from array import array
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, MutableSequence, Optional
+
+# Limits from the API spec; ``None`` means unlimited.
+API_TIERS: Dict[str, Dict[str, Optional[int]]] = {
+    "free": {"requests_per_min": 10, "tokens_per_min": 10_000, "tokens_per_day": 100_000},
+    "standard": {"requests_per_min": 60, "tokens_per_min": 100_000, "tokens_per_day": 2_000_000},
+    "enterprise": {"requests_per_min": 300, "tokens_per_min": 1_000_000, "tokens_per_day": None},
+}
+
+
+class _Window:
+    """Sliding window over ``buckets`` slots of ``bucket_s`` seconds.
+
+    Layout inside the key's array, starting at ``offset``::
+
+        [last_bucket, total, slot_0 ... slot_{n-1}]
+    """
+
+    def __init__(self, offset: int, buckets: int, bucket_s: int):
+        self.offset = offset
+        self.buckets = buckets
+        self.bucket_s = bucket_s
+        self.size = buckets + 2
+
+    def _advance(self, data: MutableSequence[int], now: float) -> int:
+        current = int(now) // self.bucket_s
+        o = self.offset
+        last = data[o]
+        if current - last >= self.buckets:
+            for i in range(o + 1, o + self.size):
+                data[i] = 0
+        else:
+            for b in range(last + 1, current + 1):
+                slot = o + 2 + b % self.buckets
+                data[o + 1] -= data[slot]
+                data[slot] = 0
+        if current > last:
+            data[o] = current
+        return current
+
+    def add(self, data: MutableSequence[int], now: float, amount: int) -> None:
+        current = self._advance(data, now)
+        data[self.offset + 2 + current % self.buckets] += amount
+        data[self.offset + 1] += amount
+
+    def total(self, data: MutableSequence[int], now: float) -> int:
+        self._advance(data, now)
+        return data[self.offset + 1]
+
+    def seconds_until_below(self, data: MutableSequence[int], now: float, limit: int) -> int:
+        """Seconds until enough buckets expire for the total to drop below *limit*."""
+        current = self._advance(data, now)
+        total = data[self.offset + 1]
+        for age in range(self.buckets - 1, -1, -1):
+            total -= data[self.offset + 2 + (current - age) % self.buckets]
+            if total < limit:
+                wait = (self.buckets - age) * self.bucket_s - int(now) % self.bucket_s
+                return max(1, wait)
+        return self.buckets * self.bucket_s
+
+
+_REQUESTS_MIN = _Window(0, 60, 1)
+_TOKENS_MIN = _Window(_REQUESTS_MIN.offset + _REQUESTS_MIN.size, 60, 1)
+_TOKENS_DAY = _Window(_TOKENS_MIN.offset + _TOKENS_MIN.size, 1440, 60)
+_TOTALS = _TOKENS_DAY.offset + _TOKENS_DAY.size
+_REQUESTS, _PROMPT, _COMPLETION, _OVER_LIMIT = range(_TOTALS, _TOTALS + 4)
+
+
+class QuotaExceeded:
+    """Why a request was rejected, with everything needed for a 429."""
+
+    __slots__ = ("error_type", "message", "retry_after", "limit", "window")
+
+    def __init__(self, error_type: str, message: str, retry_after: int, limit: int, window: str):
+        self.error_type = error_type
+        self.message = message
+        self.retry_after = retry_after
+        self.limit = limit
+        self.window = window
+
+
+class QuotaLedger:
+    """Sliding-window request/token accounting per API key and tier.
+
+    Usage::
+
+        ledger = QuotaLedger()
+        rejection = ledger.admit(api_key, "standard")
+        if rejection is None:
+            ...  # serve the request
+            ledger.charge(api_key, prompt_tokens, completion_tokens)
+        ledger.report()
+    """
+
+    SLOTS = _OVER_LIMIT + 1
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._data: Dict[str, MutableSequence[int]] = {}
+        self._tiers: Dict[str, str] = {}
+        self._locks: Dict[str, Any] = {}
+
+    def attach(
+        self,
+        api_key: str,
+        storage: MutableSequence[int],
+        lock=None,
+        tier: Optional[str] = None,
+    ) -> None:
+        """Keep *api_key*'s counters in *storage* (e.g. shared memory).
+
+        *tier* sets the limits :meth:`report` compares against before the
+        key's first :meth:`admit`.
+        """
+        if len(storage) < self.SLOTS:
+            raise ValueError(f"storage needs {self.SLOTS} slots, got {len(storage)}")
+        self._data[api_key] = storage
+        self._locks[api_key] = lock or nullcontext()
+        if tier is not None:
+            self._tiers[api_key] = tier
+
+    def _slots(self, api_key: str) -> MutableSequence[int]:
+        data = self._data.get(api_key)
+        if data is None:
+            data = self._data[api_key] = array("q", bytes(8 * self.SLOTS))
+            self._locks[api_key] = nullcontext()
+        return data
+
+    def admit(
+        self, api_key: str, tier: str, enforce: bool = True
+    ) -> Optional[QuotaExceeded]:
+        """Check *api_key* against *tier* and count the request if allowed.
+
+        Returns None when the request may proceed, otherwise a
+        :class:`QuotaExceeded` describing the first exhausted budget.
+        With ``enforce=False`` over-limit requests are only tallied.
+        """
+        limits = API_TIERS[tier]
+        data = self._slots(api_key)
+        now = self._clock()
+        self._tiers[api_key] = tier
+        with self._locks[api_key]:
+            rejection = self._first_exhausted(data, now, limits)
+            if rejection is not None:
+                data[_OVER_LIMIT] += 1
+                if enforce:
+                    return rejection
+            _REQUESTS_MIN.add(data, now, 1)
+            data[_REQUESTS] += 1
+        return None
+
+    def charge(self, api_key: str, prompt_tokens: int, completion_tokens: int) -> None:
+        """Record the tokens a served request consumed."""
+        data = self._slots(api_key)
+        now = self._clock()
+        tokens = prompt_tokens + completion_tokens
+        with self._locks[api_key]:
+            _TOKENS_MIN.add(data, now, tokens)
+            _TOKENS_DAY.add(data, now, tokens)
+            data[_PROMPT] += prompt_tokens
+            data[_COMPLETION] += completion_tokens
+
+    def remaining(self, api_key: str, tier: str) -> Dict[str, Optional[int]]:
+        """Requests and tokens left in the current minute/day windows."""
+        limits = API_TIERS[tier]
+        data = self._slots(api_key)
+        now = self._clock()
+        with self._locks[api_key]:
+            used = {
+                "requests_per_min": _REQUESTS_MIN.total(data, now),
+                "tokens_per_min": _TOKENS_MIN.total(data, now),
+                "tokens_per_day": _TOKENS_DAY.total(data, now),
+            }
+        return {
+            name: None if limits[name] is None else max(0, limits[name] - used[name])
+            for name in used
+        }
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Usage, limits and saturation per API key."""
+        report = {}
+        now = self._clock()
+        for api_key, data in self._data.items():
+            tier = self._tiers.get(api_key, "standard")
+            limits = API_TIERS[tier]
+            with self._locks[api_key]:
+                window = {
+                    "requests_per_min": _REQUESTS_MIN.total(data, now),
+                    "tokens_per_min": _TOKENS_MIN.total(data, now),
+                    "tokens_per_day": _TOKENS_DAY.total(data, now),
+                }
+                totals = {
+                    "requests": data[_REQUESTS],
+                    "over_limit": data[_OVER_LIMIT],
+                    "prompt_tokens": data[_PROMPT],
+                    "completion_tokens": data[_COMPLETION],
+                }
+            report[api_key] = {
+                "tier": tier,
+                "limits": dict(limits),
+                "window": window,
+                "saturation": {
+                    name: None if limits[name] is None else window[name] / limits[name]
+                    for name in window
+                },
+                "totals": totals,
+            }
+        return report
+
+    def _first_exhausted(self, data, now, limits) -> Optional[QuotaExceeded]:
+        rpm = limits["requests_per_min"]
+        if rpm is not None and _REQUESTS_MIN.total(data, now) >= rpm:
+            wait = _REQUESTS_MIN.seconds_until_below(data, now, rpm)
+            return QuotaExceeded(
+                "rate_limit_error",
+                f"Rate limit exceeded. Try again in {wait} seconds.",
+                wait, rpm, "requests_per_min",
+            )
+        tpm = limits["tokens_per_min"]
+        if tpm is not None and _TOKENS_MIN.total(data, now) >= tpm:
+            wait = _TOKENS_MIN.seconds_until_below(data, now, tpm)
+            return QuotaExceeded(
+                "rate_limit_error",
+                f"Token rate limit exceeded. Try again in {wait} seconds.",
+                wait, tpm, "tokens_per_min",
+            )
+        tpd = limits["tokens_per_day"]
+        if tpd is not None:
+            used = _TOKENS_DAY.total(data, now)
+            if used >= tpd:
+                wait = _TOKENS_DAY.seconds_until_below(data, now, tpd)
+                return QuotaExceeded(
+                    "quota_exceeded",
+                    f"Daily token quota exceeded. Current usage: {used:,} / {tpd:,} tokens.",
+                    wait, tpd, "tokens_per_day",
+                )
+        return None
@@ -42,6 +42,14 @@ class SimulatedResponse:
         """
         raise RuntimeError("Not a streaming response")
 
+    async def aiter_lines(self):
+        """Async variant of :meth:`iter_lines`.
+
+        The base class raises — ``StreamingResponse`` overrides this.
+        """
+        raise RuntimeError("Not a streaming response")
+        yield  # unreachable; makes this an async generator
+
     # --------------------------------------------------------------------- #
     # Convenience dunder methods
     # --------------------------------------------------------------------- #
@@ -0,0 +1,135 @@
+"""LRU/TTL memoization of deterministic (``temperature == 0``) responses.
+
+At temperature 0 the simulator always picks the first eligible variant,
+so routing, PII scrubbing and body building produce the same body for
+the same request.  :class:`ResponseCache` stores that body under a key
+derived from the normalized request plus the config and fault state that
+influence it; a hit only needs fresh IDs and timestamps.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Request fields that can change a non-streaming response body.
+_KEY_FIELDS = (
+    "model", "messages", "tools", "tool_choice", "response_format",
+    "max_tokens", "stop", "n",
+)
+
+# Simulator config keys that can change a response body.
+_KEY_CONFIG = ("injection_defense", "hallucination_rate", "model_version")
+
+
+def request_cache_key(
+    request_body: Dict[str, Any],
+    sim_config: Dict[str, Any],
+    fault_config: Dict[str, Any],
+) -> bytes:
+    """Return a digest of everything that determines the response body."""
+    normalized = (
+        [request_body.get(field) for field in _KEY_FIELDS],
+        [sim_config.get(key) for key in _KEY_CONFIG],
+        fault_config,
+    )
+    raw = json.dumps(normalized, sort_keys=True, default=repr)
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+
+def copy_body(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a chat-completion body deep enough that callers can't mutate it.
+
+    Only the containers a response actually nests (choices, messages,
+    tool calls, usage, safety metadata) are copied, which is much cheaper
+    than ``copy.deepcopy``.
+    """
+    copied = dict(body)
+    choices = []
+    for choice in body.get("choices", ()):
+        choice = dict(choice)
+        message = choice.get("message")
+        if message is not None:
+            message = dict(message)
+            if message.get("tool_calls"):
+                message["tool_calls"] = [
+                    dict(tc, function=dict(tc["function"]))
+                    for tc in message["tool_calls"]
+                ]
+            choice["message"] = message
+        if "safety_metadata" in choice:
+            choice["safety_metadata"] = dict(choice["safety_metadata"])
+        choices.append(choice)
+    copied["choices"] = choices
+    if "usage" in body:
+        copied["usage"] = dict(body["usage"])
+    return copied
+
+
+class ResponseCache:
+    """Bounded LRU cache with an optional per-entry time-to-live.
+
+    Parameters
+    ----------
+    max_entries : int
+        Capacity; ``0`` disables the cache.
+    ttl_s : float, optional
+        Entries older than this many seconds are treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 0,
+        ttl_s: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Return the cached body for *key*, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, body = entry
+        if self.ttl_s is not None and self._clock() - stored_at > self.ttl_s:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: bytes, body: Dict[str, Any]) -> None:
+        self._entries[key] = (self._clock(), body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -300,3 +300,11 @@ RESPONSE_POOLS: dict = {
         "EST. Is there anything else I can help with in the meantime?",
     ],
 }
+
+
+def pool_key(pool: list) -> str:
+    """Key under which *pool* (the list object itself) is in RESPONSE_POOLS."""
+    for name, items in RESPONSE_POOLS.items():
+        if items is pool:
+            return name
+    return "<unregistered>"
@@ -0,0 +1,104 @@
+"""Server-side conversation sessions.
+
+Normally every request carries the full ``messages`` history.  With
+sessions, a request sent with ``"store": true`` gets a ``conversation_id``
+back; later requests send that id plus only the *new* messages and the
+simulator replays the stored history.  Each session also keeps the
+:class:`~chatassist_sim.conversation.ConversationState` of its history, so
+follow-up turns analyse only the delta.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .conversation import ConversationState
+
+
+class Session:
+    """Stored history of one conversation."""
+
+    __slots__ = ("conversation_id", "messages", "state", "updated_at")
+
+    def __init__(self, conversation_id: str, now: float):
+        self.conversation_id = conversation_id
+        self.messages: List[Dict[str, Any]] = []
+        self.state = ConversationState()
+        self.updated_at = now
+
+    def append(self, message: Dict[str, Any]) -> None:
+        self.messages.append(message)
+        self.state = self.state.extend(message)
+
+
+class SessionStore:
+    """Bounded LRU store of :class:`Session` objects with idle expiry.
+
+    Parameters
+    ----------
+    max_sessions : int
+        Sessions kept before the least recently used one is evicted.
+    ttl_s : float
+        Seconds of inactivity after which a session expires.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1024,
+        ttl_s: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+        self.messages_sent = 0
+        self.messages_replayed = 0
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._sessions
+
+    def create(self, conversation_id: Optional[str] = None) -> Session:
+        """Start an empty session; *conversation_id* must not be in use."""
+        conversation_id = conversation_id or f"conv-{uuid.uuid4().hex[:12]}"
+        if conversation_id in self._sessions:
+            raise ValueError(f"Conversation {conversation_id!r} already exists")
+        session = Session(conversation_id, self._clock())
+        self._sessions[conversation_id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        return session
+
+    def get(self, conversation_id: str) -> Optional[Session]:
+        """Return the live session for *conversation_id*, or None."""
+        session = self._sessions.get(conversation_id)
+        if session is None:
+            return None
+        now = self._clock()
+        if now - session.updated_at > self.ttl_s:
+            del self._sessions[conversation_id]
+            self.expirations += 1
+            return None
+        session.updated_at = now
+        self._sessions.move_to_end(conversation_id)
+        return session
+
+    def record_request(self, session: Session, new_messages: int) -> None:
+        """Count messages sent over the wire vs. replayed from the store."""
+        self.messages_sent += new_messages
+        self.messages_replayed += len(session.messages)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.messages_sent + self.messages_replayed
+        return {
+            "sessions": len(self._sessions),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "messages_sent": self.messages_sent,
+            "messages_replayed": self.messages_replayed,
+            "replayed_fraction": self.messages_replayed / total if total else 0.0,
+        }
@@ -6,17 +6,39 @@ fictional *ChatAssist* GenAI API.
 """
 
 import copy
+import hashlib
 import json
 import random
 import re
 import time
 import uuid
-from typing import Any, Dict, List, Optional
-
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .chunking import make_chunker
+from .coverage import CoverageMap
+from .conversation import (
+    _CREDIT_CARD_PATTERN,
+    _ORDER_ID_PATTERN,
+    _SSN_PATTERN,
+    ConversationCache,
+    ConversationState,
+)
 from .fault_injection import configure, inject_fault
+from .instrumentation import StageTimer
+from .prefix_cache import PrefixCacheIndex, tools_fingerprint
+from .profiling import MemoryProfiler
+from .quota import API_TIERS, QuotaLedger
 from .response import SimulatedResponse
-from .response_pools import RESPONSE_POOLS
-from .streaming import StreamingResponse, _split_into_word_chunks
+from .response_cache import ResponseCache, copy_body, request_cache_key
+from .response_pools import RESPONSE_POOLS, pool_key
+from .sessions import Session, SessionStore
+from .stopping import limit_text, normalize_stop
+from .streaming import StreamingResponse
+from .tokenizer import count_tokens
+from .tracing import Span, Tracer
 
 
 # ------------------------------------------------------------------ #
@@ -40,13 +62,6 @@ _HUMAN_HANDOFF_PATTERNS = re.compile(
     r"speak to a human|talk to a person|real person", re.IGNORECASE
 )
 
-_ORDER_ID_PATTERN = re.compile(r"(?:ORD-|#)(\d+)", re.IGNORECASE)
-_ORDER_ID_LOOSE = re.compile(r"order\s*#?\s*(\w+)", re.IGNORECASE)
-
-_CREDIT_CARD_PATTERN = re.compile(r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b")
-_EMAIL_PATTERN = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
-_SSN_PATTERN = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
-
 
 class ChatAssistSimulator:
     """In-process simulator for the ChatAssist GenAI API.
@@ -63,7 +78,59 @@ class ChatAssistSimulator:
     """
 
     VALID_MODELS = ["chatassist-4", "chatassist-4-mini", "chatassist-3"]
+    MAX_CHOICES = 128
+    CONTEXT_WINDOWS = {
+        "chatassist-4": 128_000,
+        "chatassist-4-mini": 32_000,
+        "chatassist-3": 8_000,
+    }
     VALID_API_KEY = "ca-key-test-valid-key-12345678"
+    # Methods timed by enable_stage_timing(), by stage name.
+    TIMED_STAGES = {
+        "request": "_chat_completions",
+        "validation": "_validate_request",
+        "conversation": "_conversations.analyze",
+        "last_user_message": "_get_last_user_message",
+        "routing": "_route",
+        "pool_selection": "_select_from_pool_raw",
+        "pii_scrub": "_scrub_pii_if_needed",
+        "body": "_build_success_response",
+        "stream_setup": "_build_streaming_response",
+        "headers": "_success_headers",
+        "ids": "_new_id",
+    }
+    # Code behind each coverage route, fingerprinted by test impact
+    # analysis (test_helpers.impact): methods of this class or names in
+    # this module.  "*" is shared by every route.
+    ROUTE_CODE = {
+        "*": (
+            "_route", "_get_last_user_message", "_should_use_tool",
+            "_select_content", "_select_from_pool_raw", "_build_success_response",
+            "_build_choice", "_take_extra_choices", "ConversationState",
+            "_ORDER_ID_PATTERN",
+        ),
+        "completion": (
+            "_handle_completion", "_scrub_pii_if_needed", "_INJECTION_PATTERNS",
+            "_ESCALATION_PATTERNS", "_HUMAN_HANDOFF_PATTERNS",
+            "_CREDIT_CARD_PATTERN", "_SSN_PATTERN",
+        ),
+        "streaming": ("_handle_streaming", "_build_streaming_response"),
+        "structured_output": ("_handle_structured_output",),
+        "tool_calling": ("_handle_tool_calling", "_order_lookup_choice", "_extract_product_id"),
+        "safety_block": ("_build_safety_response",),
+        "response_cache": ("_replay_cached_body",),
+    }
+    # Spans recorded by enable_tracing(): method -> (span name, hook).
+    TRACED_SPANS = {
+        "_chat_completions": ("chat_completions", "_trace_request"),
+        "_route": ("routing", None),
+        "_handle_completion": ("completion", "_trace_handler"),
+        "_handle_structured_output": ("structured_output", "_trace_handler"),
+        "_handle_tool_calling": ("tool_calling", "_trace_tool_calling"),
+        "_handle_streaming": ("streaming", "_trace_handler"),
+        "_select_from_pool_raw": ("pool_selection", "_trace_pool_selection"),
+        "_scrub_pii_if_needed": ("pii_scrub", "_trace_pii_scrub"),
+    }
 
     # ------------------------------------------------------------------ #
     #  Construction
@@ -77,23 +144,72 @@ class ChatAssistSimulator:
             "rate_limit": 60,                # requests per minute
             "model_version": None,           # override model in response
             "chunk_delay_ms": 30,            # streaming delay
+            "stream_chunking": "word",       # see chatassist_sim.chunking
+            "stream_chunk_chars": 16,        # chunk size for "chars"
+            "stream_window_ms": 100,         # flush window for "window"
+            "conversation_cache_size": 256,  # cached message prefixes
+            "response_cache_size": 0,        # temperature=0 memoization (0 = off)
+            "response_cache_ttl_s": None,    # max age of a memoized response
+            "prefix_caching": False,         # simulate prompt-prefix caching
+            "prefix_cache_min_tokens": 128,  # shortest cacheable prefix
+            "prefix_cache_ttl_s": 300,       # prefix lifetime after last use
+            "prefill_ms_per_1k_tokens": 0,   # simulated prompt latency (0 = none)
+            "cached_token_latency_factor": 0.1,  # relative cost of a cached token
+            "cached_token_price_factor": 0.5,
+            "session_store_size": 1024,      # server-side conversations kept
+            "session_ttl_s": 3600,           # idle lifetime of a conversation
+            "api_tier": "standard",          # "free", "standard", "enterprise"
+            "enforce_quotas": False,         # 429 once a tier budget runs out
         }
         self._request_count: int = 0
-        self._request_timestamps: List[float] = []
+        # Arrival times over the last minute.
+        self._request_timestamps: Deque[float] = deque()
         self._seed: Optional[int] = None
         self._rng: random.Random = random.Random()
+        self._per_request_seed: bool = False
 
         if config:
             self._sim_config.update(config)
 
+        self._conversations = ConversationCache(
+            self._sim_config["conversation_cache_size"]
+        )
+        self._response_cache = ResponseCache(
+            self._sim_config["response_cache_size"],
+            ttl_s=self._sim_config["response_cache_ttl_s"],
+        )
+        self._prefix_cache = PrefixCacheIndex(
+            min_tokens=self._sim_config["prefix_cache_min_tokens"],
+            ttl_s=self._sim_config["prefix_cache_ttl_s"],
+        )
+        self._quota = QuotaLedger()
+        self._sessions = SessionStore(
+            self._sim_config["session_store_size"],
+            ttl_s=self._sim_config["session_ttl_s"],
+        )
+        # Prompt accounting for the request in flight (prefix caching only).
+        self._prompt_usage: Optional[Dict[str, int]] = None
+        self._stage_timer = StageTimer()
+        self._tracer: Optional[Tracer] = None
+        self._memory_profiler: Optional[MemoryProfiler] = None
+        self._coverage = CoverageMap(RESPONSE_POOLS)
+
     # ------------------------------------------------------------------ #
     #  Public helpers
     # ------------------------------------------------------------------ #
 
-    def set_seed(self, seed: int) -> None:
-        """Set random seed for reproducible responses."""
+    def set_seed(self, seed: int, per_request: bool = False) -> None:
+        """Set random seed for reproducible responses.
+
+        With ``per_request=True`` every request gets its own RNG derived
+        from ``(seed, hash of the request body, X-Conversation-Id header)``,
+        covering variant choice, hallucination draws, token jitter and
+        IDs.  A request then yields the same response regardless of how
+        many requests came before it or which process serves it.
+        """
         self._seed = seed
         self._rng = random.Random(seed)
+        self._per_request_seed = per_request
 
     def inject_fault(self, fault_type: str, **kwargs):
         """Return a context manager that injects *fault_type*."""
@@ -103,6 +219,153 @@ class ChatAssistSimulator:
         """Return a context manager that temporarily alters config."""
         return configure(self, **kwargs)
 
+    def response_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counts for ``temperature == 0`` memoization."""
+        return self._response_cache.stats()
+
+    def quota_report(self) -> Dict[str, Dict[str, Any]]:
+        """Requests and tokens per API key over sliding minute/day windows.
+
+        Usage is always tracked against the ``api_tier`` limits; set
+        ``enforce_quotas`` to reject requests once a budget runs out.
+        """
+        return self._quota.report()
+
+    def session_stats(self) -> Dict[str, Any]:
+        """Stored conversations and messages sent vs. replayed server-side."""
+        return self._sessions.stats()
+
+    def prefix_cache_stats(self) -> Dict[str, Any]:
+        """Prompt-prefix cache hit rate and cached/billed token totals."""
+        return self._prefix_cache.stats(
+            self._sim_config["cached_token_price_factor"]
+        )
+
+    def coverage_snapshot(self):
+        """Copy of the path-coverage counters, for ``coverage_report(since=...)``."""
+        return self._coverage.snapshot()
+
+    def coverage_report(self, since=None) -> Dict[str, Any]:
+        """Routes, pool variants, finish reasons, errors and faults exercised.
+
+        Counting is always on.  Pass a :meth:`coverage_snapshot` taken
+        before a suite as *since* to see only that suite's hits;
+        ``report["missing"]`` lists what it never reached.
+        """
+        return self._coverage.report(since)
+
+    @contextmanager
+    def isolated(self) -> Iterator["ChatAssistSimulator"]:
+        """Context manager that undoes reseeding and coverage counting on exit.
+
+        The seed, random state, per-request seeding flag and coverage
+        counters are restored, so a tool can reseed and run tests on the
+        caller's simulator without changing what the caller sees next.
+        """
+        seed, rng, per_request = self._seed, self._rng, self._per_request_seed
+        rng_state = rng.getstate()
+        counts, unregistered = self._coverage.snapshot(), self._coverage.unregistered
+        try:
+            yield self
+        finally:
+            rng.setstate(rng_state)
+            self._seed, self._rng, self._per_request_seed = seed, rng, per_request
+            self._coverage.counts, self._coverage.unregistered = counts, unregistered
+
+    def enable_stage_timing(self) -> None:
+        """Start timing each request stage (see ``TIMED_STAGES``).
+
+        Each stage's method is wrapped with a ``perf_counter_ns`` timer;
+        until this is called, and after :meth:`disable_stage_timing`,
+        requests run the plain methods.
+        """
+        self._stage_timer.install(self, self.TIMED_STAGES)
+
+    def disable_stage_timing(self) -> None:
+        """Stop timing stages; recorded histograms are kept."""
+        self._stage_timer.uninstall()
+
+    def stage_timings(self, reset: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Latency histogram per stage, in nanoseconds.
+
+        Stage times exclude nested stages (``routing`` does not include
+        ``pool_selection``); ``total`` is whole ``chat_completions`` calls.
+        """
+        timings = self._stage_timer.as_dict()
+        if reset:
+            self._stage_timer.reset()
+        return timings
+
+    def stage_timings_prometheus(self) -> str:
+        """:meth:`stage_timings` in the Prometheus text exposition format."""
+        return self._stage_timer.to_prometheus()
+
+    def enable_tracing(
+        self,
+        path: Optional[str] = None,
+        capacity: int = 10_000,
+        flush_interval_s: float = 1.0,
+    ) -> Tracer:
+        """Record a trace per request (see ``TRACED_SPANS``).
+
+        Each ``chat_completions`` call becomes a root span carrying the
+        model, route, fault, status and token usage, with child spans for
+        routing, the handler, pool selection (pool and variant index) and
+        PII scrubbing; consuming a stream adds a span per chunk.  Spans
+        are kept in a ring buffer of *capacity* (``tracer.spans()``) and,
+        with *path*, appended to that JSONL file in the background.
+        """
+        self.disable_tracing()
+        self._tracer = Tracer(capacity, path, flush_interval_s)
+        self._tracer.install(
+            self,
+            {
+                path: (name, getattr(self, hook) if hook else None)
+                for path, (name, hook) in self.TRACED_SPANS.items()
+            },
+        )
+        return self._tracer
+
+    def disable_tracing(self) -> None:
+        """Stop tracing and write any spans still buffered."""
+        if self._tracer is not None:
+            self._tracer.close()
+            self._tracer = None
+
+    def enable_memory_profiling(self, every: int = 1000, frames: int = 16) -> None:
+        """Profile allocations with ``tracemalloc``, snapshotting every *every* requests.
+
+        Starts ``tracemalloc`` if it is not already running.  The first
+        snapshot is the baseline; see :meth:`memory_profile`.
+        """
+        self.disable_memory_profiling()
+        self._memory_profiler = MemoryProfiler(every, frames)
+        self._memory_profiler.install(
+            self,
+            "_chat_completions",
+            {"_select_from_pool_raw": lambda args: pool_key(args[0])},
+        )
+
+    def disable_memory_profiling(self) -> None:
+        """Stop profiling; the last report stays available until re-enabled."""
+        if self._memory_profiler is not None:
+            self._memory_profiler.uninstall()
+
+    def memory_profile(self, limit: int = 20) -> Dict[str, Any]:
+        """Net bytes per request, growth rate and its attribution.
+
+        ``net_bytes_per_request`` is what a request leaves allocated when
+        it returns (the response included); ``growth_bytes_per_request``
+        and ``growth_bytes_per_s`` compare live allocations made by the
+        simulator between the first and latest snapshot, so a run with
+        flat memory reports ~0.  ``by_function`` names the *limit*
+        functions that grew most and ``by_tag`` breaks net bytes down by
+        response pool.
+        """
+        if self._memory_profiler is None:
+            raise RuntimeError("Call enable_memory_profiling() first")
+        return self._memory_profiler.report(limit)
+
     # ------------------------------------------------------------------ #
     #  Main entry-point
     # ------------------------------------------------------------------ #
@@ -120,9 +383,36 @@ class ChatAssistSimulator:
             The JSON request body (model, messages, etc.).
         headers : dict, optional
             HTTP headers; must include ``Authorization: Bearer <key>``.
+
+        Sessions: send ``"store": True`` to have the conversation kept
+        server-side; the response carries a ``conversation_id`` (body and
+        ``X-Conversation-Id`` header).  Later requests may send that
+        ``conversation_id`` with only the new messages.
         """
+        if not self._per_request_seed:
+            return self._chat_completions(request_body, headers)
+
+        shared_rng = self._rng
+        self._rng = self._request_rng(request_body, headers or {})
+        try:
+            return self._chat_completions(request_body, headers)
+        finally:
+            self._rng = shared_rng
+
+    def _chat_completions(
+        self,
+        request_body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> SimulatedResponse:
+
+        self._prompt_usage = None
+        self._completion_limits = None
+        self._n_choices = 1
+        self._extra_choices: Optional[List[Dict[str, Any]]] = None
 
         # 1. Fault injection takes priority ----------------------------- #
+        if self._fault_config:
+            self._coverage.hit_faults(self._fault_config)
         if self._fault_config.get("force_rate_limit"):
             return self._build_error_response(
                 429,
@@ -143,8 +433,128 @@ class ChatAssistSimulator:
         if self._fault_config.get("response_delay_s"):
             time.sleep(self._fault_config["response_delay_s"])
 
-        # 2. Validate auth ---------------------------------------------- #
+        # 2-3. Validate auth and request body -------------------------- #
         headers = headers or {}
+        error = self._validate_request(request_body, headers)
+        if error is not None:
+            return error
+        api_key = headers["Authorization"].split(" ", 1)[1]
+        model = request_body["model"]
+        messages = request_body["messages"]
+        temperature = request_body.get("temperature", 0.3)
+        max_tokens = request_body.get("max_tokens", 500)
+        stop = normalize_stop(request_body.get("stop"))
+        n = request_body.get("n", 1)
+
+        session: Optional[Session] = None
+        conversation_id = request_body.get("conversation_id")
+        if conversation_id is not None:
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                return self._build_error_response(
+                    404,
+                    "not_found",
+                    f"Conversation {conversation_id!r} not found or expired.",
+                    param="conversation_id",
+                )
+
+        # 4. Book-keep request count and quotas ------------------------- #
+        tier = self._sim_config["api_tier"]
+        enforce_quotas = self._sim_config["enforce_quotas"]
+        rejection = self._quota.admit(api_key, tier, enforce=enforce_quotas)
+        if rejection is not None:
+            return self._build_error_response(
+                429,
+                rejection.error_type,
+                rejection.message,
+                extra_headers={
+                    "Retry-After": str(rejection.retry_after),
+                    "X-RateLimit-Limit": str(API_TIERS[tier]["requests_per_min"]),
+                },
+            )
+
+        self._request_count += 1
+        now = time.time()
+        timestamps = self._request_timestamps
+        timestamps.append(now)
+        while timestamps[0] <= now - 60:
+            timestamps.popleft()
+
+        # 5. Resolve session history ----------------------------------- #
+        new_messages = messages
+        conversation = None
+        if session is not None:
+            self._sessions.record_request(session, len(new_messages))
+            conversation = session.state
+            for message in new_messages:
+                conversation = conversation.extend(message)
+            messages = session.messages + new_messages
+            request_body = dict(request_body, messages=messages)
+
+        # 6. Count prompt tokens and enforce the context window -------- #
+        stream = request_body.get("stream", False)
+        tools = request_body.get("tools")
+        response_format = request_body.get("response_format")
+
+        # Token counts of unchanged history prefixes come from the cache.
+        if conversation is None:
+            conversation = self._conversations.analyze(messages)
+        prompt_tokens = tools_fingerprint(tools)[1] + conversation.tokens
+        required = prompt_tokens + max_tokens
+        context_window = self.CONTEXT_WINDOWS[model]
+        if required > context_window:
+            # Input tokens are charged even though the request fails.
+            self._quota.charge(api_key, prompt_tokens, 0)
+            return self._build_error_response(
+                400,
+                "invalid_request",
+                f"This request would require {required} tokens, which exceeds "
+                f"the maximum context length of {context_window} for model {model}.",
+                param="messages",
+            )
+
+        if self._sim_config["prefix_caching"]:
+            self._account_prompt(api_key, tools, conversation)
+        else:
+            self._prompt_usage = {"prompt_tokens": prompt_tokens, "cached_tokens": None}
+
+        # 7. Route ------------------------------------------------------ #
+        self._completion_limits = (max_tokens, stop)
+        self._n_choices = n
+
+        cache_key = None
+        cached = None
+        # Follow config changes made through configure().
+        self._response_cache.max_entries = self._sim_config["response_cache_size"]
+        self._response_cache.ttl_s = self._sim_config["response_cache_ttl_s"]
+        if temperature == 0 and not stream and self._response_cache.enabled:
+            cache_key = request_cache_key(
+                request_body, self._sim_config, self._fault_config
+            )
+            cached = self._response_cache.get(cache_key)
+
+        if cached is not None:
+            response = self._replay_cached_body(cached)
+        else:
+            response = self._route(
+                request_body, messages, stream, tools, response_format,
+                temperature, conversation,
+            )
+            if cache_key is not None and response.status_code == 200:
+                self._response_cache.put(cache_key, copy_body(response.json()))
+
+        if response.status_code == 200:
+            self._charge_quota(api_key, tier, enforce_quotas, response)
+            if session is not None or request_body.get("store"):
+                self._store_turn(session, new_messages, conversation, response)
+        return response
+
+    def _validate_request(
+        self,
+        request_body: Dict[str, Any],
+        headers: Dict[str, str],
+    ) -> Optional[SimulatedResponse]:
+        """Return the 401/400 error for an invalid request, or None."""
         auth = headers.get("Authorization", "")
         if not auth:
             return self._build_error_response(
@@ -161,7 +571,6 @@ class ChatAssistSimulator:
                 "https://dashboard.chatassist.example/keys",
             )
 
-        # 3. Validate request body -------------------------------------- #
         model = request_body.get("model")
         if model not in self.VALID_MODELS:
             return self._build_error_response(
@@ -199,29 +608,63 @@ class ChatAssistSimulator:
             )
 
         max_tokens = request_body.get("max_tokens", 500)
+        if not isinstance(max_tokens, int) or max_tokens < 1:
+            return self._build_error_response(
+                400,
+                "invalid_request",
+                f"max_tokens must be a positive integer, got {max_tokens}",
+                param="max_tokens",
+            )
 
-        # 4. Book-keep request count ------------------------------------ #
-        self._request_count += 1
-        self._request_timestamps.append(time.time())
+        try:
+            normalize_stop(request_body.get("stop"))
+        except ValueError as exc:
+            return self._build_error_response(
+                400, "invalid_request", str(exc), param="stop"
+            )
 
-        # 5. Route ------------------------------------------------------ #
-        stream = request_body.get("stream", False)
-        tools = request_body.get("tools")
-        response_format = request_body.get("response_format")
+        n = request_body.get("n", 1)
+        if not isinstance(n, int) or not 1 <= n <= self.MAX_CHOICES:
+            return self._build_error_response(
+                400,
+                "invalid_request",
+                f"n must be an integer between 1 and {self.MAX_CHOICES}, got {n}",
+                param="n",
+            )
+
+        return None
 
+    def _route(
+        self,
+        request_body: Dict[str, Any],
+        messages: List[Dict[str, Any]],
+        stream: bool,
+        tools: Optional[List[Dict[str, Any]]],
+        response_format: Optional[Dict[str, Any]],
+        temperature: float,
+        conversation: Optional[ConversationState] = None,
+    ) -> SimulatedResponse:
+        """Dispatch a validated request to the matching handler."""
         user_message = self._get_last_user_message(messages)
+        if conversation is None:
+            conversation = self._conversations.analyze(messages)
 
-        if stream:
-            return self._handle_streaming(request_body, user_message)
         if response_format:
-            return self._handle_structured_output(
-                request_body, user_message, max_tokens
+            self._coverage.hit(
+                "routes", "structured_output.stream" if stream else "structured_output"
             )
-        if tools and self._should_use_tool(user_message, messages):
-            return self._handle_tool_calling(request_body, user_message, messages)
+            return self._handle_structured_output(request_body, user_message, stream)
+        if tools and self._should_use_tool(user_message, conversation):
+            return self._handle_tool_calling(
+                request_body, user_message, conversation, stream
+            )
+        if stream:
+            self._coverage.hit("routes", "streaming")
+            return self._handle_streaming(request_body, user_message)
 
+        self._coverage.hit("routes", "completion")
         return self._handle_completion(
-            request_body, user_message, messages, temperature
+            request_body, user_message, conversation, temperature
         )
 
     # ================================================================== #
@@ -232,7 +675,7 @@ class ChatAssistSimulator:
         self,
         request_body: Dict[str, Any],
         user_message: str,
-        messages: List[Dict[str, Any]],
+        conversation: ConversationState,
         temperature: float,
     ) -> SimulatedResponse:
         """Generate a standard (non-tool, non-streaming) completion."""
@@ -265,17 +708,21 @@ class ChatAssistSimulator:
         if "electron" in lower and any(
             kw in lower for kw in ("return", "policy", "window")
         ):
-            content = self._select_content("electronics_return", temperature)
             # PII scrubbing check
-            content = self._scrub_pii_if_needed(content, messages)
+            content = self._select_content(
+                "electronics_return", temperature,
+                lambda text: self._scrub_pii_if_needed(text, conversation),
+            )
             return self._build_success_response(content, model)
 
         # --- General return policy ------------------------------------- #
         if "return" in lower and any(
             kw in lower for kw in ("policy", "window", "item")
         ):
-            content = self._select_content("return_policy", temperature)
-            content = self._scrub_pii_if_needed(content, messages)
+            content = self._select_content(
+                "return_policy", temperature,
+                lambda text: self._scrub_pii_if_needed(text, conversation),
+            )
             return self._build_success_response(content, model)
 
         # --- Product recommendation ------------------------------------ #
@@ -296,7 +743,7 @@ class ChatAssistSimulator:
         request_body: Dict[str, Any],
         user_message: str,
     ) -> StreamingResponse:
-        """Return a :class:`StreamingResponse` with word-level chunks."""
+        """Return a :class:`StreamingResponse` chunked per ``stream_chunking``."""
 
         model = request_body.get("model", "chatassist-4")
         temperature = request_body.get("temperature", 0.3)
@@ -310,12 +757,36 @@ class ChatAssistSimulator:
         else:
             text = self._select_content("generic_completion", temperature)
 
-        chunks = _split_into_word_chunks(text)
-        delay = self._sim_config.get("chunk_delay_ms", 30)
+        return self._build_streaming_response(text, model)
+
+    def _build_streaming_response(
+        self,
+        text: Optional[str],
+        model: str,
+        tool_calls: Optional[List[Dict[str, Any]]] = None,
+    ) -> StreamingResponse:
+        """Stream *text*, or *tool_calls* argument fragments, per ``stream_chunking``."""
+        chunker, delay = make_chunker(
+            self._sim_config.get("stream_chunking", "word"),
+            chunk_delay_ms=self._sim_config.get("chunk_delay_ms", 30),
+            chars=self._sim_config.get("stream_chunk_chars", 16),
+            window_ms=self._sim_config.get("stream_window_ms", 100),
+        )
+        alternatives = self._take_extra_choices(text, tool_calls)
         return StreamingResponse(
-            chunks=chunks,
+            text=text,
+            tool_calls=tool_calls,
+            alternatives=alternatives,
+            chunker=chunker,
             chunk_delay_ms=delay,
             model=self._sim_config.get("model_version") or model,
+            response_id=self._new_id("resp"),
+            request_id=self._new_id("req"),
+            faults=self._fault_config.get("stream_faults"),
+            rng=self._rng,
+            on_finish=partial(self._coverage.hit, "finish_reasons"),
+            **self._stream_prompt_usage(),
+            **self._stream_limits(),
         )
 
     # ------------------------------------------------------------------ #
@@ -326,9 +797,9 @@ class ChatAssistSimulator:
         self,
         request_body: Dict[str, Any],
         user_message: str,
-        max_tokens: int,
+        stream: bool = False,
     ) -> SimulatedResponse:
-        """Return a classification JSON as content."""
+        """Return a classification JSON as content, streamed in fragments if asked."""
 
         model = request_body.get("model", "chatassist-4")
         lower = user_message.lower()
@@ -347,20 +818,21 @@ class ChatAssistSimulator:
 
         # Find matching variant from the classification pool
         pool = RESPONSE_POOLS["classification"]
-        variant = next(
-            (v for v in pool if v.get("_category") == category),
-            pool[-1],  # fallback to "other"
+        index = next(
+            (i for i, v in enumerate(pool) if v.get("_category") == category),
+            len(pool) - 1,  # fallback to "other"
         )
-        content = variant["content"]
+        self._coverage.hit_variant(pool, index)
+        content = pool[index]["content"]
 
-        # Simulate truncation if max_tokens is too low
+        # max_tokens and stop are applied in _build_success_response.
         finish_reason = "stop"
-        if max_tokens < 60 or self._fault_config.get("truncate_response"):
-            # Truncate to roughly max_tokens * 4 chars (rough heuristic)
-            truncate_at = max(10, max_tokens * 4) if max_tokens < 60 else len(content) // 2
-            content = content[:truncate_at]
+        if self._fault_config.get("truncate_response"):
+            content = content[:len(content) // 2]
             finish_reason = "length"
 
+        if stream:
+            return self._build_streaming_response(content, model)
         return self._build_success_response(content, model, finish_reason=finish_reason)
 
     # ------------------------------------------------------------------ #
@@ -370,13 +842,13 @@ class ChatAssistSimulator:
     def _should_use_tool(
         self,
         user_message: str,
-        messages: List[Dict[str, Any]],
+        conversation: ConversationState,
     ) -> bool:
         """Decide whether the user message warrants a tool call."""
         lower = user_message.lower()
         # If there is already a tool result in the conversation, we should
         # generate a follow-up instead — but we still route through _handle_tool_calling.
-        if any(m.get("role") == "tool" for m in messages):
+        if conversation.has_tool_result:
             return True
         return bool(
             "order" in lower
@@ -391,39 +863,40 @@ class ChatAssistSimulator:
         self,
         request_body: Dict[str, Any],
         user_message: str,
-        messages: List[Dict[str, Any]],
+        conversation: ConversationState,
+        stream: bool = False,
     ) -> SimulatedResponse:
-        """Handle a request that should invoke (or follow-up on) a tool."""
+        """Handle a request that should invoke (or follow-up on) a tool.
+
+        With *stream*, tool calls arrive as ``delta.tool_calls`` argument
+        fragments and text replies as ordinary content chunks.
+        """
 
         model = request_body.get("model", "chatassist-4")
         temperature = request_body.get("temperature", 0.3)
         lower = user_message.lower()
+        suffix = ".stream" if stream else ""
 
         # ---- Follow-up after tool result ----------------------------- #
-        has_tool_result = any(m.get("role") == "tool" for m in messages)
-        if has_tool_result:
-            # Extract an order_id from anywhere in the conversation
-            order_id = self._extract_order_id(messages)
-            status = "shipped"
-
-            # Try to get status from the tool result content
-            for m in messages:
-                if m.get("role") == "tool":
-                    try:
-                        tool_data = json.loads(m.get("content", "{}"))
-                        status = tool_data.get("status", status)
-                        order_id = tool_data.get("order_id", order_id)
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-
-            content = self._select_content("order_lookup_followup", temperature)
-            content = content.format(order_id=order_id, status=status)
+        if conversation.has_tool_result:
+            self._coverage.hit("routes", "tool_calling.followup" + suffix)
+            # Order ID and status come from the latest tool result, falling
+            # back to the last order ID mentioned in the conversation.
+            content = self._select_content(
+                "order_lookup_followup", temperature,
+                lambda text: text.format(
+                    order_id=conversation.order_id, status=conversation.tool_status
+                ),
+            )
+            if stream:
+                return self._build_streaming_response(content, model)
             return self._build_success_response(content, model)
 
         # ---- Inventory check ----------------------------------------- #
         if any(kw in lower for kw in ("inventory", "in stock", "check stock", "availability")):
+            self._coverage.hit("routes", "tool_calling.inventory" + suffix)
             product_id = self._extract_product_id(user_message)
-            tool_call_id = f"call-tc-{uuid.uuid4().hex[:12]}"
+            tool_call_id = self._new_id("call-tc")
             tool_calls = [
                 {
                     "id": tool_call_id,
@@ -434,6 +907,8 @@ class ChatAssistSimulator:
                     },
                 }
             ]
+            if stream:
+                return self._build_streaming_response(None, model, tool_calls)
             return self._build_success_response(
                 content=None,
                 model=model,
@@ -442,36 +917,27 @@ class ChatAssistSimulator:
             )
 
         # ---- Order lookup -------------------------------------------- #
-        order_id = self._extract_order_id(messages)
+        self._coverage.hit("routes", "tool_calling.order_lookup" + suffix)
+        order_id = conversation.order_id
 
         # Pick from the order_lookup pool (first variant = tool call,
         # second = flaky text).
         pool = RESPONSE_POOLS["order_lookup_tool_call"]
-        variant = self._select_from_pool_raw(pool, temperature)
+        choices = [
+            self._order_lookup_choice(self._select_from_pool_raw(pool, temperature), order_id)
+            for _ in range(self._n_choices)
+        ]
+        self._extra_choices = choices[1:] or None
+        content, tool_calls = choices[0]["content"], choices[0]["tool_calls"]
 
-        if variant.get("tool_calls"):
-            tool_call_id = f"call-tc-{uuid.uuid4().hex[:12]}"
-            tool_calls = [
-                {
-                    "id": tool_call_id,
-                    "type": "function",
-                    "function": {
-                        "name": "lookup_order",
-                        "arguments": json.dumps({"order_id": order_id}),
-                    },
-                }
-            ]
-            return self._build_success_response(
-                content=None,
-                model=model,
-                finish_reason="tool_calls",
-                tool_calls=tool_calls,
-            )
-        else:
-            # Flaky variant — returns text instead of tool call
-            return self._build_success_response(
-                variant["content"], model, finish_reason="stop"
-            )
+        if stream:
+            return self._build_streaming_response(content, model, tool_calls)
+        return self._build_success_response(
+            content,
+            model,
+            finish_reason="tool_calls" if tool_calls else "stop",
+            tool_calls=tool_calls,
+        )
 
     # ------------------------------------------------------------------ #
     #  Safety response
@@ -481,6 +947,7 @@ class ChatAssistSimulator:
         self, request_body: Dict[str, Any]
     ) -> SimulatedResponse:
         model = request_body.get("model", "chatassist-4")
+        self._coverage.hit("routes", "safety_block")
         content = self._select_content("safety_block", 0)
         return self._build_success_response(
             content,
@@ -497,38 +964,55 @@ class ChatAssistSimulator:
     #  Pool selection helpers
     # ================================================================== #
 
-    def _select_content(self, pool_name: str, temperature: float = 0.3) -> str:
-        """Select a variant from a pool and return its content string."""
+    def _select_content(
+        self,
+        pool_name: str,
+        temperature: float = 0.3,
+        transform: Optional[Callable[[str], str]] = None,
+    ) -> str:
+        """Select a variant from a pool and return its content string.
+
+        For ``n > 1`` requests one variant is drawn per choice and the
+        others are kept for the response builder.  *transform* (PII
+        scrubbing, templating) is applied to every choice.
+        """
         pool = RESPONSE_POOLS[pool_name]
-        variant = self._select_from_pool_raw(pool, temperature)
-        if isinstance(variant, dict):
-            return variant["content"]
-        return variant
+        contents = []
+        for _ in range(self._n_choices):
+            variant = self._select_from_pool_raw(pool, temperature)
+            content = variant["content"] if isinstance(variant, dict) else variant
+            contents.append(transform(content) if transform else content)
+        if len(contents) > 1:
+            self._extra_choices = [{"content": content} for content in contents[1:]]
+        return contents[0]
 
     def _select_from_pool_raw(self, pool: list, temperature: float = 0.3):
         """Select a raw variant (str or dict) honouring hallucination rate."""
+        # Candidates are pool indexes so coverage can count the variant.
         candidates = []
-        for item in pool:
+        for index, item in enumerate(pool):
             if isinstance(item, dict) and item.get("_hallucination"):
                 if self._rng.random() < self._sim_config.get("hallucination_rate", 0.05):
-                    candidates.append(item)
+                    candidates.append(index)
             else:
-                candidates.append(item)
+                candidates.append(index)
 
         # If all candidates were filtered out (unlikely), use non-hallucinated
         if not candidates:
             candidates = [
-                p
-                for p in pool
+                index
+                for index, p in enumerate(pool)
                 if not (isinstance(p, dict) and p.get("_hallucination"))
             ]
 
         if temperature == 0:
-            return candidates[0]
+            index = candidates[0]
         elif temperature <= 0.3:
-            return self._rng.choice(candidates[: min(2, len(candidates))])
+            index = self._rng.choice(candidates[: min(2, len(candidates))])
         else:
-            return self._rng.choice(candidates)
+            index = self._rng.choice(candidates)
+        self._coverage.hit_variant(pool, index)
+        return pool[index]
 
     # ================================================================== #
     #  Response builders
@@ -542,33 +1026,40 @@ class ChatAssistSimulator:
         tool_calls: Optional[List[Dict[str, Any]]] = None,
         safety_metadata: Optional[Dict[str, Any]] = None,
     ) -> SimulatedResponse:
-        """Construct a 200 response matching the ChatAssist JSON shape."""
+        """Construct a 200 response matching the ChatAssist JSON shape.
 
+        For ``n > 1`` requests the other choices come from
+        :meth:`_take_extra_choices`; usage sums their completion tokens.
+        """
+        choices = [
+            self._build_choice(0, content, finish_reason, tool_calls, safety_metadata)
+        ]
+        extras = self._take_extra_choices(content, tool_calls)
+        for index, extra in enumerate(extras, start=1):
+            extra_calls = extra.get("tool_calls")
+            if extra_calls:
+                extra_reason = "tool_calls"
+            elif finish_reason == "tool_calls":
+                extra_reason = "stop"
+            else:
+                extra_reason = finish_reason
+            choices.append(self._build_choice(
+                index, extra.get("content"), extra_reason, extra_calls, safety_metadata
+            ))
+
+        completion_tokens = sum(
+            max(1, count_tokens(choice["message"]["content"] or ""))
+            for choice in choices
+        )
         body: Dict[str, Any] = {
-            "id": f"resp-{uuid.uuid4().hex[:12]}",
+            "id": self._new_id("resp"),
             "object": "chat.completion",
             "created": int(time.time()),
             "model": self._sim_config.get("model_version") or model,
-            "choices": [
-                {
-                    "index": 0,
-                    "message": {
-                        "role": "assistant",
-                        "content": content,
-                    },
-                    "finish_reason": finish_reason,
-                }
-            ],
-            "usage": self._calculate_usage(content or ""),
+            "choices": choices,
+            "usage": self._calculate_usage("", completion_tokens=completion_tokens),
         }
 
-        if tool_calls:
-            body["choices"][0]["message"]["content"] = None
-            body["choices"][0]["message"]["tool_calls"] = tool_calls
-
-        if safety_metadata:
-            body["choices"][0]["safety_metadata"] = safety_metadata
-
         # Maybe truncate (malformed_json fault)
         if self._fault_config.get("truncate_response") and not tool_calls:
             # Only truncate if not already handled by structured output
@@ -584,6 +1075,161 @@ class ChatAssistSimulator:
         headers = self._success_headers()
         return SimulatedResponse(status_code=200, body=body, headers=headers)
 
+    def _build_choice(
+        self,
+        index: int,
+        content: Optional[str],
+        finish_reason: str,
+        tool_calls: Optional[List[Dict[str, Any]]],
+        safety_metadata: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """One ``choices[]`` entry.
+
+        Text content is cut to the request's ``max_tokens`` and ``stop``
+        sequences, turning ``finish_reason`` into ``"length"`` when the
+        token budget runs out.
+        """
+        if content is not None and not tool_calls and self._completion_limits:
+            max_tokens, stop = self._completion_limits
+            content, reason = limit_text(content, max_tokens, stop)
+            if reason == "length" and finish_reason == "stop":
+                finish_reason = reason
+        self._coverage.hit("finish_reasons", finish_reason)
+
+        choice: Dict[str, Any] = {
+            "index": index,
+            "message": {
+                "role": "assistant",
+                "content": None if tool_calls else content,
+            },
+            "finish_reason": finish_reason,
+        }
+        if tool_calls:
+            choice["message"]["tool_calls"] = tool_calls
+        if safety_metadata:
+            choice["safety_metadata"] = safety_metadata
+        return choice
+
+    def _take_extra_choices(
+        self,
+        content: Optional[str],
+        tool_calls: Optional[List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Choices ``1..n-1`` for the current request.
+
+        These are the variants the handler drew alongside choice 0.  Paths
+        without a random draw (structured output, inventory checks) repeat
+        choice 0, with fresh tool-call IDs.
+        """
+        if self._n_choices == 1:
+            return []
+        extras, self._extra_choices = self._extra_choices, None
+        if extras is None:
+            extras = [
+                {
+                    "content": content,
+                    "tool_calls": tool_calls and [
+                        dict(call, id=self._new_id("call-tc")) for call in tool_calls
+                    ],
+                }
+                for _ in range(self._n_choices - 1)
+            ]
+        return extras
+
+    def _order_lookup_choice(self, variant: Dict[str, Any], order_id: str) -> Dict[str, Any]:
+        """Turn an ``order_lookup_tool_call`` variant into choice content."""
+        if not variant.get("tool_calls"):
+            # Flaky variant — returns text instead of tool call
+            return {"content": variant["content"], "tool_calls": None}
+        return {
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": self._new_id("call-tc"),
+                    "type": "function",
+                    "function": {
+                        "name": "lookup_order",
+                        "arguments": json.dumps({"order_id": order_id}),
+                    },
+                }
+            ],
+        }
+
+    def _charge_quota(
+        self,
+        api_key: str,
+        tier: str,
+        enforce_quotas: bool,
+        response: SimulatedResponse,
+    ) -> None:
+        """Charge the response's tokens and, if enforcing, report what's left."""
+        if isinstance(response, StreamingResponse):
+            usage = response._usage()
+        else:
+            usage = response.json()["usage"]
+        self._quota.charge(
+            api_key, usage["prompt_tokens"], usage["completion_tokens"]
+        )
+        if enforce_quotas:
+            remaining = self._quota.remaining(api_key, tier)
+            response.headers["X-RateLimit-Limit"] = str(
+                API_TIERS[tier]["requests_per_min"]
+            )
+            response.headers["X-RateLimit-Remaining"] = str(remaining["requests_per_min"])
+            if remaining["tokens_per_min"] is not None:
+                response.headers["X-TokenLimit-Remaining"] = str(
+                    remaining["tokens_per_min"]
+                )
+
+    def _store_turn(
+        self,
+        session: Optional[Session],
+        new_messages: List[Dict[str, Any]],
+        conversation: Optional[ConversationState],
+        response: SimulatedResponse,
+    ) -> None:
+        """Append this turn to its session, creating one if needed."""
+        self._sessions.max_sessions = self._sim_config["session_store_size"]
+        self._sessions.ttl_s = self._sim_config["session_ttl_s"]
+        if session is None:
+            conversation_id = self._new_id("conv")
+            while conversation_id in self._sessions:
+                # Under per-request seeding, identical first requests draw
+                # the same ID; draw again rather than replace a session.
+                conversation_id = self._new_id("conv")
+            session = self._sessions.create(conversation_id)
+            for message in new_messages:
+                session.append(message)
+        else:
+            session.messages.extend(new_messages)
+            session.state = conversation
+
+        if isinstance(response, StreamingResponse):
+            reply = response._message()
+        else:
+            reply = dict(response.json()["choices"][0]["message"])
+            response.json()["conversation_id"] = session.conversation_id
+        session.append(reply)
+        response.headers["X-Conversation-Id"] = session.conversation_id
+
+    def _replay_cached_body(self, cached: Dict[str, Any]) -> SimulatedResponse:
+        """Serve a memoized body with fresh IDs, timestamp and headers."""
+        body = copy_body(cached)
+        body["id"] = self._new_id("resp")
+        body["created"] = int(time.time())
+        if self._prompt_usage is not None:
+            body["usage"] = self._calculate_usage(
+                "", completion_tokens=body["usage"]["completion_tokens"]
+            )
+        self._coverage.hit("routes", "response_cache")
+        for choice in body["choices"]:
+            self._coverage.hit("finish_reasons", choice["finish_reason"])
+            for tool_call in choice["message"].get("tool_calls") or ():
+                tool_call["id"] = self._new_id("call-tc")
+        return SimulatedResponse(
+            status_code=200, body=body, headers=self._success_headers()
+        )
+
     def _build_error_response(
         self,
         status_code: int,
@@ -593,6 +1239,7 @@ class ChatAssistSimulator:
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> SimulatedResponse:
         """Construct an error response."""
+        self._coverage.hit("errors", error_type)
         body: Dict[str, Any] = {
             "error": {
                 "type": error_type,
@@ -605,7 +1252,7 @@ class ChatAssistSimulator:
 
         headers: Dict[str, str] = {
             "Content-Type": "application/json",
-            "X-Request-Id": f"req-{uuid.uuid4().hex[:12]}",
+            "X-Request-Id": self._new_id("req"),
         }
         if extra_headers:
             headers.update(extra_headers)
@@ -623,24 +1270,97 @@ class ChatAssistSimulator:
                 max(0, self._sim_config["rate_limit"] - self._request_count)
             ),
             "X-RateLimit-Reset": str(int(time.time()) + 60),
-            "X-Request-Id": f"req-{uuid.uuid4().hex[:12]}",
+            "X-Request-Id": self._new_id("req"),
         }
 
     # ================================================================== #
     #  Utility helpers
     # ================================================================== #
 
+    def _request_rng(
+        self, request_body: Dict[str, Any], headers: Dict[str, str]
+    ) -> random.Random:
+        """Derive the RNG for one request in per-request seed mode."""
+        body_hash = hashlib.blake2b(
+            json.dumps(request_body, sort_keys=True, default=str).encode(),
+            digest_size=16,
+        ).hexdigest()
+        conversation_id = headers.get("X-Conversation-Id", "")
+        return random.Random(f"{self._seed}:{body_hash}:{conversation_id}")
+
+    def _new_id(self, prefix: str) -> str:
+        """Return a ``<prefix>-<12 hex>`` identifier.
+
+        IDs are random unless per-request seeding is on, in which case
+        they are drawn from the request's RNG so they replay exactly.
+        """
+        if self._per_request_seed:
+            return f"{prefix}-{self._rng.getrandbits(48):012x}"
+        return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
     def _calculate_usage(
-        self, content: str, prompt_tokens: Optional[int] = None
-    ) -> Dict[str, int]:
-        if prompt_tokens is None:
+        self,
+        content: str,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        cached_tokens = None
+        if self._prompt_usage is not None:
+            prompt_tokens = self._prompt_usage["prompt_tokens"]
+            cached_tokens = self._prompt_usage["cached_tokens"]
+        elif prompt_tokens is None:
             prompt_tokens = self._rng.randint(30, 60)
-        completion_tokens = max(1, int(len(content.split()) * 1.3))
-        return {
+        if completion_tokens is None:
+            completion_tokens = max(1, count_tokens(content))
+        usage: Dict[str, Any] = {
             "prompt_tokens": prompt_tokens,
             "completion_tokens": completion_tokens,
             "total_tokens": prompt_tokens + completion_tokens,
         }
+        if cached_tokens is not None:
+            usage["prompt_tokens_details"] = {"cached_tokens": cached_tokens}
+        return usage
+
+    def _stream_prompt_usage(self) -> Dict[str, Any]:
+        """StreamingResponse keyword arguments for prompt accounting."""
+        if self._prompt_usage is None:
+            return {}
+        return {
+            "prompt_tokens": self._prompt_usage["prompt_tokens"],
+            "cached_tokens": self._prompt_usage["cached_tokens"],
+        }
+
+    def _stream_limits(self) -> Dict[str, Any]:
+        """StreamingResponse keyword arguments for ``max_tokens``/``stop``."""
+        if self._completion_limits is None:
+            return {}
+        max_tokens, stop = self._completion_limits
+        return {"max_tokens": max_tokens, "stop": stop}
+
+    def _account_prompt(
+        self,
+        api_key: str,
+        tools: Optional[List[Dict[str, Any]]],
+        conversation: ConversationState,
+    ) -> None:
+        """Count prompt tokens, look up cached prefixes, simulate prefill."""
+        self._prefix_cache.min_tokens = self._sim_config["prefix_cache_min_tokens"]
+        self._prefix_cache.ttl_s = self._sim_config["prefix_cache_ttl_s"]
+        prompt_tokens, cached_tokens = self._prefix_cache.lookup_and_record(
+            api_key, tools, conversation
+        )
+        self._prompt_usage = {
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+        }
+
+        ms_per_1k = self._sim_config["prefill_ms_per_1k_tokens"]
+        if ms_per_1k:
+            effective = (
+                prompt_tokens - cached_tokens
+                + cached_tokens * self._sim_config["cached_token_latency_factor"]
+            )
+            time.sleep(effective * ms_per_1k / 1_000_000)
 
     @staticmethod
     def _get_last_user_message(messages: List[Dict[str, Any]]) -> str:
@@ -660,21 +1380,6 @@ class ChatAssistSimulator:
                     return " ".join(texts)
         return ""
 
-    def _extract_order_id(self, messages: List[Dict[str, Any]]) -> str:
-        """Try to find an order ID in the conversation history."""
-        for msg in reversed(messages):
-            text = msg.get("content", "")
-            if not isinstance(text, str):
-                continue
-            match = _ORDER_ID_PATTERN.search(text)
-            if match:
-                prefix = "ORD-" if "ORD-" in text[max(0, match.start() - 4): match.end()] else "#"
-                return f"ORD-{match.group(1)}" if prefix == "ORD-" else match.group(0)
-            match = _ORDER_ID_LOOSE.search(text)
-            if match:
-                return match.group(1)
-        return "UNKNOWN"
-
     @staticmethod
     def _extract_product_id(user_message: str) -> str:
         """Extract a product identifier from the user message."""
@@ -686,23 +1391,13 @@ class ChatAssistSimulator:
         return "PROD-UNKNOWN"
 
     def _scrub_pii_if_needed(
-        self, content: str, messages: List[Dict[str, Any]]
+        self, content: str, conversation: ConversationState
     ) -> str:
         """If conversation contains PII and defense is strong, don't echo it."""
         if self._sim_config["injection_defense"] != "strong":
             return content
 
-        conversation_text = " ".join(
-            m.get("content", "") for m in messages if isinstance(m.get("content"), str)
-        )
-
-        has_pii = (
-            _CREDIT_CARD_PATTERN.search(conversation_text)
-            or _EMAIL_PATTERN.search(conversation_text)
-            or _SSN_PATTERN.search(conversation_text)
-        )
-
-        if has_pii:
+        if conversation.has_pii:
             # Strip any PII that might have crept into the response content
             content = _CREDIT_CARD_PATTERN.sub("[CARD REDACTED]", content)
             content = _SSN_PATTERN.sub("[SSN REDACTED]", content)
@@ -710,3 +1405,56 @@ class ChatAssistSimulator:
             # contact info — only scrub credit cards and SSNs.
 
         return content
+
+    # ================================================================== #
+    #  Tracing hooks (installed by enable_tracing)
+    # ================================================================== #
+
+    def _trace_request(
+        self, span: Span, args: tuple, response: SimulatedResponse
+    ) -> None:
+        request_body = args[0]
+        attributes = span.attributes
+        attributes["model"] = request_body.get("model")
+        attributes["stream"] = bool(request_body.get("stream"))
+        attributes["n"] = request_body.get("n", 1)
+        attributes["fault"] = ",".join(
+            sorted(name for name, value in self._fault_config.items() if value)
+        ) or None
+        attributes["status_code"] = response.status_code
+        if response.status_code >= 400:
+            span.status = "error"
+            attributes["error_type"] = response.json()["error"]["type"]
+        elif isinstance(response, StreamingResponse):
+            span.tracer.trace_lines(response, span)
+        else:
+            body = response.json()
+            attributes["finish_reason"] = body["choices"][0]["finish_reason"]
+            attributes["usage"] = body["usage"]
+
+    def _trace_handler(self, span: Span, args: tuple, response: Any) -> None:
+        span.root.attributes["route"] = span.name
+
+    def _trace_tool_calling(
+        self, span: Span, args: tuple, response: SimulatedResponse
+    ) -> None:
+        self._trace_handler(span, args, response)
+        if isinstance(response, StreamingResponse):
+            tool_calls = response._tool_calls
+        else:
+            tool_calls = response.json()["choices"][0]["message"].get("tool_calls")
+        span.attributes["follow_up"] = args[2].has_tool_result
+        span.attributes["tools"] = [
+            call["function"]["name"] for call in tool_calls or ()
+        ]
+
+    def _trace_pool_selection(self, span: Span, args: tuple, variant: Any) -> None:
+        pool = args[0]
+        span.attributes["pool"] = pool_key(pool)
+        span.attributes["variant_index"] = pool.index(variant)
+        span.attributes["hallucination"] = bool(
+            isinstance(variant, dict) and variant.get("_hallucination")
+        )
+
+    def _trace_pii_scrub(self, span: Span, args: tuple, content: str) -> None:
+        span.attributes["scrubbed"] = content != args[0]
@@ -0,0 +1,138 @@
+"""Stop sequences and ``max_tokens`` limits for generated text.
+
+:class:`LimitedStream` wraps an iterator of chunks and ends it early when
+a character budget (derived from ``max_tokens``) runs out or a stop
+sequence appears, recording ``finish_reason`` as ``"length"`` or
+``"stop"``.  Stop sequences are matched incrementally: only the tail of
+the stream that could still be the start of a stop sequence is held
+back, so a sequence split across chunk boundaries is found without
+buffering the whole text.  Non-streaming responses go through the same
+code via :func:`limit_text`, so both paths cut at the same place.
+"""
+
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+from .tokenizer import token_offset
+
+MAX_STOP_SEQUENCES = 4
+
+
+def normalize_stop(stop) -> Tuple[str, ...]:
+    """Validate the ``stop`` request field and return it as a tuple.
+
+    Raises ValueError for anything other than a non-empty string or a
+    list of up to :data:`MAX_STOP_SEQUENCES` non-empty strings.
+    """
+    if stop is None:
+        return ()
+    if isinstance(stop, str):
+        stop = [stop]
+    if (
+        not isinstance(stop, list)
+        or len(stop) > MAX_STOP_SEQUENCES
+        or not all(isinstance(s, str) and s for s in stop)
+    ):
+        raise ValueError(
+            "stop must be a string or a list of up to "
+            f"{MAX_STOP_SEQUENCES} non-empty strings"
+        )
+    return tuple(stop)
+
+
+class StopMatcher:
+    """Incremental stop-sequence detector.
+
+    :meth:`feed` returns the part of each chunk that is safe to emit and
+    sets :attr:`stopped` once a stop sequence has been seen; the sequence
+    itself and anything after it are never emitted.
+    """
+
+    def __init__(self, stop: Sequence[str]):
+        self._stop = tuple(stop)
+        self._hold = max((len(s) for s in self._stop), default=1) - 1
+        self._pending = ""
+        self.stopped = False
+
+    def feed(self, chunk: str) -> str:
+        text = self._pending + chunk
+        hits = [i for i in (text.find(s) for s in self._stop) if i >= 0]
+        if hits:
+            self.stopped = True
+            self._pending = ""
+            return text[:min(hits)]
+        held = self._partial_match(text)
+        self._pending = text[len(text) - held:] if held else ""
+        return text[:len(text) - held]
+
+    def flush(self) -> str:
+        """Release text held back at the end of the stream."""
+        pending, self._pending = self._pending, ""
+        return pending
+
+    def _partial_match(self, text: str) -> int:
+        """Length of the longest suffix of *text* that starts a stop sequence."""
+        for size in range(min(self._hold, len(text)), 0, -1):
+            tail = text[-size:]
+            if any(s.startswith(tail) for s in self._stop):
+                return size
+        return 0
+
+
+class LimitedStream:
+    """Iterate *chunks*, ending at *max_chars* or the first stop sequence.
+
+    After iteration :attr:`finish_reason` is ``"length"`` if the budget
+    ran out, otherwise ``"stop"`` (natural end or stop sequence).  Empty
+    pieces are skipped.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[str],
+        max_chars: Optional[int] = None,
+        stop: Sequence[str] = (),
+    ):
+        self._chunks = chunks
+        self._max_chars = max_chars
+        self._stop = stop
+        self.finish_reason = "stop"
+
+    def __iter__(self) -> Iterator[str]:
+        self.finish_reason = "stop"
+        matcher = StopMatcher(self._stop) if self._stop else None
+        budget = self._max_chars
+        for chunk in self._chunks:
+            clipped = budget is not None and len(chunk) > budget
+            if clipped:
+                chunk = chunk[:budget]
+            elif budget is not None:
+                budget -= len(chunk)
+            if matcher is not None:
+                chunk = matcher.feed(chunk)
+                if matcher.stopped:
+                    if chunk:
+                        yield chunk
+                    return
+                if clipped:
+                    chunk += matcher.flush()
+            if chunk:
+                yield chunk
+            if clipped:
+                self.finish_reason = "length"
+                return
+        if matcher is not None:
+            tail = matcher.flush()
+            if tail:
+                yield tail
+
+
+def limit_text(
+    text: str, max_tokens: Optional[int] = None, stop: Sequence[str] = ()
+) -> Tuple[str, str]:
+    """Apply *max_tokens* and *stop* to a complete text.
+
+    Returns ``(text, finish_reason)``.
+    """
+    max_chars = None if max_tokens is None else token_offset(text, max_tokens)
+    limited = LimitedStream((text,), max_chars, stop)
+    return "".join(limited), limited.finish_reason
@@ -0,0 +1,136 @@
+"""Mid-stream network faults for :class:`StreamingResponse`.
+
+A :class:`StreamFault` describes one misbehaviour of the SSE transport
+(a stalled chunk, a dropped connection, a duplicated or split frame, or a
+heartbeat comment).  Faults fire either at fixed frame positions or with a
+per-frame probability, and are applied by :func:`apply_stream_faults`,
+which turns a sequence of SSE frames into transport *events* that both the
+sync and the async stream readers replay.
+"""
+
+import random
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+STREAM_FAULT_KINDS = ("stall", "disconnect", "duplicate", "split", "heartbeat")
+
+# Frame position that refers to the terminating ``data: [DONE]`` line.
+DONE_POSITION = -1
+
+# Event kinds produced by apply_stream_faults().
+EVENT_LINE = "line"
+EVENT_SLEEP = "sleep"
+EVENT_DROP = "drop"
+
+
+class StreamInterrupted(ConnectionError):
+    """Raised when a simulated stream drops before ``data: [DONE]``."""
+
+
+class StreamFault:
+    """A single streaming fault.
+
+    Parameters
+    ----------
+    kind : str
+        One of ``"stall"``, ``"disconnect"``, ``"duplicate"``, ``"split"``
+        or ``"heartbeat"``.
+    at : int or sequence of int, optional
+        Frame position(s) the fault fires on.  Content frames are numbered
+        from 0; ``-1`` is the ``data: [DONE]`` frame.
+    probability : float
+        Per-frame probability of firing, drawn from the stream's RNG.
+        When neither *at* nor *probability* is given, ``disconnect``
+        defaults to dropping just before ``[DONE]`` and every other kind
+        fires on the first frame.
+    delay : float
+        Stall duration in seconds (``stall`` only).
+    raise_error : bool
+        ``disconnect`` only — raise :class:`StreamInterrupted` instead of
+        silently ending the stream.
+    comment : str
+        Comment text sent by ``heartbeat``.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        at: Optional[Union[int, Sequence[int]]] = None,
+        probability: float = 0.0,
+        delay: float = 15.0,
+        raise_error: bool = False,
+        comment: str = "keep-alive",
+    ):
+        if kind not in STREAM_FAULT_KINDS:
+            raise ValueError(f"Unknown stream fault kind: {kind!r}")
+        if not (0.0 <= probability <= 1.0):
+            raise ValueError(f"probability must be between 0.0 and 1.0, got {probability}")
+
+        if at is None and probability == 0.0:
+            at = DONE_POSITION if kind == "disconnect" else 0
+        if isinstance(at, int):
+            at = (at,)
+
+        self.kind = kind
+        self.at = frozenset(at) if at is not None else frozenset()
+        self.probability = probability
+        self.delay = delay
+        self.raise_error = raise_error
+        self.comment = comment
+
+    def fires(self, position: int, is_done: bool, rng: random.Random) -> bool:
+        """Return True if the fault applies to the frame at *position*."""
+        if position in self.at or (is_done and DONE_POSITION in self.at):
+            return True
+        return self.probability > 0.0 and rng.random() < self.probability
+
+    def __repr__(self) -> str:
+        where = sorted(self.at) if self.at else f"p={self.probability}"
+        return f"<StreamFault {self.kind} at={where}>"
+
+
+def apply_stream_faults(
+    frames: Iterable[Tuple[str, float]],
+    faults: Sequence[StreamFault],
+    rng: Optional[random.Random] = None,
+) -> Iterator[Tuple[str, object]]:
+    """Turn ``(frame, delay_after_s)`` pairs into transport events.
+
+    The last frame is expected to be ``data: [DONE]``.  Yields
+    ``(EVENT_LINE, text)``, ``(EVENT_SLEEP, seconds)`` and, when a
+    disconnect should raise, a final ``(EVENT_DROP, exception)``.
+    """
+    rng = rng or random.Random()
+
+    for position, (frame, delay_after) in enumerate(frames):
+        is_done = frame == "data: [DONE]"
+        fired: List[StreamFault] = [
+            f for f in faults if f.fires(position, is_done, rng)
+        ]
+
+        for fault in fired:
+            if fault.kind == "disconnect":
+                if fault.raise_error:
+                    yield EVENT_DROP, StreamInterrupted(
+                        f"Connection dropped before frame {position}"
+                    )
+                return
+
+        for fault in fired:
+            if fault.kind == "heartbeat":
+                yield EVENT_LINE, f": {fault.comment}"
+            elif fault.kind == "stall":
+                yield EVENT_SLEEP, fault.delay
+
+        copies = 2 if any(f.kind == "duplicate" for f in fired) else 1
+        split = any(f.kind == "split" for f in fired)
+        for _ in range(copies):
+            if split and len(frame) > 1:
+                cut = len(frame) // 2
+                yield EVENT_LINE, frame[:cut]
+                yield EVENT_LINE, frame[cut:]
+            else:
+                yield EVENT_LINE, frame
+
+        if delay_after > 0:
+            yield EVENT_SLEEP, delay_after
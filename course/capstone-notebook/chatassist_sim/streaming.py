@@ -1,11 +1,24 @@
 """StreamingResponse — SSE-formatted streaming for the ChatAssist simulator."""
 
+import asyncio
 import json
+import random
 import time
 import uuid
-from typing import List, Optional
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from .chunking import Chunker, iter_word_chunks
 from .response import SimulatedResponse
+from .stopping import LimitedStream, limit_text
+from .stream_faults import (
+    EVENT_DROP,
+    EVENT_LINE,
+    EVENT_SLEEP,
+    StreamFault,
+    apply_stream_faults,
+)
+from .tokenizer import count_tokens, token_offset
 
 
 # Default content used when no specific pool text is provided.
@@ -19,22 +32,39 @@ def _split_into_word_chunks(text: str) -> List[str]:
     """Split *text* into word-level chunks preserving whitespace.
 
     Each chunk is a word optionally preceded by a space so that
-    ``"".join(chunks) == text``.
+    ``"".join(chunks) == text``.  Prefer passing ``text=`` to
+    :class:`StreamingResponse`, which chunks lazily.
     """
-    words = text.split(" ")
-    chunks: List[str] = []
-    for i, word in enumerate(words):
-        if i == 0:
-            chunks.append(word)
-        else:
-            chunks.append(f" {word}")
-    return chunks
+    return list(iter_word_chunks(text))
 
 
 class StreamingResponse(SimulatedResponse):
     """A streaming variant of :class:`SimulatedResponse`.
 
-    Yields Server-Sent Events (SSE) strings from :meth:`iter_lines`.
+    Yields Server-Sent Events (SSE) strings from :meth:`iter_lines` (or
+    :meth:`aiter_lines` for async consumers).  Optional *faults* simulate
+    mid-stream network trouble — see :mod:`chatassist_sim.stream_faults`.
+
+    Content is given either as a precomputed *chunks* list or as *text*
+    plus a *chunker* (see :mod:`chatassist_sim.chunking`); the latter
+    generates chunks lazily on every pass over the stream.
+
+    *max_tokens* and *stop* end the stream early, with ``finish_reason``
+    ``"length"`` or ``"stop"``; stop sequences are detected across chunk
+    boundaries as the chunks are produced (see :mod:`.stopping`).
+
+    With *tool_calls* the stream carries ``delta.tool_calls`` fragments
+    instead of content: each call's id and name first, then its
+    ``arguments`` string split by *chunker*, ending with
+    ``finish_reason: "tool_calls"``.
+
+    *alternatives* adds choices ``1..n-1`` (dicts with ``content`` or
+    ``tool_calls``) for ``n > 1`` requests; their chunks are interleaved
+    round-robin with choice 0's, each tagged with its ``index``.
+
+    *on_finish* is called with each choice's ``finish_reason`` the first
+    time its final frame is generated; iterating the stream again does
+    not call it again.
     """
 
     def __init__(
@@ -43,16 +73,42 @@ class StreamingResponse(SimulatedResponse):
         chunk_delay_ms: int = 30,
         response_id: Optional[str] = None,
         model: str = "chatassist-4",
+        request_id: Optional[str] = None,
+        faults: Optional[Sequence[StreamFault]] = None,
+        rng: Optional[random.Random] = None,
+        text: Optional[str] = None,
+        chunker: Optional[Chunker] = None,
+        prompt_tokens: int = 42,
+        cached_tokens: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        stop: Sequence[str] = (),
+        tool_calls: Optional[List[Dict[str, Any]]] = None,
+        alternatives: Optional[List[Dict[str, Any]]] = None,
+        on_finish: Optional[Callable[[str], None]] = None,
     ):
-        # Use default content when no chunks are supplied.
-        if chunks is None:
-            chunks = _split_into_word_chunks(_DEFAULT_STREAMING_TEXT)
+        # Use default content when neither chunks nor text are supplied.
+        if tool_calls:
+            chunks, text = [], None
+        elif chunks is None and text is None:
+            text = _DEFAULT_STREAMING_TEXT
 
         self._chunks = chunks
+        self._text = text if chunks is None else None
+        self._chunker = chunker or iter_word_chunks
         self._chunk_delay_ms = chunk_delay_ms
         self._response_id = response_id or f"resp-{uuid.uuid4().hex[:12]}"
         self._model = model
         self._created = int(time.time())
+        self._prompt_tokens = prompt_tokens
+        self._cached_tokens = cached_tokens
+        self._max_tokens = max_tokens
+        self._stop = tuple(stop)
+        self._tool_calls = tool_calls or None
+        self._alternatives = list(alternatives or [])
+        self._on_finish = on_finish
+        self._finished: set = set()
+        self._faults = list(faults or [])
+        self._rng = rng or random.Random()
 
         # Satisfy the base class — headers mimic a streaming 200 response.
         super().__init__(
@@ -63,7 +119,7 @@ class StreamingResponse(SimulatedResponse):
                 "X-RateLimit-Limit": "60",
                 "X-RateLimit-Remaining": "59",
                 "X-RateLimit-Reset": str(int(time.time()) + 60),
-                "X-Request-Id": f"req-{uuid.uuid4().hex[:12]}",
+                "X-Request-Id": request_id or f"req-{uuid.uuid4().hex[:12]}",
             },
         )
 
@@ -82,16 +138,48 @@ class StreamingResponse(SimulatedResponse):
 
             data: {"id":"resp-...","object":"chat.completion.chunk",...}
 
-        The final content chunk carries ``finish_reason: "stop"`` and an
-        accumulated ``usage`` block, followed by ``data: [DONE]``.
+        The final content chunk carries ``finish_reason`` (``"stop"`` or
+        ``"length"``) and an accumulated ``usage`` block, followed by
+        ``data: [DONE]``.
         """
+        for kind, value in self._events():
+            if kind == EVENT_LINE:
+                yield value
+            elif kind == EVENT_SLEEP:
+                time.sleep(value)
+            elif kind == EVENT_DROP:
+                raise value
+
+    async def aiter_lines(self):
+        """Async counterpart of :meth:`iter_lines` using ``asyncio.sleep``."""
+        for kind, value in self._events():
+            if kind == EVENT_LINE:
+                yield value
+            elif kind == EVENT_SLEEP:
+                await asyncio.sleep(value)
+            elif kind == EVENT_DROP:
+                raise value
+
+    # ------------------------------------------------------------------ #
+    # Frame generation
+    # ------------------------------------------------------------------ #
+
+    def _events(self) -> Iterator[Tuple[str, object]]:
+        """Transport events for one pass over the stream, faults applied."""
+        return apply_stream_faults(self._frames(), self._faults, self._rng)
+
+    def _frames(self) -> Iterator[Tuple[str, float]]:
+        """Yield ``(sse_line, delay_after_s)`` pairs ending with ``[DONE]``."""
         delay_s = self._chunk_delay_ms / 1000.0
-        total_content = "".join(self._chunks)
-        prompt_tokens = 42  # Deterministic placeholder
-        completion_tokens = max(1, int(len(total_content.split()) * 1.3))
+        usage = self._usage()
+        if self._alternatives:
+            deltas = _interleave(
+                [self._choice_deltas(index) for index in range(self._n_choices)]
+            )
+        else:
+            deltas = self._choice_deltas(0)
 
-        for i, chunk_text in enumerate(self._chunks):
-            is_last = i == len(self._chunks) - 1
+        for (index, delta, finish_reason), is_last in _with_last_flag(deltas):
             payload = {
                 "id": self._response_id,
                 "object": "chat.completion.chunk",
@@ -99,32 +187,155 @@ class StreamingResponse(SimulatedResponse):
                 "model": self._model,
                 "choices": [
                     {
-                        "index": 0,
-                        "delta": {"content": chunk_text},
-                        "finish_reason": "stop" if is_last else None,
+                        "index": index,
+                        "delta": delta,
+                        "finish_reason": finish_reason,
                     }
                 ],
             }
             if is_last:
-                payload["usage"] = {
-                    "prompt_tokens": prompt_tokens,
-                    "completion_tokens": completion_tokens,
-                    "total_tokens": prompt_tokens + completion_tokens,
-                }
+                payload["usage"] = usage
+
+            yield f"data: {json.dumps(payload)}", 0.0 if is_last else delay_s
 
-            yield f"data: {json.dumps(payload)}"
+        yield "data: [DONE]", 0.0
 
-            if not is_last and delay_s > 0:
-                time.sleep(delay_s)
+    @property
+    def _n_choices(self) -> int:
+        return 1 + len(self._alternatives)
 
-        yield "data: [DONE]"
+    def _choice_deltas(self, index: int) -> Iterator[Tuple[int, Dict[str, Any], Optional[str]]]:
+        """Yield ``(index, delta, finish_reason)`` for one choice's frames."""
+        tool_calls = self._choice_tool_calls(index)
+        chunks: Optional[LimitedStream] = None
+        if tool_calls:
+            deltas = self._iter_tool_call_deltas(tool_calls)
+        else:
+            chunks = self._iter_chunks(index)
+            deltas = ({"content": chunk} for chunk in chunks)
+
+        for delta, is_last in _with_last_flag(deltas, {"content": ""}):
+            finish_reason = None
+            if is_last:
+                finish_reason = "tool_calls" if chunks is None else chunks.finish_reason
+                if self._on_finish is not None and index not in self._finished:
+                    self._finished.add(index)
+                    self._on_finish(finish_reason)
+            yield index, delta, finish_reason
+
+    def _usage(self) -> Dict[str, Any]:
+        """Usage block carried by the final content chunk.
+
+        Completion tokens are summed over all choices; the prompt is
+        charged once.
+        """
+        prompt_tokens = self._prompt_tokens
+        completion_tokens = sum(
+            max(1, count_tokens(self._message(index)["content"] or ""))
+            for index in range(self._n_choices)
+        )
+        usage: Dict[str, Any] = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if self._cached_tokens is not None:
+            usage["prompt_tokens_details"] = {"cached_tokens": self._cached_tokens}
+        return usage
+
+    def _message(self, index: int = 0) -> Dict[str, Any]:
+        """The assistant message a client assembles for choice *index*."""
+        tool_calls = self._choice_tool_calls(index)
+        if tool_calls:
+            return {"role": "assistant", "content": None, "tool_calls": tool_calls}
+        text, _ = limit_text(self._full_text(index), self._max_tokens, self._stop)
+        return {"role": "assistant", "content": text}
+
+    def _choice_tool_calls(self, index: int) -> Optional[List[Dict[str, Any]]]:
+        if index == 0:
+            return self._tool_calls
+        return self._alternatives[index - 1].get("tool_calls")
+
+    def _iter_tool_call_deltas(
+        self, tool_calls: List[Dict[str, Any]]
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield ``delta.tool_calls`` fragments for every tool call."""
+        for index, call in enumerate(tool_calls):
+            yield {
+                "tool_calls": [
+                    {
+                        "index": index,
+                        "id": call["id"],
+                        "type": call.get("type", "function"),
+                        "function": {"name": call["function"]["name"], "arguments": ""},
+                    }
+                ]
+            }
+            for fragment in self._chunker(call["function"]["arguments"]):
+                yield {
+                    "tool_calls": [
+                        {"index": index, "function": {"arguments": fragment}}
+                    ]
+                }
+
+    def _full_text(self, index: int = 0) -> str:
+        """Complete content of choice *index*, without iterating it."""
+        if index:
+            return self._alternatives[index - 1].get("content") or ""
+        if self._chunks is not None:
+            return "".join(self._chunks)
+        return self._text
+
+    def _iter_chunks(self, index: int = 0) -> LimitedStream:
+        """This pass's chunks, cut short by ``max_tokens`` and ``stop``."""
+        max_chars = None
+        if self._max_tokens is not None:
+            max_chars = token_offset(self._full_text(index), self._max_tokens)
+        if index == 0 and self._chunks is not None:
+            chunks: Iterable[str] = self._chunks
+        else:
+            chunks = self._chunker(self._full_text(index))
+        return LimitedStream(chunks, max_chars, self._stop)
 
     # ------------------------------------------------------------------ #
     # repr
     # ------------------------------------------------------------------ #
 
     def __repr__(self) -> str:
-        return (
-            f"<StreamingResponse [{self.status_code}] "
-            f"chunks={len(self._chunks)}>"
-        )
+        if self._tool_calls:
+            chunks = f"tool_calls[{len(self._tool_calls)}]"
+        elif self._chunks is not None:
+            chunks = len(self._chunks)
+        else:
+            chunker = getattr(self._chunker, "func", self._chunker)
+            chunks = getattr(chunker, "__name__", "lazy")
+        if self._alternatives:
+            return f"<StreamingResponse [{self.status_code}] chunks={chunks} n={self._n_choices}>"
+        return f"<StreamingResponse [{self.status_code}] chunks={chunks}>"
+
+
+def _with_last_flag(items: Iterable[Any], empty: Any = "") -> Iterator[Tuple[Any, bool]]:
+    """Yield ``(item, is_last)`` using one item of look-ahead.
+
+    An empty source still yields *empty* once so that every stream
+    carries a final ``finish_reason`` frame.
+    """
+    iterator = iter(items)
+    previous = next(iterator, empty)
+    for chunk in iterator:
+        yield previous, False
+        previous = chunk
+    yield previous, True
+
+
+def _interleave(iterators: List[Iterator[Any]]) -> Iterator[Any]:
+    """Yield from *iterators* round-robin until all are exhausted."""
+    active = deque(iterators)
+    while active:
+        iterator = active.popleft()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            continue
+        yield item
+        active.append(iterator)
@@ -0,0 +1,38 @@
+"""Approximate tokenizer for the ChatAssist simulator.
+
+The real ChatAssist models use a BPE vocabulary; the simulator only needs
+something cheap and deterministic that lands near the usual ~1.3 tokens
+per English word.  Words (capped at 10 letters), 1-3 digit groups and
+punctuation runs each count as one token, and a single leading space is
+folded into the token that follows it.  Concatenating the tokens of a
+text always reproduces the text exactly.
+"""
+
+import re
+from typing import Iterator, Optional
+
+_TOKEN_PATTERN = re.compile(r" ?[A-Za-z]{1,10}| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+")
+
+
+def iter_tokens(text: str) -> Iterator[str]:
+    """Lazily yield the tokens of *text*."""
+    for match in _TOKEN_PATTERN.finditer(text):
+        yield match.group(0)
+
+
+def count_tokens(text: str) -> int:
+    """Return the number of tokens in *text*."""
+    return sum(1 for _ in _TOKEN_PATTERN.finditer(text))
+
+
+def token_offset(text: str, max_tokens: int) -> Optional[int]:
+    """Return the index where token ``max_tokens + 1`` of *text* starts.
+
+    ``text[:offset]`` is then exactly *max_tokens* tokens long.  Returns
+    None when *text* fits within *max_tokens*; only the tokens up to the
+    limit are scanned.
+    """
+    for i, match in enumerate(_TOKEN_PATTERN.finditer(text)):
+        if i == max_tokens:
+            return match.start()
+    return None
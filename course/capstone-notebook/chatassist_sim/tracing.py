@@ -0,0 +1,275 @@
+"""Opt-in request tracing with JSONL span export.
+
+:class:`Tracer` wraps selected methods of an object so each call becomes a
+:class:`Span` nested under the span of the call that made it.  Finished
+spans go to a bounded ring buffer; with a *path*, a background thread
+drains the buffer to a JSONL file (one span per line) every
+*flush_interval_s*.  When spans arrive faster than they are flushed the
+oldest are dropped and counted in :attr:`Tracer.dropped`.
+
+As with :class:`~chatassist_sim.instrumentation.StageTimer`, nothing is
+wrapped until :meth:`Tracer.install`, so tracing costs nothing when off.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from .instrumentation import Patch, patch_method, restore_methods
+
+# A hook receives the call's span, positional arguments and return value.
+SpanHook = Callable[["Span", Tuple[Any, ...], Any], None]
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent", "root",
+        "start_ns", "duration_ns", "attributes", "status", "_started",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"]):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.root = self if parent is None else parent.root
+        self.trace_id = tracer._new_id(32) if parent is None else parent.trace_id
+        self.span_id = tracer._new_id(16)
+        self.attributes: Dict[str, Any] = {}
+        self.status = "ok"
+        self.duration_ns: Optional[int] = None
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+
+    def fail(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.attributes["exception"] = type(exc).__name__
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ns": self.duration_ns,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+    def __repr__(self) -> str:
+        return f"<Span {self.name} {self.span_id} [{self.status}]>"
+
+
+class Tracer:
+    """Record spans for the methods of one object.
+
+    Parameters
+    ----------
+    capacity : int
+        Finished spans held in memory before the oldest are dropped.
+    path : str, optional
+        JSONL file that spans are appended to in the background.
+    flush_interval_s : float
+        Seconds between background flushes.
+
+    Usage::
+
+        tracer = Tracer(path="traces.jsonl")
+        tracer.install(sim, {"_route": ("routing", None)})
+        ...
+        tracer.close()               # uninstall and write what is left
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10_000,
+        path: Optional[str] = None,
+        flush_interval_s: float = 1.0,
+    ):
+        self.path = path
+        self.dropped = 0
+        self.written = 0
+        self._buffer: "deque[Span]" = deque(maxlen=capacity)
+        self._stack: List[Span] = []
+        self._installed: List[Patch] = []
+        self._ids = random.Random(os.urandom(16))
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if path is not None:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically,
+                args=(flush_interval_s,),
+                name="chatassist-trace-flush",
+                daemon=True,
+            )
+            self._flusher.start()
+
+    # ------------------------------------------------------------------ #
+    #  Instrumentation
+    # ------------------------------------------------------------------ #
+
+    def install(
+        self,
+        target: Any,
+        spans: Mapping[str, Tuple[str, Optional[SpanHook]]],
+    ) -> None:
+        """Trace ``target.<path>`` for each ``path: (span name, hook)``.
+
+        The optional hook runs after a successful call to add attributes.
+        """
+        self.uninstall()
+        for path, (name, hook) in spans.items():
+            self._installed.append(
+                patch_method(target, path, partial(self._wrap, name, hook))
+            )
+
+    def uninstall(self) -> None:
+        restore_methods(self._installed)
+        self._installed = []
+        self._stack = []
+
+    @property
+    def current(self) -> Optional[Span]:
+        """The innermost span of the call in progress."""
+        return self._stack[-1] if self._stack else None
+
+    def _wrap(self, name: str, hook: Optional[SpanHook], method: Callable) -> Callable:
+        tracer = self
+
+        def traced(*args, **kwargs):
+            stack = tracer._stack
+            span = Span(tracer, name, stack[-1] if stack else None)
+            stack.append(span)
+            try:
+                result = method(*args, **kwargs)
+                if hook is not None:
+                    hook(span, args, result)
+                return result
+            except BaseException as exc:
+                span.fail(exc)
+                raise
+            finally:
+                stack.pop()
+                tracer.finish(span)
+
+        traced.__wrapped__ = method
+        return traced
+
+    def trace_lines(self, response: Any, parent: Span) -> None:
+        """Trace iteration of *response*'s ``iter_lines``/``aiter_lines``.
+
+        Consuming the stream records a ``stream`` span under *parent* and
+        a ``stream_chunk`` span per line, timed from the request for that
+        line to its arrival (chunk delays and stream faults included).
+        """
+        iter_lines = response.iter_lines
+        aiter_lines = response.aiter_lines
+        tracer = self
+
+        def traced_iter_lines():
+            stream = Span(tracer, "stream", parent)
+            lines = iter_lines()
+            index = 0
+            try:
+                while True:
+                    chunk = Span(tracer, "stream_chunk", stream)
+                    try:
+                        line = next(lines)
+                    except StopIteration:
+                        break
+                    except BaseException as exc:
+                        chunk.fail(exc)
+                        stream.fail(exc)
+                        tracer._finish_chunk(chunk, index, "")
+                        raise
+                    tracer._finish_chunk(chunk, index, line)
+                    index += 1
+                    yield line
+            finally:
+                stream.attributes["chunks"] = index
+                tracer.finish(stream)
+
+        async def traced_aiter_lines():
+            stream = Span(tracer, "stream", parent)
+            lines = aiter_lines()
+            index = 0
+            try:
+                while True:
+                    chunk = Span(tracer, "stream_chunk", stream)
+                    try:
+                        line = await lines.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except BaseException as exc:
+                        chunk.fail(exc)
+                        stream.fail(exc)
+                        tracer._finish_chunk(chunk, index, "")
+                        raise
+                    tracer._finish_chunk(chunk, index, line)
+                    index += 1
+                    yield line
+            finally:
+                stream.attributes["chunks"] = index
+                tracer.finish(stream)
+
+        response.iter_lines = traced_iter_lines
+        response.aiter_lines = traced_aiter_lines
+
+    def _finish_chunk(self, chunk: Span, index: int, line: str) -> None:
+        chunk.attributes["index"] = index
+        chunk.attributes["chars"] = len(line)
+        self.finish(chunk)
+
+    # ------------------------------------------------------------------ #
+    #  Buffer and export
+    # ------------------------------------------------------------------ #
+
+    def finish(self, span: Span) -> None:
+        """Stamp *span*'s duration and add it to the ring buffer."""
+        span.duration_ns = time.perf_counter_ns() - span._started
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(span)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Buffered (not yet flushed) spans, oldest first."""
+        return [span.as_dict() for span in list(self._buffer)]
+
+    def flush(self) -> int:
+        """Append buffered spans to :attr:`path`; return how many."""
+        if self.path is None:
+            return 0
+        with self._flush_lock:
+            lines = []
+            buffer = self._buffer
+            while buffer:
+                lines.append(json.dumps(buffer.popleft().as_dict(), default=str))
+            if lines:
+                with open(self.path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                self.written += len(lines)
+            return len(lines)
+
+    def close(self) -> None:
+        """Uninstall, stop the background flusher and flush what is left."""
+        self.uninstall()
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_periodically(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            self.flush()
+
+    def _new_id(self, hex_digits: int) -> str:
+        return "%0*x" % (hex_digits, self._ids.getrandbits(hex_digits * 4))
@@ -1,4 +1,51 @@
 from .runner import run_test, run_n_times
-from .assertions import assert_contains_any, assert_not_contains_any, assert_similarity
+from .assertions import (
+    assert_contains_any,
+    assert_facts_consistent,
+    assert_not_contains_any,
+    assert_p99_gap_below,
+    assert_similarity,
+    assert_ttfb_below,
+)
+from .batch import (
+    ContainsAny,
+    FactsConsistent,
+    JsonHasFields,
+    JsonValid,
+    NotContainsAny,
+    Similarity,
+    check_batch,
+)
+from .facts import FactIndex
+from .impact import ImpactRecorder, affected_tests
+from .mutation import generate_mutants, mutation_test
+from .reporters import (
+    ConsoleReporter,
+    JSONLReporter,
+    JUnitXMLReporter,
+    ProgressReporter,
+    Reporter,
+)
+from .streaming import (
+    SSEEvent,
+    SSEParser,
+    StreamAccumulator,
+    StreamTimer,
+    accumulate_stream,
+    aparse_sse,
+    aparse_sse_lines,
+    parse_sse,
+    parse_sse_lines,
+)
 
-__all__ = ["run_test", "run_n_times", "assert_contains_any", "assert_not_contains_any", "assert_similarity"]
+__all__ = [
+    "run_test", "run_n_times", "assert_contains_any", "assert_not_contains_any", "assert_similarity",
+    "StreamAccumulator", "accumulate_stream",
+    "SSEEvent", "SSEParser", "parse_sse", "parse_sse_lines", "aparse_sse", "aparse_sse_lines",
+    "StreamTimer", "assert_ttfb_below", "assert_p99_gap_below",
+    "ImpactRecorder", "affected_tests", "generate_mutants", "mutation_test",
+    "FactIndex", "assert_facts_consistent",
+    "check_batch", "ContainsAny", "NotContainsAny", "Similarity", "JsonValid", "JsonHasFields",
+    "FactsConsistent",
+    "Reporter", "ConsoleReporter", "ProgressReporter", "JSONLReporter", "JUnitXMLReporter",
+]
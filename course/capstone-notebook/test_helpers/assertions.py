@@ -73,3 +73,72 @@ def assert_json_has_fields(obj, fields, msg=None):
         if msg is None:
             msg = f"Missing required fields: {missing}. Present fields: {list(obj.keys())}"
         raise AssertionError(msg)
+
+
+def assert_facts_consistent(text, index=None, msg=None):
+    """Assert that text states no policy fact wrongly and leaks no internal contact.
+
+    Checks durations, prices, times and contacts against a FactIndex
+    (default: built from SHOPMART_SYSTEM_PROMPT and shopmart_config).
+
+    Usage:
+        assert_facts_consistent(response_text)
+        # AssertionError: '60 days' contradicts electronics_returns (expected 15) ...
+    """
+    if index is None:
+        from .facts import default_index
+
+        index = default_index()
+    problems = index.check(text)
+    if problems:
+        if msg is None:
+            details = []
+            for p in problems:
+                if p["problem"] == "contradiction":
+                    details.append(f"'{p['claim']}' contradicts {p['topic']} (expected {', '.join(p['expected'])})")
+                elif p["problem"] == "internal":
+                    details.append(f"'{p['claim']}' is an internal contact")
+                else:
+                    details.append(f"'{p['claim']}' is not a known ShopSmart {p['kind']}")
+            msg = "; ".join(details) + f" in: {text[:200]}..."
+        raise AssertionError(msg)
+
+
+def _gap_report(timer):
+    summary = timer.summary()
+    return (
+        f"gaps p50={summary['gap_p50'] * 1000:.1f}ms p90={summary['gap_p90'] * 1000:.1f}ms "
+        f"p99={summary['gap_p99'] * 1000:.1f}ms max={summary['gap_max'] * 1000:.1f}ms "
+        f"over {summary['chunks']} chunks"
+    )
+
+
+def assert_ttfb_below(timer, max_seconds, msg=None):
+    """Assert that a StreamTimer's time-to-first-byte is below max_seconds.
+
+    Usage:
+        timer = StreamTimer(response.iter_lines())
+        accumulate_stream(timer)
+        assert_ttfb_below(timer, 0.5)
+    """
+    ttfb = timer.ttfb
+    if ttfb is None or ttfb >= max_seconds:
+        if msg is None:
+            shown = "no data received" if ttfb is None else f"{ttfb * 1000:.1f}ms"
+            msg = f"TTFB {shown} is not below {max_seconds * 1000:.1f}ms ({_gap_report(timer)})"
+        raise AssertionError(msg)
+    return ttfb
+
+
+def assert_p99_gap_below(timer, max_seconds, msg=None):
+    """Assert that the 99th-percentile gap between stream chunks is below max_seconds.
+
+    Usage:
+        assert_p99_gap_below(timer, 0.2)
+    """
+    p99 = timer.gap_percentile(99)
+    if p99 >= max_seconds:
+        if msg is None:
+            msg = f"p99 chunk gap {p99 * 1000:.1f}ms is not below {max_seconds * 1000:.1f}ms ({_gap_report(timer)})"
+        raise AssertionError(msg)
+    return p99
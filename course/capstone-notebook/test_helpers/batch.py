@@ -0,0 +1,327 @@
+"""Batch assertions: many named checks over a column of response texts.
+
+The single-string helpers in :mod:`test_helpers.assertions` raise on the
+first failure, which is right inside a test but impractical for the
+post-hoc analysis of thousands of recorded responses.
+:func:`check_batch` evaluates every check on every text and returns a
+:class:`BatchResult` with a pass/fail matrix and failure summaries
+instead of raising.
+
+The work is shared across the batch:
+
+- Each distinct text is evaluated once.  Recorded responses repeat pool
+  variants, so that is usually far fewer texts than rows.
+- All substring checks are answered by one regex pass per text.  The
+  regex combines every needle of every check.
+- Similarity uses one ``SequenceMatcher`` per reference, whose index of
+  the reference (``set_seq2``) is built once.  The cheap
+  ``real_quick_ratio``/``quick_ratio`` upper bounds reject most
+  dissimilar texts before the full ``ratio``.
+- JSON is parsed once per text for all JSON checks.
+
+Pass/fail agrees with the single-string helpers, and the example
+messages in the summary are produced by those helpers.  A text that is
+not a string (such as a missing response, ``None``) is checked as the
+empty string, and its example message is "not a string".
+
+Usage:
+    result = check_batch(texts, {
+        "mentions_window": ContainsAny(["30 days", "thirty days"]),
+        "no_leak": NotContainsAny(["4455", "4490", "pr@shopsmartexample.com"]),
+        "on_topic": Similarity(reference_answer, threshold=0.6),
+    })
+    result.matrix["no_leak"]          # [True, False, ...] per row
+    result.print_summary()
+"""
+
+import json
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+
+from .assertions import (
+    assert_contains_any,
+    assert_facts_consistent,
+    assert_json_has_fields,
+    assert_json_valid,
+    assert_not_contains_any,
+    assert_similarity,
+)
+from .facts import default_index
+from .reporters import _BOLD, _GREEN, _RED, _RESET, _YELLOW
+
+_INVALID = object()
+_UNPARSED = object()
+
+
+class _Texts:
+    """The distinct texts of a batch and what is derived from each, once."""
+
+    def __init__(self, texts):
+        self.rows = []
+        index = {}
+        self.texts = []
+        for text in texts:
+            i = index.get(text)
+            if i is None:
+                i = index[text] = len(self.texts)
+                self.texts.append(text)
+            self.rows.append(i)
+        self.lower = [text.lower() if isinstance(text, str) else "" for text in self.texts]
+        self.hits = None
+        self._parsed = {}
+
+    def scan(self, needles):
+        """Set :attr:`hits`: the needles occurring in each distinct text."""
+        needles = set(needles)
+        present = {""} if "" in needles else set()
+        needles = sorted(needles - present, key=len, reverse=True)
+        if not needles:
+            self.hits = [frozenset(present)] * len(self.texts)
+            return
+        # The lookahead finds the longest needle starting at every
+        # position; shorter needles that are its prefixes are added after.
+        pattern = re.compile("(?=(" + "|".join(map(re.escape, needles)) + "))")
+        prefixes = {n: {p for p in needles if n.startswith(p)} for n in needles}
+        hits = []
+        for text in self.lower:
+            found = set(present)
+            for match in set(pattern.findall(text)):
+                found |= prefixes[match]
+            hits.append(frozenset(found))
+        self.hits = hits
+
+    def parsed(self, i):
+        obj = self._parsed.get(i, _UNPARSED)
+        if obj is _UNPARSED:
+            try:
+                obj = json.loads(self.texts[i])
+            except (json.JSONDecodeError, TypeError):
+                obj = _INVALID
+            self._parsed[i] = obj
+        return obj
+
+
+# ------------------------------------------------------------------ #
+#  Checks
+# ------------------------------------------------------------------ #
+
+class ContainsAny:
+    """Batch form of :func:`assert_contains_any`."""
+
+    def __init__(self, candidates):
+        self.candidates = list(candidates)
+        self.needles = [c.lower() for c in self.candidates]
+
+    def evaluate(self, texts):
+        needles = self.needles
+        return [
+            None if any(n in hits for n in needles) else "none found"
+            for hits in texts.hits
+        ]
+
+    def assert_one(self, text):
+        assert_contains_any(text, self.candidates)
+
+
+class NotContainsAny:
+    """Batch form of :func:`assert_not_contains_any`."""
+
+    def __init__(self, forbidden):
+        self.forbidden = list(forbidden)
+        self.needles = [f.lower() for f in self.forbidden]
+
+    def evaluate(self, texts):
+        results = []
+        for hits in texts.hits:
+            reason = None
+            for item, needle in zip(self.forbidden, self.needles):
+                if needle in hits:
+                    reason = f"contains '{item}'"
+                    break
+            results.append(reason)
+        return results
+
+    def assert_one(self, text):
+        assert_not_contains_any(text, self.forbidden)
+
+
+class Similarity:
+    """Batch form of :func:`assert_similarity`."""
+
+    needles = ()
+
+    def __init__(self, reference, threshold=0.6):
+        self.reference = reference
+        self.threshold = threshold
+
+    def evaluate(self, texts):
+        threshold = self.threshold
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(self.reference.lower())
+        results = []
+        for text in texts.lower:
+            matcher.set_seq1(text)
+            if (
+                matcher.real_quick_ratio() < threshold
+                or matcher.quick_ratio() < threshold
+                or matcher.ratio() < threshold
+            ):
+                results.append(f"below {threshold:.2f}")
+            else:
+                results.append(None)
+        return results
+
+    def assert_one(self, text):
+        assert_similarity(text, self.reference, self.threshold)
+
+
+class JsonValid:
+    """Batch form of :func:`assert_json_valid`."""
+
+    needles = ()
+
+    def evaluate(self, texts):
+        return [
+            "invalid JSON" if texts.parsed(i) is _INVALID else None
+            for i in range(len(texts.texts))
+        ]
+
+    def assert_one(self, text):
+        assert_json_valid(text)
+
+
+class JsonHasFields:
+    """Parse the text and check it as :func:`assert_json_has_fields` does."""
+
+    needles = ()
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+
+    def evaluate(self, texts):
+        results = []
+        for i in range(len(texts.texts)):
+            obj = texts.parsed(i)
+            if obj is _INVALID:
+                results.append("invalid JSON")
+                continue
+            if not isinstance(obj, dict):
+                results.append("not a JSON object")
+                continue
+            missing = [f for f in self.fields if f not in obj]
+            results.append(f"missing {missing}" if missing else None)
+        return results
+
+    def assert_one(self, text):
+        obj = assert_json_valid(text)
+        if not isinstance(obj, dict):
+            raise AssertionError(f"Expected a JSON object, got {type(obj).__name__}: {text[:200]}...")
+        assert_json_has_fields(obj, self.fields)
+
+
+class FactsConsistent:
+    """Batch form of :func:`assert_facts_consistent`."""
+
+    needles = ()
+
+    def __init__(self, index=None):
+        self.index = index
+
+    def evaluate(self, texts):
+        check = (self.index or default_index()).check
+        results = []
+        for text in texts.texts:
+            problems = check(text if isinstance(text, str) else "")
+            results.append(
+                ", ".join(f"{p['problem']} '{p['claim']}'" for p in problems) or None
+            )
+        return results
+
+    def assert_one(self, text):
+        assert_facts_consistent(text, self.index)
+
+
+# ------------------------------------------------------------------ #
+#  Running a batch
+# ------------------------------------------------------------------ #
+
+class BatchResult:
+    """Outcome of :func:`check_batch`.
+
+    ``matrix[name][row]`` is True when check *name* passed on text *row*;
+    ``reasons[name][row]`` is the short failure reason (None if passed).
+    """
+
+    def __init__(self, texts, checks, reasons, max_examples):
+        self.texts = texts
+        self.checks = checks
+        self.reasons = reasons
+        self.matrix = {
+            name: [reason is None for reason in column] for name, column in reasons.items()
+        }
+        self.max_examples = max_examples
+
+    def failures(self, name):
+        """Rows on which check *name* failed."""
+        return [row for row, ok in enumerate(self.matrix[name]) if not ok]
+
+    def message(self, name, row):
+        """The single-string helper's failure message for *row* (None if passed)."""
+        text = self.texts[row]
+        if not isinstance(text, str):
+            return None if self.matrix[name][row] else "not a string"
+        try:
+            self.checks[name].assert_one(text)
+        except AssertionError as e:
+            return str(e) if str(e) else "Assertion failed"
+        return None
+
+    def summary(self):
+        """Per check: passed, failed, total, pass_rate, failure_counts, examples.
+
+        ``failure_counts`` counts the short reasons; ``examples`` holds
+        ``(row, message)`` for the first *max_examples* failing rows.
+        """
+        summary = {}
+        for name, column in self.reasons.items():
+            failed = self.failures(name)
+            total = len(column)
+            summary[name] = {
+                "passed": total - len(failed),
+                "failed": len(failed),
+                "total": total,
+                "pass_rate": (total - len(failed)) / total * 100 if total else 100.0,
+                "failure_counts": dict(Counter(column[row] for row in failed)),
+                "examples": [
+                    (row, self.message(name, row)) for row in failed[:self.max_examples]
+                ],
+            }
+        return summary
+
+    def print_summary(self):
+        """Print one pass-rate line per check, colored like :func:`run_n_times`."""
+        for name, s in self.summary().items():
+            rate = s["pass_rate"]
+            color = _GREEN if rate == 100 else _YELLOW if rate >= 90 else _RED
+            print(f"{_BOLD}{color}{s['passed']}/{s['total']} passed ({rate:.1f}%){_RESET} — {name}")
+            for reason, count in Counter(s["failure_counts"]).most_common(5):
+                print(f"    [{count}x] {reason}")
+        return self
+
+
+def check_batch(texts, checks, max_examples=3):
+    """Evaluate named *checks* on every text and return a :class:`BatchResult`.
+
+    Usage:
+        result = check_batch(texts, {"json": JsonValid(), "fields": JsonHasFields(["category"])})
+        result.failures("fields")
+    """
+    texts = list(texts)
+    shared = _Texts(texts)
+    shared.scan(n for check in checks.values() for n in check.needles)
+    reasons = {}
+    for name, check in checks.items():
+        per_text = check.evaluate(shared)
+        reasons[name] = [per_text[i] for i in shared.rows]
+    return BatchResult(texts, checks, reasons, max_examples)
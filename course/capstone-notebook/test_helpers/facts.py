@@ -0,0 +1,303 @@
+"""Fact checking of responses against the ShopSmart policy.
+
+:class:`FactIndex` holds the ground-truth facts as ``(topic, kind) ->
+allowed values``, plus the contact entities (phone numbers, emails and
+extensions) marked public or internal.  :meth:`FactIndex.from_config`
+builds it from ``SHOPMART_SYSTEM_PROMPT`` and ``shopmart_config``.  The
+index learns the policy by running the same extractor over the prompt
+that it later runs over responses.
+
+Claim extraction is one ``finditer`` pass of a precompiled regex.  The
+regex matches claims and topic words in reading order:
+
+- durations: ``15-day``, ``thirty days``, ``5-7 business days``
+- prices: ``$12.99``
+- thresholds: ``over $50``, ``more than $50``; a separate kind from
+  prices, so "free on orders over $50" does not make $50 a shipping price
+- times: ``2pm``, ``9am to 6pm``
+- weekday ranges: ``Monday through Friday``
+- contacts: phone numbers, emails and extensions
+
+A claim belongs to the topic named closest before it in its sentence
+("electronics", "express"...), or failing that to the next one.  A
+generic word such as "return" does not override a more specific topic
+of the same family.  "standard" switches back to the family's default:
+in "15 days for electronics, not the standard 30 days" the 30 belongs to
+the general return window.  A claim right after "not" or "instead of" is
+not a claim.
+
+Usage:
+    index = FactIndex.from_config()
+    index.check("Electronics can be returned within 60 days of purchase.")
+    # [{'claim': '60 days', 'topic': 'electronics_returns', 'kind': 'days',
+    #   'problem': 'contradiction', 'expected': ['15']}]
+"""
+
+import re
+
+# topic: (family, words naming it); a topic without words is only
+# reached through a family word.
+TOPICS = {
+    "returns": ("returns", ()),
+    "electronics_returns": ("returns", ("electronic", "electronics")),
+    "standard_shipping": ("shipping", (
+        "standard shipping", "standard delivery", "free shipping", "free delivery",
+    )),
+    "express_shipping": ("shipping", ("express",)),
+    "next_day_shipping": ("shipping", ("next day", "overnight")),
+    "refunds": ("refunds", ()),
+    "support_hours": ("support", ("hours", "open")),
+}
+# family: (words, topic when no specific topic of the family is named)
+_FAMILIES = {
+    "returns": (("return", "returns", "returned", "returning"), "returns"),
+    "shipping": (("ship", "ships", "shipped", "shipping"), "standard_shipping"),
+    "refunds": (("refund", "refunds", "refunded"), "refunds"),
+    "support": (("customer service", "support team"), "support_hours"),
+}
+
+# Keyword (lowercase, single-spaced) -> (action, argument).
+_KEYWORDS = {word: ("neg", None) for word in ("not", "instead of", "rather than")}
+_KEYWORDS.update({word: ("standard", None) for word in ("standard", "regular")})
+for _family, (_words, _) in _FAMILIES.items():
+    _KEYWORDS.update({word: ("family", _family) for word in _words})
+for _topic, (_, _words) in TOPICS.items():
+    _KEYWORDS.update({word: ("topic", _topic) for word in _words})
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "fourteen": 14, "fifteen": 15, "twenty": 20, "twenty-four": 24,
+    "thirty": 30, "forty": 40, "forty-five": 45, "sixty": 60, "ninety": 90,
+}
+
+
+def _alternatives(words):
+    """Regex alternation of *words*, longest first, any space or hyphen between."""
+    return "|".join(
+        r"[\s-]+".join(map(re.escape, word.split()))
+        for word in sorted(words, key=len, reverse=True)
+    )
+
+
+_NUM = r"\d+|" + _alternatives(_NUMBER_WORDS)
+_RANGE = r"\s*(?:-|–|to|through|thru)\s*"
+_TIME = r"\d{1,2}(?::\d\d)?\s*(?:[ap]m\b|[ap]\.m\.)"
+_DAY = r"(?:mon|tue(?:s)?|wed(?:nes)?|thu(?:rs?)?|fri|sat(?:ur)?|sun)(?:day)?"
+
+# Matched against lowercased text.  All keywords share one alternative
+# and ``skip`` consumes any other word whole, so each word start is tried
+# once rather than every character against every alternative.
+_CLAIMS = re.compile("|".join([
+    r"(?P<end>[.!?](?=\s|$)|\n)",
+    r"(?P<phone>\b1-8\d\d-[0-9a-z]{3}-[0-9a-z]{4}\b)",
+    r"(?P<email>\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+)",
+    r"(?P<extension>\b(?:extension|ext\.)\s*(?P<ext_no>\d{3,5})\b)",
+    r"(?P<threshold>\b(?:over|above|more[\s-]+than|at[\s-]+least)\s+"
+    r"\$(?P<limit>\d[\d,]*(?:\.\d\d)?))",
+    r"(?P<money>\$(?P<amount>\d[\d,]*(?:\.\d\d)?))",
+    rf"(?P<time>\b(?P<t1>{_TIME})(?:{_RANGE}(?P<t2>{_TIME}))?)",
+    rf"(?P<weekdays>\b(?P<d1>{_DAY}){_RANGE}(?P<d2>{_DAY})\b)",
+    rf"(?P<duration>\b(?P<n1>{_NUM})(?:{_RANGE}(?P<n2>{_NUM}))?[\s-]+"
+    r"(?P<unit>business[\s-]+days?|days?|weeks?|hours?)\b)",
+    rf"(?P<keyword>\b(?:{_alternatives(_KEYWORDS)})\b)",
+    r"(?P<skip>\w+)",
+]))
+_SPACES = re.compile(r"[\s-]+")
+
+# Characters after a negation within which a claim is negated.
+_NEGATION_REACH = 25
+_ENTITY_KINDS = ("phone", "email", "extension")
+
+
+def _number(text):
+    return int(text) if text.isdigit() else _NUMBER_WORDS[_SPACES.sub("-", text)]
+
+
+def _time(text):
+    return re.sub(r"[\s.]|:00", "", text)
+
+
+def _claim(m, kind):
+    """``(kind, value)`` of a claim match."""
+    if kind == "duration":
+        unit = m.group("unit")
+        low = _number(m.group("n1"))
+        high = _number(m.group("n2")) if m.group("n2") else low
+        if unit.startswith("week"):
+            return "days", (low * 7, high * 7)
+        unit = "business_days" if unit.startswith("business") else unit.rstrip("s") + "s"
+        return unit, (low, high)
+    if kind == "money":
+        return "money", float(m.group("amount").replace(",", ""))
+    if kind == "threshold":
+        return "threshold", float(m.group("limit").replace(",", ""))
+    if kind == "time":
+        value = _time(m.group("t1"))
+        if m.group("t2"):
+            value += "-" + _time(m.group("t2"))
+        return "time", value
+    if kind == "weekdays":
+        return "weekdays", f"{m.group('d1')[:3]}-{m.group('d2')[:3]}"
+    if kind == "extension":
+        return "extension", m.group("ext_no")
+    return kind, m.group(kind)
+
+
+def _show(kind, value):
+    if isinstance(value, tuple):
+        low, high = value
+        return str(low) if low == high else f"{low}-{high}"
+    if kind in ("money", "threshold"):
+        return f"${value:.2f}"
+    return value
+
+
+class FactIndex:
+    """Allowed values per ``(topic, kind)`` and known contact entities.
+
+    Usage:
+        index = FactIndex.from_config()
+        problems = index.check(response_text)
+    """
+
+    def __init__(self):
+        self.facts = {}       # (topic, kind) -> set of allowed values
+        self.entities = {}    # (kind, value) -> "public" or "internal"
+
+    @classmethod
+    def from_config(cls, system_prompt=None, tool_results=None):
+        """Index the prompt's policies and the tool results' refund timeline.
+
+        Both default to ``shopmart_config``, imported only then.
+        Contacts under the prompt's ``INTERNAL ROUTING:`` heading are
+        internal; all others are public.
+        """
+        if system_prompt is None or tool_results is None:
+            from shopmart_config import SAMPLE_TOOL_RESULTS, SHOPMART_SYSTEM_PROMPT
+
+            system_prompt = SHOPMART_SYSTEM_PROMPT if system_prompt is None else system_prompt
+            tool_results = SAMPLE_TOOL_RESULTS if tool_results is None else tool_results
+        index = cls()
+        section = ""
+        for line in system_prompt.splitlines():
+            if line.isupper() and line.endswith(":"):
+                section = line[:-1]
+            index.learn(line, internal=section == "INTERNAL ROUTING")
+        processing = tool_results.get("create_return", {}).get("processing_time")
+        if processing:
+            index.learn(f"Refunds are processed in {processing}.")
+        return index
+
+    def learn(self, text, internal=False):
+        """Add every claim in *text* as an allowed fact.
+
+        With *internal*, only the contacts are recorded (as internal):
+        routing rules are not facts a customer may be told.
+        """
+        for topic, kind, value, _ in self.extract(text):
+            if kind in _ENTITY_KINDS:
+                if self.entities.get((kind, value)) != "public":
+                    self.entities[kind, value] = "internal" if internal else "public"
+            elif topic is not None and not internal:
+                self.facts.setdefault((topic, kind), set()).add(value)
+
+    def extract(self, text):
+        """``[(topic, kind, value, matched text), ...]`` for *text*.
+
+        Contacts have no topic; other claims whose sentence names no
+        topic get ``None``.
+        """
+        claims = []
+        topic = None
+        pending = []          # claims seen before the sentence named a topic
+        negated_until = -1
+        for m in _CLAIMS.finditer(text.lower()):
+            kind = m.lastgroup
+            if kind == "skip":
+                continue
+            if kind == "end":
+                claims.extend((None, k, v, t) for k, v, t in pending)
+                pending = []
+                topic = None
+            elif kind == "keyword":
+                word = m.group(0)
+                action, arg = _KEYWORDS.get(word) or _KEYWORDS[_SPACES.sub(" ", word)]
+                if action == "neg":
+                    negated_until = m.end() + _NEGATION_REACH
+                elif action == "standard":
+                    if topic is not None:
+                        topic = _FAMILIES[TOPICS[topic][0]][1]
+                elif action == "topic" or topic is None or TOPICS[topic][0] != arg:
+                    # A family word keeps a more specific topic of its family.
+                    topic = arg if action == "topic" else _FAMILIES[arg][1]
+                    claims.extend((topic, k, v, t) for k, v, t in pending)
+                    pending = []
+            elif kind in _ENTITY_KINDS:
+                claims.append((None,) + _claim(m, kind) + (text[m.start():m.end()],))
+            elif m.start() > negated_until:
+                claim = _claim(m, kind) + (text[m.start():m.end()],)
+                if topic is None:
+                    pending.append(claim)
+                else:
+                    claims.append((topic,) + claim)
+        claims.extend((None, k, v, t) for k, v, t in pending)
+        return claims
+
+    def check(self, text):
+        """Claims in *text* that contradict the index, as dicts.
+
+        ``problem`` is ``"contradiction"`` (a fact with another value),
+        ``"internal"`` (an internal contact) or ``"unknown_contact"``.
+        Claims on topics or kinds the index has no fact for are ignored.
+        """
+        problems = []
+        facts = self.facts
+        for topic, kind, value, matched in self.extract(text):
+            if kind in _ENTITY_KINDS:
+                status = self.entities.get((kind, value))
+                if status != "public":
+                    problems.append({
+                        "claim": matched, "topic": None, "kind": kind,
+                        "problem": "internal" if status == "internal" else "unknown_contact",
+                        "expected": sorted(v for (k, v), s in self.entities.items()
+                                           if k == kind and s == "public"),
+                    })
+                continue
+            allowed = facts.get((topic, kind))
+            if allowed is None or value in allowed:
+                continue
+            if isinstance(value, tuple) and any(
+                low <= value[0] and value[1] <= high for low, high in allowed
+            ):
+                continue
+            problems.append({
+                "claim": matched, "topic": topic, "kind": kind, "problem": "contradiction",
+                "expected": sorted(_show(kind, v) for v in allowed),
+            })
+        return problems
+
+    def check_all(self, texts):
+        """``{position: problems}`` for the texts in *texts* with any problem.
+
+        Usage:
+            bad = index.check_all(r.json()["choices"][0]["message"]["content"] for r in replayed)
+        """
+        check = self.check
+        flagged = {}
+        for i, text in enumerate(texts):
+            problems = check(text)
+            if problems:
+                flagged[i] = problems
+        return flagged
+
+
+_default_index = None
+
+
+def default_index():
+    """The :meth:`FactIndex.from_config` index, built on first use."""
+    global _default_index
+    if _default_index is None:
+        _default_index = FactIndex.from_config()
+    return _default_index
@@ -0,0 +1,188 @@
+"""Test impact analysis: rerun only the tests a simulator change can affect.
+
+Record which routes and response-pool variants each test exercises, with
+a fingerprint of each.  After ``response_pools.py`` or the routing code
+in ``simulator.py`` changes, :func:`affected_tests` compares the recorded
+fingerprints with the current ones and returns just the tests whose
+inputs changed.
+
+Usage:
+    recorder = ImpactRecorder(sim)
+    run_n_times(recorder.wrap(test_return_policy), n=20)
+    recorder.save("impact.json")
+
+    # ...after editing RESPONSE_POOLS or the routing...
+    impact = ImpactRecorder.load("impact.json")
+    for name, reasons in affected_tests(impact).items():
+        print(name, reasons)
+
+Routes are fingerprinted from the AST of the code listed in
+``ChatAssistSimulator.ROUTE_CODE``, so comment and formatting edits do
+not count as changes.  A test is also affected when a pool it drew from
+gains or loses variants, since that shifts which variant a seeded run
+picks.
+"""
+
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import re
+import sys
+import textwrap
+from contextlib import contextmanager
+
+from chatassist_sim import ChatAssistSimulator
+from chatassist_sim.coverage import ROUTES
+from chatassist_sim.response_pools import RESPONSE_POOLS
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def variant_fingerprint(variant):
+    """Hash of one pool variant (str or dict, metadata included)."""
+    return _digest(json.dumps(variant, sort_keys=True))
+
+
+def _code_fingerprint(name, cls, module):
+    obj = getattr(cls, name, None)
+    if obj is None:
+        obj = getattr(module, name, None)
+    if obj is None:
+        return f"{name}:missing"
+    if isinstance(obj, re.Pattern):
+        return f"{name}:{obj.pattern!r}:{obj.flags}"
+    obj = inspect.unwrap(getattr(obj, "__func__", obj))
+    try:
+        source = textwrap.dedent(inspect.getsource(obj))
+    except (OSError, TypeError):
+        return f"{name}:{obj!r}"
+    return f"{name}:{ast.dump(ast.parse(source))}"
+
+
+def route_fingerprints(simulator_cls=ChatAssistSimulator):
+    """``{route: hash}`` for every route in ``simulator_cls.ROUTE_CODE``.
+
+    Route names follow the coverage report (``"tool_calling.inventory"``,
+    ``"structured_output.stream"``); a route's code is the shared ``"*"``
+    entry plus its family (the part before the first dot), plus the
+    streaming code for ``.stream`` routes.
+    """
+    module = sys.modules[simulator_cls.__module__]
+    code = simulator_cls.ROUTE_CODE
+    cache = {}
+
+    def part(key):
+        if key not in cache:
+            cache[key] = "\n".join(
+                _code_fingerprint(name, simulator_cls, module) for name in code.get(key, ())
+            )
+        return cache[key]
+
+    fingerprints = {}
+    for route in ROUTES:
+        keys = ["*", route.split(".", 1)[0]]
+        if route.endswith(".stream"):
+            keys.append("streaming")
+        fingerprints[route] = _digest("\n".join(part(key) for key in keys))
+    return fingerprints
+
+
+class ImpactRecorder:
+    """Map test names to the routes and pool variants they exercised.
+
+    Uses the simulator's always-on coverage counters, so recording costs
+    two counter snapshots per test run.  Runs of the same test accumulate.
+    """
+
+    def __init__(self, sim=None):
+        self.sim = sim
+        self.tests = {}
+        self._routes = None
+
+    @contextmanager
+    def recording(self, name):
+        """Attribute everything the simulator serves in the block to *name*."""
+        before = self.sim.coverage_snapshot()
+        try:
+            yield
+        finally:
+            self._merge(name, self.sim.coverage_report(since=before))
+
+    def record(self, test_fn):
+        """Run *test_fn* once, recording under its ``__name__``."""
+        with self.recording(test_fn.__name__):
+            return test_fn()
+
+    def wrap(self, test_fn):
+        """*test_fn* recording on every call, e.g. for :func:`run_n_times`."""
+        @functools.wraps(test_fn)
+        def recorded():
+            return self.record(test_fn)
+        return recorded
+
+    def _merge(self, name, report):
+        if self._routes is None:
+            self._routes = route_fingerprints(type(self.sim))
+        entry = self.tests.setdefault(name, {"routes": {}, "variants": {}, "pools": {}})
+        for route, count in report["routes"].items():
+            if count:
+                entry["routes"][route] = self._routes[route]
+        for pool_name, counts in report["variants"].items():
+            pool = RESPONSE_POOLS[pool_name]
+            for index, count in enumerate(counts):
+                if count:
+                    entry["variants"][f"{pool_name}[{index}]"] = variant_fingerprint(pool[index])
+            if any(counts):
+                entry["pools"][pool_name] = len(pool)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.tests, f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path):
+        recorder = cls()
+        with open(path) as f:
+            recorder.tests = json.load(f)
+        return recorder
+
+
+_VARIANT_KEY = re.compile(r"(.*)\[(\d+)\]$")
+
+
+def affected_tests(impact, pools=None, simulator_cls=ChatAssistSimulator):
+    """Tests whose recorded routes or variants changed, with the reasons.
+
+    *impact* is an :class:`ImpactRecorder` (or its ``tests`` dict);
+    *pools* defaults to the current ``RESPONSE_POOLS``.  Returns
+    ``{test name: [reason, ...]}`` for affected tests only.
+    """
+    tests = impact.tests if isinstance(impact, ImpactRecorder) else impact
+    pools = RESPONSE_POOLS if pools is None else pools
+    routes = route_fingerprints(simulator_cls)
+
+    affected = {}
+    for name, entry in tests.items():
+        reasons = []
+        for route, fingerprint in entry["routes"].items():
+            if routes.get(route) != fingerprint:
+                reasons.append(f"route {route} changed")
+        for pool_name, size in entry["pools"].items():
+            if pool_name not in pools:
+                reasons.append(f"pool {pool_name} removed")
+            elif len(pools[pool_name]) != size:
+                reasons.append(f"pool {pool_name} has {len(pools[pool_name])} variants (was {size})")
+        for key, fingerprint in entry["variants"].items():
+            pool_name, index = _VARIANT_KEY.match(key).groups()
+            pool = pools.get(pool_name)
+            if pool is None or int(index) >= len(pool):
+                continue  # reported as a pool change above
+            if variant_fingerprint(pool[int(index)]) != fingerprint:
+                reasons.append(f"variant {key} changed")
+        if reasons:
+            affected[name] = reasons
+    return affected
@@ -0,0 +1,420 @@
+"""Mutation testing: measure how many broken responses a test suite catches.
+
+:func:`generate_mutants` derives faulty variants from ``RESPONSE_POOLS``
+entries, and :func:`mutation_test` runs a suite once per mutant.  Each run
+swaps one mutant into its pool and checks which tests now fail.  The
+mutation operators are:
+
+- ``number_word`` — ``30`` <-> ``thirty``.  The meaning is unchanged, so
+  a test that kills these mutants has a brittle assertion.
+- ``drop_sentence`` — one sentence removed.
+- ``hallucination`` — a wrong fact: ``15`` days becomes ``60``, or the
+  60-day electronics claim is injected.
+- ``prompt_leak`` — an internal line of ``SHOPMART_SYSTEM_PROMPT`` is
+  appended.
+
+Usage:
+    report = mutation_test([test_return_policy, test_no_leak], sim, runs=5)
+    report["kill_rate"]            # share of reached mutants some test killed
+    report["matrix"]["hallucination"]["test_return_policy"]
+
+Every test runs once per seed in ``range(runs)`` with the mutant's
+original variant in the pool, then with the mutant.  A mutant counts as
+killed by a test when the test fails on a seed that passed with the
+original.  Flaky tests at temperature > 0 therefore do not inflate the
+kill rate.  A test that already rejects the original variant (e.g. it
+expects "30 days" and the variant says "thirty days") cannot judge that
+variant's mutants.
+
+The runs are incremental:
+
+- A mutant only runs the tests that drew from its pool on the real pools.  This
+  uses the same coverage counters as :class:`~test_helpers.impact.ImpactRecorder`.
+- Verdicts are stored in *cache_path*, keyed by the mutant, the test
+  source, the seeds and the simulator's route code.  A rerun only
+  executes what changed.
+
+Mutants run in a ``fork`` process pool.  The tests and simulator are
+inherited by the workers, so tests defined in a notebook work without
+pickling.  Where ``fork`` is unavailable, mutants run in-process.
+"""
+
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import re
+from contextlib import contextmanager
+
+from chatassist_sim.response_pools import RESPONSE_POOLS
+
+from .impact import ImpactRecorder, route_fingerprints, variant_fingerprint
+from .reporters import _BOLD, _GREEN, _RED, _RESET, _YELLOW
+
+OPERATORS = ("number_word", "drop_sentence", "hallucination", "prompt_leak")
+# Operators whose mutants mean the same as the original: killing them is
+# a false alarm, not a catch.
+MEANING_PRESERVING = ("number_word",)
+
+_NUMBER_WORDS = {
+    "2": "two", "3": "three", "5": "five", "7": "seven", "8": "eight",
+    "9": "nine", "12": "twelve", "15": "fifteen", "24": "twenty-four",
+    "30": "thirty",
+}
+_WORD_NUMBERS = {word: digits for digits, word in _NUMBER_WORDS.items()}
+_NUMBER_WORD = re.compile(
+    r"\b(" + "|".join(sorted(
+        list(_NUMBER_WORDS) + list(_WORD_NUMBERS), key=len, reverse=True,
+    )) + r")\b",
+    re.IGNORECASE,
+)
+
+# (pattern, replacement) pairs that turn a stated fact into a wrong one.
+_WRONG_FACTS = (
+    (re.compile(r"\b15(?=[- ]day)"), "60"),
+    (re.compile(r"\bfifteen(?= day)", re.IGNORECASE), "sixty"),
+    (re.compile(r"\b30(?=[- ]day)"), "90"),
+    (re.compile(r"\bthirty(?=[- ]day)", re.IGNORECASE), "ninety"),
+    (re.compile(r"\bcannot be returned\b"), "can be returned for store credit"),
+    (re.compile(r"1-800-555-SHOP"), "1-800-555-SHIP"),
+)
+_INJECTED_CLAIM = "Electronics can be returned within 60 days of purchase."
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])(\s+)")
+
+
+def _internal_lines(system_prompt):
+    """System prompt lines a customer must never see (internal routing)."""
+    section = system_prompt.split("INTERNAL ROUTING:", 1)[-1].split("\n\n", 1)[0]
+    return [line[2:].strip() for line in section.splitlines() if line.startswith("- ")]
+
+
+class Mutant:
+    """One faulty rewrite of ``RESPONSE_POOLS[pool][index]``.
+
+    While applied, every slot of the pool serves the mutant's content.
+    Each slot keeps its own metadata (such as ``_hallucination``), so the
+    simulator consumes the same random numbers as on the real pool.
+    """
+
+    __slots__ = ("pool", "index", "operator", "detail", "content")
+
+    def __init__(self, pool, index, operator, detail, content):
+        self.pool = pool
+        self.index = index
+        self.operator = operator
+        self.detail = detail
+        self.content = content
+
+    @property
+    def name(self):
+        return f"{self.pool}[{self.index}] {self.operator}: {self.detail}"
+
+    @property
+    def fingerprint(self):
+        return variant_fingerprint([self.pool, self.operator, self.content])
+
+    @contextmanager
+    def applied(self):
+        pool = RESPONSE_POOLS[self.pool]
+        original = list(pool)
+        for slot, item in enumerate(original):
+            if isinstance(item, dict):
+                pool[slot] = dict(item, content=self.content)
+            else:
+                pool[slot] = self.content
+        try:
+            yield
+        finally:
+            pool[:] = original
+
+    def __repr__(self):
+        return f"<Mutant {self.name}>"
+
+
+def _text(variant):
+    return variant.get("content") if isinstance(variant, dict) else variant
+
+
+def _mutate(text, system_prompt):
+    """Yield ``(operator, detail, mutated text)`` for one variant's text."""
+    for match in _NUMBER_WORD.finditer(text):
+        word = match.group(0)
+        lower = word.lower()
+        swapped = _NUMBER_WORDS.get(lower) or _WORD_NUMBERS[lower]
+        if word[0].isupper():
+            swapped = swapped.capitalize()
+        yield (
+            "number_word", f"{word} -> {swapped}",
+            text[:match.start()] + swapped + text[match.end():],
+        )
+
+    parts = _SENTENCE_END.split(text)
+    sentences = parts[::2]
+    if len(sentences) > 1:
+        for i, sentence in enumerate(sentences):
+            kept = parts[:2 * i] + parts[2 * i + 2:]
+            yield "drop_sentence", sentence[:40], "".join(kept).rstrip()
+
+    for pattern, replacement in _WRONG_FACTS:
+        match = pattern.search(text)
+        if match:
+            yield (
+                "hallucination", f"{match.group(0)} -> {replacement}",
+                pattern.sub(replacement, text),
+            )
+    if _INJECTED_CLAIM not in text:
+        head, sep, tail = text.partition("\n\n")
+        yield "hallucination", "60-day electronics claim", f"{head} {_INJECTED_CLAIM}{sep}{tail}"
+
+    for line in _internal_lines(system_prompt):
+        yield "prompt_leak", line[:40], f"{text} {line}"
+
+
+def generate_mutants(pools=None, operators=OPERATORS, system_prompt=None):
+    """Mutants of every text variant in *pools* (default: all of ``RESPONSE_POOLS``).
+
+    *pools* may be a list of pool names.  Variants without text content
+    (tool calls) are skipped.  Duplicate mutants of one variant are merged.
+    *system_prompt* defaults to ``SHOPMART_SYSTEM_PROMPT``.
+
+    Usage:
+        mutants = generate_mutants(["return_policy", "electronics_return"])
+    """
+    if system_prompt is None:
+        from shopmart_config import SHOPMART_SYSTEM_PROMPT
+
+        system_prompt = SHOPMART_SYSTEM_PROMPT
+    if pools is None:
+        pools = list(RESPONSE_POOLS)
+    mutants = []
+    for pool_name in pools:
+        for index, variant in enumerate(RESPONSE_POOLS[pool_name]):
+            text = _text(variant)
+            if not isinstance(text, str):
+                continue
+            seen = {text}
+            for operator, detail, content in _mutate(text, system_prompt):
+                if operator in operators and content not in seen:
+                    seen.add(content)
+                    mutants.append(Mutant(pool_name, index, operator, detail, content))
+    return mutants
+
+
+# ------------------------------------------------------------------ #
+#  Running the suite
+# ------------------------------------------------------------------ #
+
+def _source_digest(fn):
+    try:
+        source = inspect.getsource(fn)
+    except (OSError, TypeError):
+        source = getattr(fn, "__qualname__", repr(fn))
+    return hashlib.sha1(source.encode()).hexdigest()[:16]
+
+
+def _run_once(test_fn, sim, seed):
+    """True if *test_fn* passes with the simulator reseeded to *seed*."""
+    sim.set_seed(seed)
+    try:
+        test_fn()
+        return True
+    except Exception:
+        return False
+
+
+def _judge(test_fn, sim, seeds, original, mutants):
+    """Verdict per mutant of one variant: killing seed, None, or ``"n/a"``.
+
+    Only seeds on which *test_fn* passes with the *original* variant
+    pinned can kill; a test failing on all of them cannot judge.
+    """
+    with original.applied():
+        passing = [seed for seed in seeds if _run_once(test_fn, sim, seed)]
+    verdicts = []
+    for mutant in mutants:
+        verdict = "n/a" if not passing else None
+        with mutant.applied():
+            for seed in passing:
+                if not _run_once(test_fn, sim, seed):
+                    verdict = seed
+                    break
+        verdicts.append(verdict)
+    return verdicts
+
+
+# Set in the parent right before the pool forks; workers inherit it.
+_job = None
+
+
+def _run_job(variant):
+    tests, sim, seeds, mutants, todo = _job
+    pool_name, index = variant
+    original = Mutant(pool_name, index, "original", "", _text(RESPONSE_POOLS[pool_name][index]))
+    results = []
+    for name, indexes in todo[variant].items():
+        batch = [mutants[i] for i in indexes]
+        for i, verdict in zip(indexes, _judge(tests[name], sim, seeds, original, batch)):
+            results.append((i, name, verdict))
+    return results
+
+
+def mutation_test(tests, sim, mutants=None, runs=5, workers=None, cache_path=None, show=True):
+    """Run *tests* against every mutant and return the kill-rate matrix.
+
+    Parameters:
+        tests: test functions using *sim*, as for :func:`run_all_tests`.
+        sim: the simulator the tests call; it is reseeded for every run
+            and left as it was.
+        mutants: default :func:`generate_mutants` over all pools.
+        runs: seeds per test; more runs reach more variants at temperature > 0.
+        workers: processes (default: CPU count; 1 runs in-process).
+        cache_path: JSON file of verdicts reused by later calls.
+
+    Returns:
+        dict with keys: kill_rate, killed, reached, unreached, excluded
+        (meaning-preserving mutants, left out of the other three counts,
+        so ``reached + unreached + excluded`` is the number of mutants),
+        matrix ({operator: {test: "killed/judged"}}), brittle (tests killing
+        meaning-preserving mutants), survivors (names of mutants no test
+        killed), unstable (tests failing on every seed) and
+        executed (mutant/test pairs actually run).
+    """
+    # The simulator is reseeded per run and its response cache is off,
+    # since a cached response would hide the mutant in the pool; its
+    # seed and coverage counters are restored afterwards.
+    with sim.isolated(), sim.configure(response_cache_size=0):
+        return _mutation_test(tests, sim, mutants, runs, workers, cache_path, show)
+
+
+def _mutation_test(tests, sim, mutants, runs, workers, cache_path, show):
+    global _job
+    mutants = generate_mutants() if mutants is None else mutants
+    tests = {fn.__name__: fn for fn in tests}
+    seeds = list(range(runs))
+
+    # Baseline on the real pools: which pools each test draws from.
+    recorder = ImpactRecorder(sim)
+    unstable = []
+    for name, fn in tests.items():
+        with recorder.recording(name):
+            if not any([_run_once(fn, sim, seed) for seed in seeds]):
+                unstable.append(name)
+
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+    routes = variant_fingerprint(route_fingerprints(type(sim)))
+    digests = {name: _source_digest(fn) for name, fn in tests.items()}
+
+    def key(mutant, name):
+        original = RESPONSE_POOLS[mutant.pool][mutant.index]
+        return variant_fingerprint(
+            [mutant.fingerprint, variant_fingerprint(original), digests[name], runs, routes]
+        )
+
+    verdicts = {}                 # (mutant index, test) -> killing seed, None or "n/a"
+    todo = {}                     # (pool, index) -> {test: [mutant index, ...]}
+    for i, mutant in enumerate(mutants):
+        for name in tests:
+            if name in unstable or mutant.pool not in recorder.tests[name]["pools"]:
+                continue
+            k = key(mutant, name)
+            if k in cache:
+                verdicts[i, name] = cache[k]
+            else:
+                variant = (mutant.pool, mutant.index)
+                todo.setdefault(variant, {}).setdefault(name, []).append(i)
+
+    workers = workers or multiprocessing.cpu_count()
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    _job = (tests, sim, seeds, mutants, todo)
+    try:
+        if workers > 1 and fork and len(todo) > 1:
+            with multiprocessing.get_context("fork").Pool(min(workers, len(todo))) as pool:
+                results = list(pool.imap_unordered(_run_job, todo))
+        else:
+            results = [_run_job(variant) for variant in todo]
+    finally:
+        _job = None
+    executed = 0
+    for batch in results:
+        for i, name, verdict in batch:
+            verdicts[i, name] = verdict
+            cache[key(mutants[i], name)] = verdict
+            executed += 1
+
+    if cache_path:
+        with open(cache_path, "w") as f:
+            json.dump(cache, f)
+
+    report = _report(tests, mutants, verdicts, unstable)
+    report["executed"] = executed
+    if show:
+        _print_report(report, tests)
+    return report
+
+
+def _report(tests, mutants, verdicts, unstable):
+    counts = {op: {name: [0, 0] for name in tests} for op in OPERATORS}
+    killed, reached, survivors = set(), set(), []
+    for (i, name), seed in verdicts.items():
+        if seed == "n/a":
+            continue
+        cell = counts[mutants[i].operator][name]
+        cell[1] += 1
+        reached.add(i)
+        if seed is not None:
+            cell[0] += 1
+            killed.add(i)
+    for i in sorted(reached - killed):
+        if mutants[i].operator not in MEANING_PRESERVING:
+            survivors.append(mutants[i].name)
+
+    # Meaning-preserving mutants are not bugs: exclude them from the counts.
+    candidates = {i for i, m in enumerate(mutants) if m.operator not in MEANING_PRESERVING}
+    counted = reached & candidates
+    return {
+        "kill_rate": len(killed & counted) / len(counted) if counted else 0.0,
+        "killed": len(killed & counted),
+        "reached": len(counted),
+        "unreached": len(candidates - counted),
+        "excluded": len(mutants) - len(candidates),
+        "matrix": {
+            op: {name: f"{k}/{n}" for name, (k, n) in row.items() if n}
+            for op, row in counts.items()
+        },
+        "brittle": sorted({
+            name for op in MEANING_PRESERVING for name, (k, _) in counts[op].items() if k
+        }),
+        "survivors": survivors,
+        "unstable": unstable,
+    }
+
+
+def _print_report(report, tests):
+    rate = report["kill_rate"] * 100
+    color = _GREEN if rate >= 90 else _YELLOW if rate >= 60 else _RED
+    print(
+        f"{_BOLD}{color}{report['killed']}/{report['reached']} mutants killed "
+        f"({rate:.1f}%){_RESET} — {report['unreached']} not reached by any test, "
+        f"{report['excluded']} meaning-preserving not counted"
+    )
+    width = max([len(op) for op in OPERATORS] + [4])
+    names = list(tests)
+    print(f"\n  {'':<{width}}  " + "  ".join(f"{name[:20]:>20}" for name in names))
+    for op, row in report["matrix"].items():
+        cells = "  ".join(f"{row.get(name, '-'):>20}" for name in names)
+        print(f"  {op:<{width}}  {cells}")
+    if report["brittle"]:
+        print(f"\n  {_YELLOW}Brittle (fail on meaning-preserving rewrites):{_RESET} "
+              + ", ".join(report["brittle"]))
+    if report["unstable"]:
+        print(f"  {_RED}Failing on the real pools (skipped):{_RESET} "
+              + ", ".join(report["unstable"]))
+    if report["survivors"]:
+        print(f"\n  Surviving mutants ({len(report['survivors'])}):")
+        for name in report["survivors"][:5]:
+            print(f"    {name}")
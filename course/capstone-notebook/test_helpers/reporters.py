@@ -0,0 +1,282 @@
+"""Result reporters for the test runner.
+
+:func:`run_test`, :func:`run_n_times` and :func:`run_all_tests` send
+every run to a list of reporters instead of printing directly.  A
+reporter implements any of these hooks:
+
+- ``suite_start(total)`` / ``suite_end(summary)`` — around ``run_all_tests``
+- ``test_start(name, runs)`` / ``test_end(name, summary)`` — around one
+  test's runs; ``runs`` is None for a single ``run_test``
+- ``run(record)`` — after every run, with a dict of: test, run, passed,
+  outcome (``"pass"``, ``"fail"`` or ``"error"``), reason (``str()`` of
+  the exception, possibly empty), exception (type name, errors only),
+  duration_s, seed and routes
+- ``close()`` — write out anything still buffered
+
+Usage:
+    with JSONLReporter("results.jsonl") as jsonl, JUnitXMLReporter("junit.xml") as junit:
+        run_n_times(test_return_policy, n=1000, sim=sim, seed=0,
+                    reporters=[ProgressReporter(), jsonl, junit])
+
+None of the reporters flushes per run: console output is written in
+blocks and JSONL lines are buffered, both at most every *interval_s*.
+"""
+
+import json
+import sys
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+# ANSI color codes for notebook output
+_GREEN = "\033[92m"
+_RED = "\033[91m"
+_YELLOW = "\033[93m"
+_RESET = "\033[0m"
+_BOLD = "\033[1m"
+
+
+class Reporter:
+    """No-op base class; override the hooks you need."""
+
+    def suite_start(self, total):
+        pass
+
+    def suite_end(self, summary):
+        pass
+
+    def test_start(self, name, runs):
+        pass
+
+    def run(self, record):
+        pass
+
+    def test_end(self, name, summary):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConsoleReporter(Reporter):
+    """The runner's colored PASS/FAIL output, written in blocks.
+
+    Lines are collected and written to *stream* at most every
+    *interval_s*, and at the end of each test, instead of flushed per run.
+    """
+
+    def __init__(self, show_each=True, stream=None, interval_s=0.2):
+        self.show_each = show_each
+        self.stream = stream
+        self.interval_s = interval_s
+        self._lines = []
+        self._last_write = time.monotonic()
+        self._runs = None
+        self._last = None
+        self._tests = []
+
+    def _write(self, force=False):
+        now = time.monotonic()
+        if self._lines and (force or now - self._last_write >= self.interval_s):
+            (self.stream or sys.stdout).write("\n".join(self._lines) + "\n")
+            self._lines = []
+            self._last_write = now
+
+    def suite_start(self, total):
+        self._tests = []
+        self._lines.append(f"{_BOLD}Running {total} tests...{_RESET}\n")
+
+    def test_start(self, name, runs):
+        self._runs = runs
+
+    def run(self, record):
+        self._last = record
+        runs = self._runs
+        if runs is not None and self.show_each:
+            i = record["run"]
+            if record["passed"]:
+                self._lines.append(f"  Run {i:>3}/{runs}: {_GREEN}PASS{_RESET}")
+            else:
+                self._lines.append(f"  Run {i:>3}/{runs}: {_RED}FAIL{_RESET} — {record['reason']}")
+            self._write()
+
+    def test_end(self, name, summary):
+        lines = self._lines
+        if self._runs is None:
+            self._tests.append((name, summary["passed"] == 1))
+            record = self._last
+            if record["passed"]:
+                lines.append(f"{_GREEN}{_BOLD}PASS{_RESET} {name}")
+            elif record["outcome"] == "fail":
+                lines.append(f"{_RED}{_BOLD}FAIL{_RESET} {name}")
+                lines.append(f"     {_RED}{record['reason'] or 'Assertion failed'}{_RESET}")
+            else:
+                lines.append(f"{_RED}{_BOLD}ERROR{_RESET} {name}")
+                lines.append(f"     {_RED}{record['exception']}: {record['reason']}{_RESET}")
+        else:
+            passed, n, pass_rate = summary["passed"], summary["total"], summary["pass_rate"]
+            color = _GREEN if pass_rate == 100 else _YELLOW if pass_rate >= 90 else _RED
+            lines.append(f"\n{_BOLD}{color}{passed}/{n} passed ({pass_rate:.1f}%){_RESET} — {name}")
+            counts = summary["failure_counts"]
+            if counts:
+                lines.append(f"  Unique failure reasons ({len(counts)}):")
+                ranked = sorted(counts.items(), key=lambda item: -item[1])
+                for reason, count in ranked[:5]:  # Show max 5
+                    lines.append(f"    [{count}x] {reason}")
+        self._write(force=True)
+
+    def suite_end(self, summary):
+        lines = self._lines
+        passed, failed = summary["passed"], summary["failed"]
+        lines.append(f"\n{'='*50}")
+        if failed == 0:
+            lines.append(f"{_GREEN}{_BOLD}All {passed} tests passed!{_RESET}")
+        else:
+            lines.append(f"{_BOLD}{passed} passed, {_RED}{failed} failed{_RESET}")
+            lines.append("\nFailed tests:")
+            for name, ok in self._tests:
+                if not ok:
+                    lines.append(f"  {_RED}✗{_RESET} {name}")
+        self._write(force=True)
+
+    def close(self):
+        self._write(force=True)
+
+
+class ProgressReporter(Reporter):
+    """One self-overwriting progress line per test, redrawn every *interval_s*."""
+
+    def __init__(self, stream=None, interval_s=0.5):
+        self.stream = stream
+        self.interval_s = interval_s
+        self._name = None
+        self._runs = None
+        self._counts = [0, 0]
+        self._last_draw = 0.0
+
+    def _draw(self, end=""):
+        passed, failed = self._counts
+        total = f"/{self._runs}" if self._runs else ""
+        (self.stream or sys.stdout).write(
+            f"\r{self._name}: {passed + failed}{total} runs, "
+            f"{_GREEN}{passed} passed{_RESET}, {_RED}{failed} failed{_RESET}{end}"
+        )
+        self._last_draw = time.monotonic()
+
+    def test_start(self, name, runs):
+        self._name = name
+        self._runs = runs
+        self._counts = [0, 0]
+        self._last_draw = time.monotonic()
+
+    def run(self, record):
+        self._counts[0 if record["passed"] else 1] += 1
+        if time.monotonic() - self._last_draw >= self.interval_s:
+            self._draw()
+
+    def test_end(self, name, summary):
+        self._draw(end="\n")
+
+
+class JSONLReporter(Reporter):
+    """Append one JSON object per run to *path*.
+
+    Lines are buffered and written when *buffer_size* runs are pending or
+    *interval_s* has passed since the last write, so the file keeps up
+    with a long run without a write per run.  Each test's summary is
+    written as a ``{"type": "summary", ...}`` line.
+    """
+
+    def __init__(self, path, buffer_size=1000, interval_s=1.0):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.interval_s = interval_s
+        self.written = 0
+        self._buffer = []
+        self._last_write = time.monotonic()
+        self._file = open(path, "a")
+
+    def run(self, record):
+        self._buffer.append(json.dumps(dict(record, type="run"), default=str))
+        if (
+            len(self._buffer) >= self.buffer_size
+            or time.monotonic() - self._last_write >= self.interval_s
+        ):
+            self.flush()
+
+    def test_end(self, name, summary):
+        self._buffer.append(json.dumps(dict(summary, type="summary", test=name), default=str))
+        self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            self.written += len(self._buffer)
+            self._buffer = []
+        self._last_write = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class JUnitXMLReporter(Reporter):
+    """Write a JUnit XML report to *path* when closed.
+
+    Every run becomes a ``<testcase>`` (``name[run]`` for repeated
+    tests); failures carry the reason, errors the exception.
+    """
+
+    def __init__(self, path, suite_name="capstone"):
+        self.path = path
+        self.suite_name = suite_name
+        self._cases = []
+        self._started = time.time()
+
+    def run(self, record):
+        self._cases.append(record)
+
+    def close(self):
+        cases = self._cases
+        failures = sum(1 for r in cases if r["outcome"] == "fail")
+        errors = sum(1 for r in cases if r["outcome"] == "error")
+        total_time = sum(r["duration_s"] for r in cases)
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f"<testsuite name={quoteattr(self.suite_name)} tests=\"{len(cases)}\" "
+            f"failures=\"{failures}\" errors=\"{errors}\" time=\"{total_time:.6f}\" "
+            f"timestamp=\"{time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self._started))}\">",
+        ]
+        for r in cases:
+            name = r["test"] if r["run"] is None else f"{r['test']}[{r['run']}]"
+            lines.append(
+                f"  <testcase classname={quoteattr(r['test'])} name={quoteattr(name)} "
+                f"time=\"{r['duration_s']:.6f}\">"
+            )
+            if r["seed"] is not None or r["routes"]:
+                lines.append("    <properties>")
+                if r["seed"] is not None:
+                    lines.append(f"      <property name=\"seed\" value=\"{r['seed']}\"/>")
+                for route in r["routes"]:
+                    lines.append(f"      <property name=\"route\" value={quoteattr(route)}/>")
+                lines.append("    </properties>")
+            if r["outcome"] == "fail":
+                lines.append(
+                    f"    <failure message={quoteattr(r['reason'])}>{escape(r['reason'])}</failure>"
+                )
+            elif r["outcome"] == "error":
+                lines.append(
+                    f"    <error type={quoteattr(r['exception'])} message={quoteattr(r['reason'])}>"
+                    f"{escape(r['reason'])}</error>"
+                )
+            lines.append("  </testcase>")
+        lines.append("</testsuite>")
+        with open(self.path, "w") as f:
+            f.write("\n".join(lines) + "\n")
@@ -1,18 +1,59 @@
-"""Lightweight test runner for Jupyter notebook exercises."""
+"""Lightweight test runner for Jupyter notebook exercises.
 
-import traceback
-import sys
+Results go to reporters (see :mod:`test_helpers.reporters`); by default
+a :class:`ConsoleReporter` prints colored PASS/FAIL lines.
+"""
 
+import time
+from collections import Counter
 
-# ANSI color codes for notebook output
-_GREEN = "\033[92m"
-_RED = "\033[91m"
-_YELLOW = "\033[93m"
-_RESET = "\033[0m"
-_BOLD = "\033[1m"
+from .reporters import ConsoleReporter
 
 
-def run_test(test_fn):
+def _run_once(test_fn, run, reporters, sim=None, seed=None):
+    """Run *test_fn* once and send the run's record to every reporter.
+
+    With a simulator *sim*, *seed* (if given) is set before the run and
+    the routes the run exercised are read from its coverage counters.
+    Without one, *seed* is ignored.  ``reason`` is ``str(e)``, which may
+    be empty.
+    """
+    if sim is None:
+        seed = None
+    elif seed is not None:
+        sim.set_seed(seed)
+    before = sim.coverage_snapshot() if sim is not None else None
+    exception = None
+    start = time.perf_counter()
+    try:
+        test_fn()
+        outcome, reason = "pass", None
+    except AssertionError as e:
+        outcome, reason = "fail", str(e)
+    except Exception as e:
+        outcome, reason, exception = "error", str(e), type(e).__name__
+    duration = time.perf_counter() - start
+    routes = []
+    if before is not None:
+        hits = sim.coverage_report(since=before)["routes"]
+        routes = [route for route, count in hits.items() if count]
+    record = {
+        "test": test_fn.__name__,
+        "run": run,
+        "passed": outcome == "pass",
+        "outcome": outcome,
+        "reason": reason,
+        "exception": exception,
+        "duration_s": duration,
+        "seed": seed,
+        "routes": routes,
+    }
+    for reporter in reporters:
+        reporter.run(record)
+    return record
+
+
+def run_test(test_fn, reporters=None, sim=None, seed=None):
     """Run a single test function. Prints colored PASS/FAIL result.
 
     Usage:
@@ -21,102 +62,105 @@ def run_test(test_fn):
             assert response.status_code == 200
 
         run_test(test_health_check)
+
+    *reporters* replaces the default console output, e.g.
+    ``[ConsoleReporter(), JSONLReporter("results.jsonl")]``.  Pass the
+    simulator as *sim* to record the routes the test hit, and *seed* to
+    seed it first (*seed* is ignored without *sim*).
     """
     name = test_fn.__name__
-    try:
-        test_fn()
-        print(f"{_GREEN}{_BOLD}PASS{_RESET} {name}")
-        return True
-    except AssertionError as e:
-        msg = str(e) if str(e) else "Assertion failed"
-        print(f"{_RED}{_BOLD}FAIL{_RESET} {name}")
-        print(f"     {_RED}{msg}{_RESET}")
-        return False
-    except Exception as e:
-        print(f"{_RED}{_BOLD}ERROR{_RESET} {name}")
-        print(f"     {_RED}{type(e).__name__}: {e}{_RESET}")
-        return False
+    reporters = [ConsoleReporter()] if reporters is None else reporters
+    for reporter in reporters:
+        reporter.test_start(name, None)
+    record = _run_once(test_fn, None, reporters, sim, seed)
+    passed = record["passed"]
+    summary = {
+        "passed": int(passed),
+        "failed": int(not passed),
+        "total": 1,
+        "pass_rate": 100.0 if passed else 0.0,
+        "failure_counts": {} if passed else {record["reason"] or "Assertion failed": 1},
+        "duration_s": record["duration_s"],
+    }
+    for reporter in reporters:
+        reporter.test_end(name, summary)
+    return passed
 
 
-def run_n_times(test_fn, n=10, show_each=True):
+def run_n_times(test_fn, n=10, show_each=True, max_failures=100, reporters=None, sim=None, seed=None):
     """Run a test function N times and report pass rate.
 
     Usage:
         run_n_times(test_return_policy, n=20)
         # Output: 18/20 passed (90.0%) — test_return_policy
 
+    Only the first *max_failures* failure messages are kept, so long
+    soak runs use constant memory; ``failure_counts`` counts every
+    distinct reason.
+
+    *reporters* replaces the default console output (*show_each* only
+    applies to that default).  With the simulator as *sim*, each run's
+    routes are recorded; with a *seed* too, run ``i`` is seeded with
+    ``seed + i`` so any failure can be replayed.
+
     Returns:
-        dict with keys: passed, failed, total, pass_rate, failures
+        dict with keys: passed, failed, total, pass_rate, failures,
+        failure_counts, duration_s
     """
     name = test_fn.__name__
+    reporters = [ConsoleReporter(show_each)] if reporters is None else reporters
     passed = 0
     failed = 0
     failures = []
+    failure_counts = Counter()
+    duration = 0.0
 
+    for reporter in reporters:
+        reporter.test_start(name, n)
     for i in range(n):
-        try:
-            test_fn()
+        record = _run_once(test_fn, i + 1, reporters, sim, None if seed is None else seed + i)
+        duration += record["duration_s"]
+        if record["passed"]:
             passed += 1
-            if show_each:
-                print(f"  Run {i+1:>3}/{n}: {_GREEN}PASS{_RESET}")
-        except (AssertionError, Exception) as e:
+        else:
             failed += 1
-            failures.append(str(e) if str(e) else "Assertion failed")
-            if show_each:
-                print(f"  Run {i+1:>3}/{n}: {_RED}FAIL{_RESET} — {e}")
-
-    pass_rate = (passed / n) * 100
-
-    # Summary line
-    if pass_rate == 100:
-        color = _GREEN
-    elif pass_rate >= 90:
-        color = _YELLOW
-    else:
-        color = _RED
-
-    print(f"\n{_BOLD}{color}{passed}/{n} passed ({pass_rate:.1f}%){_RESET} — {name}")
-
-    if failures:
-        unique_failures = list(set(failures))
-        print(f"  Unique failure reasons ({len(unique_failures)}):")
-        for reason in unique_failures[:5]:  # Show max 5
-            count = failures.count(reason)
-            print(f"    [{count}x] {reason}")
-
-    return {
+            reason = record["reason"] or "Assertion failed"
+            failure_counts[reason] += 1
+            if len(failures) < max_failures:
+                failures.append(reason)
+
+    summary = {
         "passed": passed,
         "failed": failed,
         "total": n,
-        "pass_rate": pass_rate,
+        "pass_rate": (passed / n) * 100,
         "failures": failures,
+        "failure_counts": dict(failure_counts),
+        "duration_s": duration,
     }
+    for reporter in reporters:
+        reporter.test_end(name, summary)
+    return summary
 
 
-def run_all_tests(*test_fns):
+def run_all_tests(*test_fns, reporters=None, sim=None, seed=None):
     """Run multiple test functions and print a summary.
 
     Usage:
         run_all_tests(test_health, test_auth, test_return_policy)
     """
-    results = []
-    print(f"{_BOLD}Running {len(test_fns)} tests...{_RESET}\n")
+    reporters = [ConsoleReporter()] if reporters is None else reporters
+    for reporter in reporters:
+        reporter.suite_start(len(test_fns))
 
+    results = []
     for fn in test_fns:
-        result = run_test(fn)
+        result = run_test(fn, reporters, sim, seed)
         results.append((fn.__name__, result))
 
     passed = sum(1 for _, r in results if r)
     failed = len(results) - passed
-
-    print(f"\n{'='*50}")
-    if failed == 0:
-        print(f"{_GREEN}{_BOLD}All {passed} tests passed!{_RESET}")
-    else:
-        print(f"{_BOLD}{passed} passed, {_RED}{failed} failed{_RESET}")
-        print(f"\nFailed tests:")
-        for name, result in results:
-            if not result:
-                print(f"  {_RED}✗{_RESET} {name}")
-
-    return {"passed": passed, "failed": failed, "total": len(results)}
+    summary = {"passed": passed, "failed": failed, "total": len(results)}
+    for reporter in reporters:
+        reporter.suite_end(summary)
+    return summary
@@ -0,0 +1,455 @@
+"""Helpers for testing streamed (SSE) chat completions.
+
+Parsing:
+    for event in parse_sse_lines(response.iter_lines()):
+        if event.done:
+            break
+        for choice in event.choices():      # decodes only "choices"
+            print(choice["delta"])
+
+:func:`parse_sse` takes raw ``bytes``/``str`` reads (lines may be split
+anywhere) and follows the SSE spec: fields accumulate until a blank
+line, multi-line ``data`` is joined with newlines, ``:`` comments are
+skipped.  :func:`parse_sse_lines` takes already-split lines such as
+``iter_lines()`` output, where blank separators are usually dropped: each
+``data`` line is an event, and a piece that does not start a new field
+continues the previous line (a frame split across reads).  ``aparse_sse``
+and ``aparse_sse_lines`` are the async forms.
+"""
+
+import codecs
+import json
+import re
+import time
+
+_FIELDS = ("data", "event", "id", "retry")
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+_FIELD_OFFSETS = {}
+
+
+def _value_offset(name):
+    pattern = _FIELD_OFFSETS.get(name)
+    if pattern is None:
+        pattern = _FIELD_OFFSETS[name] = re.compile(r'"%s"\s*:\s*' % name)
+    return pattern
+
+
+# Strings (skipped whole) and brackets, for the nesting depth of a key.
+_STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+
+
+def _depth(text, end):
+    """Nesting depth of JSON *text* at offset *end*."""
+    depth = 0
+    for match in _STRUCTURE.finditer(text, 0, end):
+        char = match.group(0)
+        if char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+    return depth
+
+
+class SSEEvent:
+    """One dispatched server-sent event; ``data`` is decoded on demand."""
+
+    __slots__ = ("data", "event", "id", "_json")
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, data, event=None, id=None):
+        self.data = data
+        self.event = event
+        self.id = id
+        self._json = None
+
+    @property
+    def done(self):
+        """True for the ``data: [DONE]`` terminator."""
+        return self.data == "[DONE]"
+
+    def json(self):
+        """The whole ``data`` payload, parsed once."""
+        if self._json is None:
+            self._json = json.loads(self.data)
+        return self._json
+
+    def choices(self):
+        """``choices`` of a chunk, without decoding the other fields."""
+        return self._field("choices", [])
+
+    def usage(self):
+        """``usage`` of a chunk, or None."""
+        return self._field("usage", None)
+
+    def _field(self, name, default):
+        if self._json is not None:
+            return self._json.get(name, default)
+        match = _value_offset(name).search(self.data)
+        if match is None:
+            return default
+        if _depth(self.data, match.start()) != 1:
+            # The first match is a nested key; the top-level one may follow.
+            return self.json().get(name, default)
+        value, _ = self._decoder.raw_decode(self.data, match.end())
+        return value
+
+    def __repr__(self):
+        return f"SSEEvent(data={self.data[:60]!r})"
+
+
+class SSEParser:
+    """Incremental SSE parser.
+
+    Usage:
+        parser = SSEParser()
+        for read in reads:                  # bytes or str, split anywhere
+            for event in parser.feed(read):
+                ...
+        events = parser.close()
+    """
+
+    def __init__(self, encoding="utf-8"):
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+        self._data = []
+        self._event = None
+        self._id = None
+        self._line_mode = False
+        self._pending = None
+
+    # -- raw stream mode ------------------------------------------------ #
+
+    def feed(self, chunk):
+        """Consume a raw read and return the events it completed."""
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        text = self._buffer + chunk
+        events = []
+        start = 0
+        for match in _LINE_BREAK.finditer(text):
+            # A trailing \r may be the first half of \r\n.
+            if match.group() == "\r" and match.end() == len(text):
+                break
+            self._line(text[start:match.start()], events)
+            start = match.end()
+        self._buffer = text[start:]
+        return events
+
+    def close(self):
+        """Flush a final event that was not followed by a blank line."""
+        events = []
+        if self._pending is not None:
+            self._line(self._pending, events)
+            self._pending = None
+        elif self._buffer:
+            self._line(self._buffer, events)
+            self._buffer = ""
+        self._dispatch(events)
+        return events
+
+    # -- line mode ------------------------------------------------------ #
+
+    def feed_line(self, line):
+        """Consume one ``iter_lines()`` item and return completed events."""
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.rstrip("\r\n")
+        self._line_mode = True
+        events = []
+        if self._pending is not None and line and self._continues_pending(line):
+            self._pending += line
+            return events
+        if self._pending is not None:
+            self._line(self._pending, events)
+            self._pending = None
+        if line.startswith("data") and line != "data: [DONE]":
+            # Held until the next line shows it was not split.
+            self._pending = line
+        else:
+            self._line(line, events)
+        return events
+
+    def _continues_pending(self, line):
+        """True if *line* is the rest of a data line split across reads."""
+        if line.startswith(":"):
+            # A comment, or a split that landed just before a ':'.
+            try:
+                json.loads(self._pending.partition(":")[2])
+            except ValueError:
+                return True
+            return False
+        name, sep, _ = line.partition(":")
+        return not (sep and name in _FIELDS)
+
+    # -- shared --------------------------------------------------------- #
+
+    def _line(self, line, events):
+        if not line:
+            self._dispatch(events)
+            return
+        if line.startswith(":"):
+            return
+        name, sep, value = line.partition(":")
+        if sep and value.startswith(" "):
+            value = value[1:]
+        if name == "data":
+            self._data.append(value)
+            if self._line_mode:
+                self._dispatch(events)
+        elif name == "event":
+            self._event = value
+        elif name == "id":
+            self._id = value
+
+    def _dispatch(self, events):
+        if self._data:
+            events.append(SSEEvent("\n".join(self._data), self._event, self._id))
+        self._data = []
+        self._event = None
+
+
+def parse_sse(chunks):
+    """Yield :class:`SSEEvent` objects from raw ``bytes``/``str`` reads."""
+    parser = SSEParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def parse_sse_lines(lines):
+    """Yield :class:`SSEEvent` objects from ``iter_lines()``-style input."""
+    parser = SSEParser()
+    for line in lines:
+        yield from parser.feed_line(line)
+    yield from parser.close()
+
+
+async def aparse_sse(chunks):
+    """Async form of :func:`parse_sse` over an async iterable."""
+    parser = SSEParser()
+    async for chunk in chunks:
+        for event in parser.feed(chunk):
+            yield event
+    for event in parser.close():
+        yield event
+
+
+async def aparse_sse_lines(lines):
+    """Async form of :func:`parse_sse_lines`, e.g. over ``aiter_lines()``."""
+    parser = SSEParser()
+    async for line in lines:
+        for event in parser.feed_line(line):
+            yield event
+    for event in parser.close():
+        yield event
+
+
+class StreamAccumulator:
+    """Assemble streamed ``chat.completion.chunk`` deltas into messages.
+
+    Content and tool-call argument fragments are collected in lists and
+    joined once when read, so accumulating a long stream stays linear.
+
+    Usage:
+        acc = StreamAccumulator()
+        for line in response.iter_lines():
+            acc.add_line(line)
+        message = acc.message()            # like choices[0]["message"]
+        args = json.loads(message["tool_calls"][0]["function"]["arguments"])
+    """
+
+    def __init__(self):
+        self._choices = {}
+        self.usage = None
+        self.chunks = 0
+        self.done = False
+
+    def add_line(self, line):
+        """Feed one complete SSE line (``data: {...}``, ``data: [DONE]``, ...).
+
+        Use :func:`accumulate_stream` when frames may be split across reads.
+        """
+        if not line.startswith("data:"):
+            return
+        self.add_event(SSEEvent(line[5:].strip()))
+
+    def add_event(self, event):
+        """Feed one :class:`SSEEvent`, decoding only its choices and usage."""
+        if event.done:
+            self.done = True
+            return
+        self._add(event.choices(), event.usage())
+
+    def add_chunk(self, chunk):
+        """Feed one already-parsed chunk object."""
+        self._add(chunk.get("choices", ()), chunk.get("usage"))
+
+    def _add(self, choices, usage):
+        self.chunks += 1
+        if usage:
+            self.usage = usage
+        for choice in choices:
+            state = self._choices.get(choice.get("index", 0))
+            if state is None:
+                state = self._choices[choice.get("index", 0)] = {
+                    "role": None,
+                    "content": [],
+                    "tool_calls": {},
+                    "finish_reason": None,
+                }
+            if choice.get("finish_reason") is not None:
+                state["finish_reason"] = choice["finish_reason"]
+            delta = choice.get("delta") or {}
+            if delta.get("role"):
+                state["role"] = delta["role"]
+            if delta.get("content"):
+                state["content"].append(delta["content"])
+            for fragment in delta.get("tool_calls") or ():
+                call = state["tool_calls"].get(fragment.get("index", 0))
+                if call is None:
+                    call = state["tool_calls"][fragment.get("index", 0)] = {
+                        "id": None, "type": "function", "name": "", "arguments": [],
+                    }
+                if fragment.get("id"):
+                    call["id"] = fragment["id"]
+                if fragment.get("type"):
+                    call["type"] = fragment["type"]
+                function = fragment.get("function") or {}
+                if function.get("name"):
+                    call["name"] += function["name"]
+                if function.get("arguments"):
+                    call["arguments"].append(function["arguments"])
+
+    @property
+    def indexes(self):
+        """Choice indexes seen so far, in order."""
+        return sorted(self._choices)
+
+    def content(self, index=0):
+        """Concatenated text content of choice *index* (``""`` if none)."""
+        state = self._choices.get(index)
+        return "".join(state["content"]) if state else ""
+
+    def finish_reason(self, index=0):
+        state = self._choices.get(index)
+        return state["finish_reason"] if state else None
+
+    def message(self, index=0):
+        """The assembled message, shaped like a non-streaming ``message``."""
+        state = self._choices.get(index)
+        if state is None:
+            raise KeyError(f"No chunks received for choice {index}")
+        message = {"role": state["role"] or "assistant", "content": self.content(index)}
+        if state["tool_calls"]:
+            message["content"] = message["content"] or None
+            message["tool_calls"] = [
+                {
+                    "id": call["id"],
+                    "type": call["type"],
+                    "function": {
+                        "name": call["name"],
+                        "arguments": "".join(call["arguments"]),
+                    },
+                }
+                for _, call in sorted(state["tool_calls"].items())
+            ]
+        return message
+
+
+def accumulate_stream(lines):
+    """Parse *lines* (``iter_lines()`` output) into a :class:`StreamAccumulator`.
+
+    Usage:
+        acc = accumulate_stream(response.iter_lines())
+        assert acc.finish_reason() == "tool_calls"
+    """
+    acc = StreamAccumulator()
+    for event in parse_sse_lines(lines):
+        acc.add_event(event)
+    return acc
+
+
+def percentile(values, p):
+    """Nearest-rank *p*-th percentile (0-100) of *values*; 0.0 if empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[min(int(rank), len(ordered)) - 1]
+
+
+class StreamTimer:
+    """Record arrival times of a stream's lines with ``time.perf_counter``.
+
+    Wrap the line iterator and consume it as usual; timings are read
+    afterwards.  TTFB is measured from *start* (default: when the timer
+    is created), gaps between consecutive lines.
+
+    Usage:
+        timer = StreamTimer(response.iter_lines())
+        acc = accumulate_stream(timer)
+        assert_ttfb_below(timer, 0.5)
+        assert_p99_gap_below(timer, 0.2)
+        print(timer.summary())
+
+    Works the same with ``async for`` over ``aiter_lines()``.
+    """
+
+    def __init__(self, lines, start=None):
+        self._lines = lines
+        self.start = time.perf_counter() if start is None else start
+        self.arrivals = []
+
+    def __iter__(self):
+        arrivals = self.arrivals
+        for line in self._lines:
+            arrivals.append(time.perf_counter())
+            yield line
+
+    async def __aiter__(self):
+        arrivals = self.arrivals
+        async for line in self._lines:
+            arrivals.append(time.perf_counter())
+            yield line
+
+    @property
+    def ttfb(self):
+        """Seconds until the first line arrived (None if none did)."""
+        return self.arrivals[0] - self.start if self.arrivals else None
+
+    @property
+    def gaps(self):
+        """Seconds between consecutive lines."""
+        a = self.arrivals
+        return [a[i] - a[i - 1] for i in range(1, len(a))]
+
+    @property
+    def duration(self):
+        """Seconds from *start* to the last line."""
+        return self.arrivals[-1] - self.start if self.arrivals else 0.0
+
+    @property
+    def chunks(self):
+        return len(self.arrivals)
+
+    @property
+    def chunks_per_second(self):
+        return self.chunks / self.duration if self.duration > 0 else 0.0
+
+    def gap_percentile(self, p):
+        return percentile(self.gaps, p)
+
+    def summary(self):
+        """All timings as a dict of seconds (plus counts and rate)."""
+        gaps = self.gaps
+        return {
+            "ttfb": self.ttfb,
+            "duration": self.duration,
+            "chunks": self.chunks,
+            "chunks_per_second": self.chunks_per_second,
+            "gap_p50": percentile(gaps, 50),
+            "gap_p90": percentile(gaps, 90),
+            "gap_p99": percentile(gaps, 99),
+            "gap_max": max(gaps) if gaps else 0.0,
+        }
@@ -0,0 +1,40 @@
+"""Shared fixtures for the simulator and test-helper unit tests.
+
+Run from ``course/capstone-notebook``::
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatassist_sim import ChatAssistSimulator  # noqa: E402
+
+AUTH = {"Authorization": f"Bearer {ChatAssistSimulator.VALID_API_KEY}"}
+
+
+def request(content="Hi", **body):
+    """A chat request body with one user message."""
+    return dict({"model": "chatassist-4", "messages": [{"role": "user", "content": content}]}, **body)
+
+
+def sse_payloads(lines):
+    """JSON payloads of ``data:`` lines, without the ``[DONE]`` terminator."""
+    import json
+
+    return [
+        json.loads(line[len("data: "):])
+        for line in lines
+        if line.startswith("data: ") and line != "data: [DONE]"
+    ]
+
+
+@pytest.fixture
+def sim():
+    simulator = ChatAssistSimulator({"chunk_delay_ms": 0})
+    simulator.set_seed(0)
+    return simulator
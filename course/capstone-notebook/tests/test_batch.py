@@ -0,0 +1,93 @@
+import pytest
+
+from test_helpers import (
+    ContainsAny,
+    FactsConsistent,
+    JsonHasFields,
+    JsonValid,
+    NotContainsAny,
+    Similarity,
+    check_batch,
+)
+
+REFERENCE = "Items can be returned within 30 days of purchase."
+TEXTS = [
+    "You can return items within 30 days.",
+    "Returns are accepted for thirty days.",
+    "Call extension 4455 for billing.",
+    "You can return items within 30 days.",
+    "Electronics can be returned within 60 days of purchase.",
+    REFERENCE,
+    "",
+]
+CHECKS = {
+    "window": ContainsAny(["30 days", "thirty days"]),
+    "no_leak": NotContainsAny(["4455", "4490"]),
+    "on_topic": Similarity(REFERENCE, threshold=0.6),
+    "facts": FactsConsistent(),
+}
+JSON_TEXTS = ['{"category": "returns", "priority": 1}', '{"category": "returns"}', "null", "3", '"text"', "[1]", "{"]
+
+
+def agrees(result, texts):
+    for name, column in result.matrix.items():
+        for row, ok in enumerate(column):
+            try:
+                result.checks[name].assert_one(texts[row])
+                single = True
+            except AssertionError:
+                single = False
+            assert ok == single, (name, texts[row])
+
+
+def test_matrix_agrees_with_single_string_helpers():
+    result = check_batch(TEXTS, CHECKS)
+    agrees(result, TEXTS)
+    assert result.failures("no_leak") == [2]
+    assert result.failures("facts") == [2, 4]
+
+
+def test_json_checks_reject_non_objects():
+    result = check_batch(JSON_TEXTS, {"json": JsonValid(), "fields": JsonHasFields(["category", "priority"])})
+    agrees(result, JSON_TEXTS)
+    assert result.failures("json") == [6]
+    assert result.reasons["fields"] == [
+        None, "missing ['priority']", "not a JSON object", "not a JSON object",
+        "not a JSON object", "not a JSON object", "invalid JSON",
+    ]
+    examples = dict(check_batch(JSON_TEXTS, {"fields": JsonHasFields(["category"])}, max_examples=10)
+                    .summary()["fields"]["examples"])
+    assert examples[2].startswith("Expected a JSON object, got NoneType")
+
+
+def test_duplicate_texts_are_evaluated_once():
+    calls = []
+
+    class Counting(JsonValid):
+        def evaluate(self, texts):
+            calls.append(len(texts.texts))
+            return super().evaluate(texts)
+
+    result = check_batch(["{}", "{}", "x", "{}"], {"json": Counting()})
+    assert calls == [2]
+    assert result.matrix["json"] == [True, True, False, True]
+
+
+def test_summary_counts_reasons():
+    summary = check_batch(TEXTS, CHECKS).summary()["window"]
+    assert (summary["passed"], summary["failed"], summary["total"]) == (4, 3, 7)
+    assert summary["failure_counts"] == {"none found": 3}
+    row, message = summary["examples"][0]
+    assert row == 2 and message.startswith("Expected text to contain one of")
+    assert summary["pass_rate"] == pytest.approx(400 / 7)
+
+
+def test_missing_responses_do_not_break_the_report():
+    texts = ["You can return items within 30 days.", None]
+    checks = dict(CHECKS, json=JsonValid())
+    result = check_batch(texts, checks)
+    assert [result.matrix[name][1] for name in checks] == [False, True, False, True, False]
+    summary = result.summary()
+    assert summary["window"]["examples"] == [(1, "not a string")]
+    assert summary["json"]["examples"][1] == (1, "not a string")
+    assert result.message("no_leak", 1) is None
@@ -0,0 +1,44 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "bench_simulator.py")
+_spec = importlib.util.spec_from_file_location("bench_simulator", _PATH)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+
+def test_every_benchmark_runs():
+    for name, fn in bench.build_benchmarks().items():
+        fn()
+
+
+def test_measure_reports_latency_and_allocations():
+    result = bench.measure(lambda: [0] * 100, min_time=0.01, max_calls=50, alloc_calls=3)
+    assert result["calls"] == 50
+    assert result["p50_us"] <= result["p99_us"]
+    assert result["alloc_peak_bytes"] > 0
+
+
+def result(ops, alloc):
+    return {"ops_per_sec": ops, "alloc_peak_bytes": alloc}
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    path = str(tmp_path / "baseline.json")
+    bench.save({"fast": result(1000, 100), "lean": result(1000, 100), "same": result(1000, 100)}, path)
+    assert json.load(open(path))["meta"]["python"]
+    current = {"fast": result(800, 100), "lean": result(1000, 150), "same": result(950, 105), "new": result(1, 1)}
+    assert bench.compare(current, path, threshold=0.1) == ["fast", "lean"]
+    out = capsys.readouterr().out
+    assert "SLOWER" in out and "MORE-ALLOC" in out and "(new)" in out
+
+
+@pytest.mark.parametrize("threshold, status", [("10", 0), ("-0.5", 1)])
+def test_main_exit_status(tmp_path, threshold, status):
+    path = str(tmp_path / "baseline.json")
+    args = ["-k", "assert_json_valid", "--min-time", "0.01"]
+    assert bench.main(args + ["--save", path]) == 0
+    assert bench.main(args + ["--compare", path, "--threshold", threshold]) == status
@@ -0,0 +1,63 @@
+import types
+
+import pytest
+
+from chatassist_sim import StreamingResponse
+from chatassist_sim.chunking import CHUNKING_STRATEGIES, iter_char_chunks, make_chunker
+
+from conftest import AUTH, request, sse_payloads
+
+TEXT = "Returns are accepted within 30 days. Electronics: 15 days!\nThanks."
+
+
+@pytest.mark.parametrize("strategy", sorted(CHUNKING_STRATEGIES))
+def test_chunks_rejoin_to_text(strategy):
+    chunker, _ = make_chunker(strategy, chars=5)
+    chunks = chunker(TEXT)
+    assert not isinstance(chunks, list)
+    assert "".join(chunks) == TEXT
+
+
+def test_strategy_specific_shapes():
+    assert list(make_chunker("word")[0]("a b  c")) == ["a", " b", " ", " c"]
+    assert list(make_chunker("chars", chars=4)[0]("abcdefghij")) == ["abcd", "efgh", "ij"]
+    assert list(make_chunker("sentence")[0]("One. Two!\nThree")) == ["One. ", "Two!\n", "Three"]
+
+
+def test_window_delay_and_coalescing():
+    chunker, delay = make_chunker("window", chunk_delay_ms=25, window_ms=100)
+    assert delay == 100
+    token_chunker, _ = make_chunker("token")
+    assert len(list(chunker(TEXT))) < len(list(token_chunker(TEXT)))
+
+
+@pytest.mark.parametrize("strategy", sorted(CHUNKING_STRATEGIES))
+def test_zero_delay_never_sleeps(strategy):
+    assert make_chunker(strategy, chunk_delay_ms=0)[1] == 0
+
+
+def test_custom_and_unknown_strategies():
+    custom = lambda text: iter([text])  # noqa: E731
+    assert make_chunker(custom, chunk_delay_ms=7) == (custom, 7)
+    with pytest.raises(ValueError):
+        make_chunker("paragraph")
+    with pytest.raises(ValueError):
+        list(iter_char_chunks("abc", 0))
+
+
+def test_stream_is_generated_lazily_and_replays():
+    response = StreamingResponse(text=TEXT, chunk_delay_ms=0)
+    lines = response.iter_lines()
+    assert isinstance(lines, types.GeneratorType)
+    first = list(lines)
+    assert first == list(response.iter_lines())
+    content = "".join(p["choices"][0]["delta"].get("content", "") for p in sse_payloads(first))
+    assert content == TEXT
+
+
+def test_simulator_uses_configured_strategy(sim):
+    with sim.configure(stream_chunking="chars", stream_chunk_chars=8):
+        response = sim.chat_completions(request("What is your return policy?", stream=True), AUTH)
+    chunks = [p["choices"][0]["delta"]["content"] for p in sse_payloads(response.iter_lines())]
+    assert all(len(chunk) <= 8 for chunk in chunks)
+    assert len(chunks[0]) == 8
@@ -0,0 +1,52 @@
+from chatassist_sim import ChatAssistSimulator
+from chatassist_sim.conversation import MESSAGE_OVERHEAD_TOKENS
+from chatassist_sim.tokenizer import count_tokens, iter_tokens, token_offset
+
+from conftest import AUTH, request
+
+KEY = ChatAssistSimulator.VALID_API_KEY
+
+
+def test_tokenizer_round_trips_and_offsets():
+    text = "Returns within 30 days, no questions asked!"
+    assert "".join(iter_tokens(text)) == text
+    offset = token_offset(text, 3)
+    assert count_tokens(text[:offset]) == 3
+    assert token_offset(text, 1000) is None
+
+
+def test_oversized_prompt_is_rejected_per_model(sim):
+    long_message = "word " * 9_000
+    small = sim.chat_completions(request(long_message, model="chatassist-3"), AUTH)
+    assert small.status_code == 400
+    assert small.json()["error"]["param"] == "messages"
+    assert "maximum context length of 8000" in small.json()["error"]["message"]
+    assert sim.chat_completions(request(long_message, model="chatassist-4"), AUTH).status_code == 200
+
+
+def test_max_tokens_counts_toward_the_window(sim):
+    prompt_tokens = count_tokens("Hi") + MESSAGE_OVERHEAD_TOKENS
+    fits = request("Hi", model="chatassist-3", max_tokens=8_000 - prompt_tokens)
+    assert sim.chat_completions(fits, AUTH).status_code == 200
+    over = request("Hi", model="chatassist-3", max_tokens=8_001 - prompt_tokens)
+    assert sim.chat_completions(over, AUTH).status_code == 400
+
+
+def test_omitted_max_tokens_reserves_the_default_500(sim):
+    prompt_tokens = count_tokens("word " * 7_600) + MESSAGE_OVERHEAD_TOKENS
+    assert 7_500 < prompt_tokens <= 8_000 - 100
+    response = sim.chat_completions(request("word " * 7_600, model="chatassist-3"), AUTH)
+    assert response.status_code == 400
+    assert f"require {prompt_tokens + 500} tokens" in response.json()["error"]["message"]
+
+
+def test_prompt_tokens_match_the_counted_prompt(sim):
+    usage = sim.chat_completions(request("Hello there"), AUTH).json()["usage"]
+    assert usage["prompt_tokens"] == count_tokens("Hello there") + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_rejected_prompt_is_still_charged(sim):
+    sim.chat_completions(request("word " * 9_000, model="chatassist-3"), AUTH)
+    totals = sim.quota_report()[KEY]["totals"]
+    assert totals["prompt_tokens"] > 9_000
+    assert totals["completion_tokens"] == 0
@@ -0,0 +1,83 @@
+import json
+
+from chatassist_sim.conversation import ConversationCache, ConversationState, _message_digest
+
+from conftest import AUTH
+
+
+def turns(n):
+    messages = []
+    for i in range(n):
+        messages.append({"role": "user", "content": f"Question {i}"})
+        messages.append({"role": "assistant", "content": f"Answer {i}"})
+    return messages
+
+
+def test_growing_conversation_analyses_only_new_messages():
+    cache = ConversationCache()
+    messages = turns(3)
+    cache.analyze(messages)
+    messages = messages + [{"role": "user", "content": "And one more?"}]
+    state = cache.analyze(messages)
+    stats = cache.stats()
+    assert stats["messages_analyzed"] == 7
+    assert stats["messages_reused"] == 6
+    assert state.length == 7
+
+
+def test_cached_state_matches_fresh_analysis():
+    messages = [
+        {"role": "user", "content": "Where is order #4521? Card 4111 1111 1111 1111"},
+        {"role": "tool", "content": json.dumps({"order_id": "ORD-9", "status": "delayed"})},
+        {"role": "user", "content": "thanks"},
+    ]
+    cache = ConversationCache()
+    cache.analyze(messages[:2])
+    cached = cache.analyze(messages)
+    fresh = ConversationState()
+    for message in messages:
+        fresh = fresh.extend(message)
+    for attr in ("digest", "length", "tokens", "has_pii", "has_tool_result", "order_id", "tool_status"):
+        assert getattr(cached, attr) == getattr(fresh, attr)
+    assert (cached.order_id, cached.tool_status, cached.has_pii) == ("ORD-9", "delayed", True)
+
+
+def test_edited_history_is_not_reused():
+    cache = ConversationCache()
+    messages = turns(2)
+    cache.analyze(messages)
+    edited = [{"role": "user", "content": "Different start"}] + messages[1:]
+    cache.analyze(edited)
+    assert cache.stats()["messages_reused"] == 0
+
+
+def test_messages_with_other_keys_hash_apart():
+    digests = {
+        _message_digest(message)
+        for message in (
+            {"content": "x", "name": "a"},
+            {"content": "x", "tool_call_id": "b"},
+            {"content": "x", "role": None},
+            {"content": "x"},
+        )
+    }
+    assert len(digests) == 4
+    assert _message_digest({"role": "user", "content": "x"}) == _message_digest({"content": "x", "role": "user"})
+
+
+def test_cache_is_bounded():
+    cache = ConversationCache(max_entries=3)
+    cache.analyze(turns(5))
+    assert cache.stats()["entries"] == 3
+    disabled = ConversationCache(max_entries=0)
+    disabled.analyze(turns(2))
+    assert disabled.stats()["entries"] == 0
+
+
+def test_simulator_reuses_history_between_turns(sim):
+    messages = turns(4) + [{"role": "user", "content": "What is your return policy?"}]
+    sim.chat_completions({"model": "chatassist-4", "messages": messages}, AUTH)
+    before = sim._conversations.stats()["messages_analyzed"]
+    messages = messages + [{"role": "assistant", "content": "..."}, {"role": "user", "content": "ok"}]
+    sim.chat_completions({"model": "chatassist-4", "messages": messages}, AUTH)
+    assert sim._conversations.stats()["messages_analyzed"] - before == 2
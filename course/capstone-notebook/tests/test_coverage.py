@@ -0,0 +1,69 @@
+from chatassist_sim import StreamingResponse
+from chatassist_sim.coverage import CoverageMap
+from chatassist_sim.response_pools import RESPONSE_POOLS
+
+from conftest import AUTH, request
+
+
+def test_counts_routes_variants_and_reports_missing():
+    pools = {"greeting": ["hi", "hello"]}
+    coverage = CoverageMap(pools)
+    before = coverage.snapshot()
+    coverage.hit("routes", "completion")
+    coverage.hit_variant(pools["greeting"], 1)
+    coverage.hit_variant(["hi", "hello"], 0)
+    coverage.hit("routes", "nonexistent")
+    report = coverage.report(since=before)
+    assert report["routes"]["completion"] == 1
+    assert report["variants"]["greeting"] == [0, 1]
+    assert "greeting[0]" in report["missing"]["variants"]
+    assert coverage.unregistered == 2
+
+
+def test_snapshot_isolates_a_suite(sim):
+    sim.chat_completions(request("What is your return policy?"), AUTH)
+    before = sim.coverage_snapshot()
+    sim.chat_completions(request("Hi"), {})
+    with sim.inject_fault("server_error"):
+        sim.chat_completions(request("Hi"), AUTH)
+    report = sim.coverage_report(since=before)
+    assert report["routes"]["completion"] == 0
+    assert report["errors"] == dict(report["errors"], authentication_error=1, server_error=1)
+    assert report["faults"]["server_error"] == 1
+    assert sim.coverage_report()["routes"]["completion"] == 1
+
+
+def test_every_pool_variant_has_a_slot(sim):
+    report = sim.coverage_report()
+    assert {pool: len(hits) for pool, hits in report["variants"].items()} == {
+        pool: len(variants) for pool, variants in RESPONSE_POOLS.items()
+    }
+
+
+def test_stream_finish_reason_counts_once_per_choice(sim):
+    response = sim.chat_completions(request("Can you recommend a laptop?", stream=True, n=2), AUTH)
+    for _ in range(3):
+        list(response.iter_lines())
+    report = sim.coverage_report()
+    assert report["routes"]["streaming"] == 1
+    assert report["finish_reasons"]["stop"] == 2
+
+
+def test_on_finish_fires_once_per_choice():
+    reasons = []
+    response = StreamingResponse(
+        text="one two three", chunk_delay_ms=0, max_tokens=2,
+        alternatives=[{"content": "four"}], on_finish=reasons.append,
+    )
+    list(response.iter_lines())
+    list(response.iter_lines())
+    assert sorted(reasons) == ["length", "stop"]
+
+
+def test_non_streaming_finish_reasons_and_cache_route(sim):
+    with sim.configure(response_cache_size=4):
+        for _ in range(2):
+            sim.chat_completions(request("Hi", temperature=0, max_tokens=1), AUTH)
+    report = sim.coverage_report()
+    assert report["finish_reasons"]["length"] == 2
+    assert report["routes"]["response_cache"] == 1
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from test_helpers import FactIndex, assert_facts_consistent
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def index():
+    return FactIndex.from_config()
+
+
+def problems(index, text):
+    return [(p["claim"], p["problem"]) for p in index.check(text)]
+
+
+def test_matching_policy_passes(index):
+    assert problems(index, "Electronics can be returned within 15 days of purchase.") == []
+    assert problems(index, "Express shipping takes 2-3 business days and costs $12.99.") == []
+    assert problems(index, "We accept returns within thirty days.") == []
+
+
+def test_wrong_window_contradicts(index):
+    assert problems(index, "Electronics can be returned within 60 days of purchase.") == [
+        ("60 days", "contradiction"),
+    ]
+
+
+def test_standard_keeps_general_window(index):
+    text = "Electronics have 15 days, not the standard 30 days, and other items 30 days to return."
+    assert problems(index, text) == []
+
+
+def test_free_shipping_threshold_is_not_a_price(index):
+    assert ("standard_shipping", "money") not in index.facts
+    assert problems(index, "Standard shipping costs $5.99.") == []
+    assert problems(index, "Standard shipping is free on orders over $50.") == []
+    assert problems(index, "Free shipping on orders over $35.") == [("over $35", "contradiction")]
+
+
+def test_contacts(index):
+    assert problems(index, "Call us at 1-800-555-SHOP.") == []
+    assert problems(index, "Email pr@shopsmartexample.com for help.") == [
+        ("pr@shopsmartexample.com", "internal"),
+    ]
+    assert problems(index, "Email help@example.org for help.") == [
+        ("help@example.org", "unknown_contact"),
+    ]
+
+
+def test_assert_facts_consistent_message():
+    with pytest.raises(AssertionError, match="'60 days' contradicts electronics_returns"):
+        assert_facts_consistent("Electronics can be returned within 60 days of purchase.")
+
+
+def test_custom_prompt():
+    index = FactIndex.from_config("Returns are accepted within 10 days.", {})
+    assert problems(index, "You can return items within 10 days.") == []
+    assert problems(index, "You can return items within 30 days.") == [("30 days", "contradiction")]
+
+
+def test_import_does_not_need_shopmart_config():
+    script = (
+        "import sys; sys.modules['shopmart_config'] = None\n"
+        "import test_helpers\n"
+        "index = test_helpers.FactIndex.from_config('Returns within 10 days.', {})\n"
+        "print(index.check('Returns within 20 days.')[0]['problem'])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "contradiction"
@@ -0,0 +1,58 @@
+import pytest
+
+from chatassist_sim import ChatAssistSimulator, SimulatorFarm
+from chatassist_sim.farm import SharedCounters
+
+from conftest import AUTH, request
+
+REQUESTS = [request(q, temperature=1.0) for q in ("Hi", "What is your return policy?", "Recommend a TV")] * 4
+
+
+def content(response):
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def test_shared_counters_enforce_a_fixed_window():
+    counters = SharedCounters()
+    results = [counters.admit(2, now=120.5) for _ in range(3)]
+    assert [allowed for allowed, _, _ in results] == [True, True, False]
+    assert results[0][1:] == (1, 180)
+    assert counters.admit(2, now=185)[0] is True
+    snapshot = counters.snapshot()
+    assert (snapshot["requests"], snapshot["rate_limited"]) == (3, 1)
+
+
+@pytest.fixture(scope="module")
+def farm():
+    with SimulatorFarm(workers=2, seed=5, config={"rate_limit": 1000}) as farm:
+        yield farm
+
+
+def test_farm_matches_a_per_request_seeded_simulator(farm):
+    sim = ChatAssistSimulator({"rate_limit": 1000})
+    sim.set_seed(5, per_request=True)
+    expected = [content(sim.chat_completions(body, AUTH)) for body in REQUESTS]
+    assert [content(r) for r in farm.map(REQUESTS, headers=AUTH, chunksize=1)] == expected
+    assert [content(r) for r in farm.imap(REQUESTS, headers=AUTH)] == expected
+    assert content(farm.chat_completions(REQUESTS[0], AUTH)) == expected[0]
+
+
+def test_farm_counts_requests_across_workers(farm):
+    before = farm.stats()["requests"]
+    farm.map(REQUESTS, headers=AUTH, chunksize=1)
+    stats = farm.stats()
+    assert stats["workers"] == 2
+    assert stats["requests"] - before == len(REQUESTS)
+
+
+def test_rate_limit_is_global():
+    with SimulatorFarm(workers=2, config={"rate_limit": 5}) as farm:
+        statuses = [r.status_code for r in farm.map(REQUESTS, headers=AUTH, chunksize=1)]
+        assert statuses.count(200) == 5
+        assert statuses.count(429) == len(REQUESTS) - 5
+        assert farm.stats()["rate_limited"] == len(REQUESTS) - 5
+
+
+def test_rate_limit_can_be_disabled():
+    with SimulatorFarm(workers=1, config={"rate_limit": 1}, enforce_rate_limit=False) as farm:
+        assert {r.status_code for r in farm.map(REQUESTS[:3], headers=AUTH)} == {200}
@@ -0,0 +1,65 @@
+import copy
+
+from chatassist_sim import ChatAssistSimulator
+from chatassist_sim.response_pools import RESPONSE_POOLS
+from test_helpers import ImpactRecorder, affected_tests, run_n_times
+
+from conftest import AUTH, request
+
+
+class EditedStreaming(ChatAssistSimulator):
+    __module__ = ChatAssistSimulator.__module__
+
+    def _handle_streaming(self, request_body, user_message):
+        return self._build_streaming_response("edited", request_body["model"])
+
+
+def record(sim):
+    recorder = ImpactRecorder(sim)
+
+    def test_return_policy():
+        sim.chat_completions(request("What is your return policy?", temperature=0), AUTH)
+
+    def test_streaming():
+        list(sim.chat_completions(request("Hello", stream=True, temperature=0), AUTH).iter_lines())
+
+    run_n_times(recorder.wrap(test_return_policy), n=3, reporters=[])
+    recorder.record(test_streaming)
+    return recorder
+
+
+def test_recorder_maps_tests_to_routes_and_variants(sim):
+    tests = record(sim).tests
+    assert set(tests["test_return_policy"]["routes"]) == {"completion"}
+    assert set(tests["test_return_policy"]["variants"]) == {"return_policy[0]"}
+    assert tests["test_return_policy"]["pools"] == {"return_policy": len(RESPONSE_POOLS["return_policy"])}
+    assert set(tests["test_streaming"]["routes"]) == {"streaming"}
+
+
+def test_unchanged_code_and_pools_affect_nothing(tmp_path, sim):
+    path = str(tmp_path / "impact.json")
+    record(sim).save(path)
+    assert affected_tests(ImpactRecorder.load(path)) == {}
+
+
+def test_edited_variant_and_resized_pool(sim):
+    recorder = record(sim)
+    pools = copy.deepcopy(RESPONSE_POOLS)
+    first = pools["return_policy"][0]
+    if isinstance(first, dict):
+        first["content"] += " Edited."
+    else:
+        pools["return_policy"][0] = first + " Edited."
+    assert affected_tests(recorder, pools) == {"test_return_policy": ["variant return_policy[0] changed"]}
+    pools = copy.deepcopy(RESPONSE_POOLS)
+    pools["generic_completion"].append("A new variant.")
+    affected = affected_tests(recorder.tests, pools)
+    assert list(affected) == ["test_streaming"]
+    assert "pool generic_completion has" in affected["test_streaming"][0]
+    del pools["return_policy"]
+    assert affected_tests(recorder, pools)["test_return_policy"] == ["pool return_policy removed"]
+
+
+def test_edited_route_code(sim):
+    affected = affected_tests(record(sim), simulator_cls=EditedStreaming)
+    assert affected == {"test_streaming": ["route streaming changed"]}
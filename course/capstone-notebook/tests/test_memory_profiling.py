@@ -0,0 +1,81 @@
+import os
+import tracemalloc
+
+import pytest
+
+from chatassist_sim.profiling import MemoryProfiler
+from test_helpers import run_n_times
+
+from conftest import AUTH, request
+
+
+def test_report_requires_profiling(sim):
+    with pytest.raises(RuntimeError):
+        sim.memory_profile()
+    with pytest.raises(ValueError):
+        MemoryProfiler(every=0)
+
+
+def test_profile_counts_requests_snapshots_and_pools(sim):
+    sim.enable_memory_profiling(every=5)
+    try:
+        for i in range(20):
+            sim.chat_completions(request("What is your return policy?" if i % 2 else "Hi"), AUTH)
+        report = sim.memory_profile()
+    finally:
+        sim.disable_memory_profiling()
+    assert report["requests"] == 20
+    assert [s["requests"] for s in report["snapshots"]] == [5, 10, 15, 20]
+    assert set(report["by_tag"]) == {"return_policy", "generic_completion"}
+    assert report["by_tag"]["return_policy"]["requests"] == 10
+    assert abs(report["growth_bytes_per_request"]) < 2048
+    assert not tracemalloc.is_tracing()
+    assert "_chat_completions" not in vars(sim)
+
+
+def test_profiler_leaves_running_tracemalloc_alone(sim):
+    tracemalloc.start()
+    try:
+        sim.enable_memory_profiling(every=1)
+        sim.chat_completions(request("Hi"), AUTH)
+        sim.disable_memory_profiling()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+class Leaky:
+    def __init__(self):
+        self.kept = []
+
+    def handle(self):
+        self.kept.append(bytearray(10_000))
+
+
+def test_growth_is_attributed_to_functions():
+    leaky = Leaky()
+    profiler = MemoryProfiler(every=10, package_dir=os.path.dirname(os.path.abspath(__file__)))
+    profiler.install(leaky, "handle")
+    try:
+        for _ in range(50):
+            leaky.handle()
+        report = profiler.report()
+    finally:
+        profiler.uninstall()
+    assert report["growth_bytes_per_request"] > 9_000
+    assert "test_memory_profiling.Leaky.handle" in report["by_function"]
+
+
+def test_request_timestamps_keep_only_the_last_minute(sim):
+    sim._request_timestamps.extend([0.0] * 1000)
+    sim.chat_completions(request("Hi"), AUTH)
+    assert len(sim._request_timestamps) == 1
+
+
+def test_run_n_times_bounds_kept_failures():
+    def test_always_fails():
+        raise AssertionError("nope")
+
+    summary = run_n_times(test_always_fails, n=30, max_failures=5, reporters=[])
+    assert len(summary["failures"]) == 5
+    assert summary["failure_counts"] == {"nope": 30}
@@ -0,0 +1,48 @@
+import pytest
+
+from test_helpers import accumulate_stream
+
+from conftest import AUTH, request
+
+TOOLS = [{"type": "function", "function": {"name": "lookup_order"}}]
+
+
+def test_n_choices_share_the_prompt(sim):
+    body = sim.chat_completions(request("Can you recommend a laptop?", n=4, temperature=1.0), AUTH).json()
+    assert [c["index"] for c in body["choices"]] == [0, 1, 2, 3]
+    single = sim.chat_completions(request("Can you recommend a laptop?"), AUTH).json()
+    assert body["usage"]["prompt_tokens"] == single["usage"]["prompt_tokens"]
+    assert body["usage"]["completion_tokens"] >= 4
+
+
+def test_choices_without_a_draw_repeat_with_fresh_tool_ids(sim):
+    body = request("Is PROD-1 in stock?", n=3, tools=[{"type": "function", "function": {"name": "check_inventory"}}])
+    choices = sim.chat_completions(body, AUTH).json()["choices"]
+    ids = {c["message"]["tool_calls"][0]["id"] for c in choices}
+    assert len(ids) == 3
+    assert {c["finish_reason"] for c in choices} == {"tool_calls"}
+
+
+def test_streamed_choices_are_interleaved(sim):
+    response = sim.chat_completions(request("What is your return policy?", n=3, stream=True), AUTH)
+    acc = accumulate_stream(response.iter_lines())
+    assert acc.indexes == [0, 1, 2]
+    assert all(acc.content(i) and acc.finish_reason(i) == "stop" for i in acc.indexes)
+
+
+def test_order_lookup_draws_each_choice(sim):
+    with sim.configure(hallucination_rate=0):
+        choices = sim.chat_completions(request("Where is order #77?", n=8, tools=TOOLS), AUTH).json()["choices"]
+    for choice in choices:
+        if choice["finish_reason"] == "tool_calls":
+            assert choice["message"]["content"] is None
+            assert '"#77"' in choice["message"]["tool_calls"][0]["function"]["arguments"]
+        else:
+            assert choice["message"]["content"]
+
+
+@pytest.mark.parametrize("n", [0, 129, "2"])
+def test_invalid_n_is_a_400(sim, n):
+    response = sim.chat_completions(request("Hi", n=n), AUTH)
+    assert response.status_code == 400
+    assert response.json()["error"]["param"] == "n"
@@ -0,0 +1,74 @@
+from chatassist_sim import ChatAssistSimulator
+from chatassist_sim.response_pools import RESPONSE_POOLS
+from test_helpers import generate_mutants, mutation_test
+
+from conftest import AUTH, request
+
+
+def return_policy_test(sim):
+    def test_return_policy():
+        response = sim.chat_completions(request("What is your return policy?", temperature=0), AUTH)
+        text = response.json()["choices"][0]["message"]["content"].lower()
+        assert "30" in text or "thirty" in text
+
+    return test_return_policy
+
+
+def test_generate_mutants_leaves_pools_alone():
+    before = list(RESPONSE_POOLS["return_policy"])
+    mutants = generate_mutants(["return_policy"])
+    assert {m.operator for m in mutants} == {"number_word", "drop_sentence", "hallucination", "prompt_leak"}
+    assert all(m.content != before[m.index] for m in mutants)
+    with mutants[0].applied():
+        assert all(item == mutants[0].content for item in RESPONSE_POOLS["return_policy"])
+    assert RESPONSE_POOLS["return_policy"] == before
+
+
+def test_mutation_test_kills_wrong_return_window(sim):
+    mutants = [m for m in generate_mutants(["return_policy"]) if m.operator == "hallucination"]
+    report = mutation_test([return_policy_test(sim)], sim, mutants, runs=1, workers=1, show=False)
+    assert report["unstable"] == []
+    assert report["killed"] > 0
+    # Replacing the window is caught; an added claim that keeps it is not.
+    assert not any("30 -> 90" in name for name in report["survivors"])
+    assert any("60-day electronics claim" in name for name in report["survivors"])
+
+
+def test_cached_verdicts_are_reused(tmp_path, sim):
+    mutants = generate_mutants(["return_policy"])[:5]
+    path = str(tmp_path / "verdicts.json")
+    first = mutation_test([return_policy_test(sim)], sim, mutants, runs=1, workers=1, cache_path=path, show=False)
+    second = mutation_test([return_policy_test(sim)], sim, mutants, runs=1, workers=1, cache_path=path, show=False)
+    assert first["executed"] == 5
+    assert second["executed"] == 0
+    assert second["matrix"] == first["matrix"]
+
+
+def test_counts_cover_every_mutant_once(sim):
+    mutants = generate_mutants(["return_policy", "electronics_return"])
+    report = mutation_test([return_policy_test(sim)], sim, mutants, runs=1, workers=1, show=False)
+    excluded = sum(m.operator == "number_word" for m in mutants)
+    assert report["excluded"] == excluded > 0
+    assert report["reached"] > 0 and report["unreached"] > 0
+    assert report["reached"] + report["unreached"] + report["excluded"] == len(mutants)
+
+
+def test_caller_simulator_is_left_as_it_was():
+    sim = ChatAssistSimulator({"chunk_delay_ms": 0, "response_cache_size": 16})
+    sim.set_seed(7, per_request=True)
+    cached = sim.chat_completions(request("What is your return policy?", temperature=0), AUTH).json()
+    coverage = sim.coverage_report()
+    cache_stats = sim.response_cache_stats()
+    mutants = [m for m in generate_mutants(["return_policy"]) if m.operator == "hallucination"]
+
+    report = mutation_test([return_policy_test(sim)], sim, mutants, runs=2, workers=1, show=False)
+
+    # The cached response did not hide the mutants from the test.
+    assert report["killed"] > 0
+    assert sim.coverage_report() == coverage
+    assert sim.response_cache_stats() == cache_stats
+    fresh = ChatAssistSimulator({"chunk_delay_ms": 0, "response_cache_size": 16})
+    fresh.set_seed(7, per_request=True)
+    body = request("Where is my order #12?")
+    assert sim.chat_completions(body, AUTH).json() == fresh.chat_completions(body, AUTH).json()
+    assert sim.chat_completions(request("What is your return policy?", temperature=0), AUTH).json() == cached
@@ -0,0 +1,74 @@
+from chatassist_sim import ChatAssistSimulator
+from chatassist_sim.conversation import ConversationCache
+from chatassist_sim.prefix_cache import PrefixCacheIndex
+
+from conftest import AUTH
+
+SYSTEM = {"role": "system", "content": "You are the ShopSmart assistant. " * 60}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def states(*messages):
+    return ConversationCache().analyze([SYSTEM, *messages])
+
+
+def test_repeated_prefix_is_reported_as_cached():
+    clock = Clock()
+    index = PrefixCacheIndex(min_tokens=16, ttl_s=60, clock=clock)
+    first = states({"role": "user", "content": "Hi"})
+    prompt, cached = index.lookup_and_record("key", None, first)
+    assert cached == 0
+    second = states({"role": "user", "content": "Hello again"})
+    prompt, cached = index.lookup_and_record("key", None, second)
+    assert cached == second.parent.tokens
+    assert 0 < cached < prompt
+
+
+def test_prefix_is_per_key_and_expires():
+    clock = Clock()
+    index = PrefixCacheIndex(min_tokens=16, ttl_s=60, clock=clock)
+    index.lookup_and_record("a", None, states({"role": "user", "content": "Hi"}))
+    assert index.lookup_and_record("b", None, states({"role": "user", "content": "Hi"}))[1] == 0
+    clock.now = 61
+    assert index.lookup_and_record("a", None, states({"role": "user", "content": "Yo"}))[1] == 0
+
+
+def test_short_prefixes_are_not_cached():
+    index = PrefixCacheIndex(min_tokens=10_000)
+    conversation = states({"role": "user", "content": "Hi"})
+    index.lookup_and_record("a", None, conversation)
+    assert index.lookup_and_record("a", None, conversation)[1] == 0
+
+
+def test_tools_are_part_of_the_prefix():
+    index = PrefixCacheIndex(min_tokens=16)
+    tools = [{"type": "function", "function": {"name": "lookup_order"}}]
+    conversation = states({"role": "user", "content": "Hi"})
+    index.lookup_and_record("a", tools, conversation)
+    assert index.lookup_and_record("a", None, conversation)[1] == 0
+    assert index.lookup_and_record("a", tools, conversation)[1] > 0
+
+
+def test_simulator_reports_cached_tokens_in_usage():
+    sim = ChatAssistSimulator({"prefix_caching": True, "prefix_cache_min_tokens": 16})
+    body = {"model": "chatassist-4", "messages": [SYSTEM, {"role": "user", "content": "Hi"}]}
+    first = sim.chat_completions(body, AUTH).json()["usage"]
+    body["messages"][-1] = {"role": "user", "content": "Hi again"}
+    second = sim.chat_completions(body, AUTH).json()["usage"]
+    assert first["prompt_tokens_details"]["cached_tokens"] == 0
+    assert second["prompt_tokens_details"]["cached_tokens"] > 0
+    stats = sim.prefix_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["billed_prompt_tokens"] < stats["prompt_tokens"]
+
+
+def test_usage_has_no_cache_details_when_disabled(sim):
+    body = {"model": "chatassist-4", "messages": [SYSTEM, {"role": "user", "content": "Hi"}]}
+    assert "prompt_tokens_details" not in sim.chat_completions(body, AUTH).json()["usage"]
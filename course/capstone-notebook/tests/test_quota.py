@@ -0,0 +1,80 @@
+from chatassist_sim import ChatAssistSimulator, SimulatorFarm
+from chatassist_sim.quota import API_TIERS, QuotaLedger
+
+from conftest import AUTH, request
+
+KEY = ChatAssistSimulator.VALID_API_KEY
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_request_window_slides():
+    clock = Clock()
+    ledger = QuotaLedger(clock)
+    for _ in range(10):
+        assert ledger.admit("k", "free") is None
+        clock.now += 1
+    rejection = ledger.admit("k", "free")
+    assert (rejection.window, rejection.error_type) == ("requests_per_min", "rate_limit_error")
+    assert rejection.retry_after == 50
+    clock.now += 50
+    assert ledger.admit("k", "free") is None
+
+
+def test_token_windows_and_daily_quota():
+    clock = Clock()
+    ledger = QuotaLedger(clock)
+    ledger.admit("k", "free")
+    ledger.charge("k", 6_000, 4_000)
+    assert ledger.admit("k", "free").window == "tokens_per_min"
+    for _ in range(9):
+        clock.now += 61
+        ledger.charge("k", 10_000, 0)
+    clock.now += 61
+    rejection = ledger.admit("k", "free")
+    assert (rejection.window, rejection.error_type) == ("tokens_per_day", "quota_exceeded")
+    clock.now += 24 * 3600
+    assert ledger.admit("k", "free") is None
+
+
+def test_unenforced_requests_are_tallied():
+    ledger = QuotaLedger(Clock())
+    for _ in range(12):
+        assert ledger.admit("k", "free", enforce=False) is None
+    report = ledger.report()["k"]
+    assert report["totals"]["over_limit"] == 2
+    assert report["saturation"]["requests_per_min"] == 1.2
+
+
+def test_enterprise_has_no_daily_limit():
+    ledger = QuotaLedger(Clock())
+    ledger.admit("k", "enterprise")
+    assert ledger.remaining("k", "enterprise")["tokens_per_day"] is None
+    assert ledger.report()["k"]["saturation"]["tokens_per_day"] is None
+
+
+def test_simulator_enforces_tier_quota():
+    sim = ChatAssistSimulator({"api_tier": "free", "enforce_quotas": True})
+    statuses = [sim.chat_completions(request("Hi"), AUTH).status_code for _ in range(11)]
+    assert statuses == [200] * 10 + [429]
+    report = sim.quota_report()[KEY]
+    assert report["totals"]["requests"] == 10
+    assert report["totals"]["completion_tokens"] > 0
+
+
+def test_farm_quota_report_sums_workers():
+    with SimulatorFarm(workers=2, config={"api_tier": "enterprise", "rate_limit": 1000}) as farm:
+        responses = farm.map([request("Hi")] * 6, headers=AUTH, chunksize=1)
+        report = farm.quota_report()[KEY]
+    assert report["tier"] == "enterprise"
+    assert report["limits"] == API_TIERS["enterprise"]
+    assert report["totals"]["requests"] == 6
+    assert report["window"]["requests_per_min"] == 6
+    expected = sum(r.json()["usage"]["completion_tokens"] for r in responses)
+    assert report["totals"]["completion_tokens"] == expected
@@ -0,0 +1,69 @@
+from chatassist_sim import ChatAssistSimulator
+from chatassist_sim.response_cache import ResponseCache, copy_body, request_cache_key
+
+from conftest import AUTH, request
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_ttl():
+    clock = Clock()
+    cache = ResponseCache(max_entries=2, ttl_s=10, clock=clock)
+    cache.put(b"a", {"id": "a"})
+    cache.put(b"b", {"id": "b"})
+    assert cache.get(b"a") == {"id": "a"}
+    cache.put(b"c", {"id": "c"})
+    assert cache.get(b"b") is None
+    clock.now = 11
+    assert cache.get(b"a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (1, 2, 1, 1)
+
+
+def test_key_covers_request_config_and_faults():
+    config = {"injection_defense": "strong"}
+    key = request_cache_key(request("Hi"), config, {})
+    assert key == request_cache_key(request("Hi", temperature=0), config, {})
+    assert key != request_cache_key(request("Hi", max_tokens=5), config, {})
+    assert key != request_cache_key(request("Hi"), {"injection_defense": "weak"}, {})
+    assert key != request_cache_key(request("Hi"), config, {"truncate_response": True})
+
+
+def test_copy_body_isolates_nested_containers():
+    body = {"choices": [{"message": {"content": "x", "tool_calls": [{"id": "1", "function": {"name": "f"}}]}}],
+            "usage": {"prompt_tokens": 1}}
+    copied = copy_body(body)
+    copied["choices"][0]["message"]["tool_calls"][0]["function"]["name"] = "g"
+    copied["usage"]["prompt_tokens"] = 2
+    assert body["choices"][0]["message"]["tool_calls"][0]["function"]["name"] == "f"
+    assert body["usage"]["prompt_tokens"] == 1
+
+
+def test_simulator_memoizes_temperature_zero_only():
+    sim = ChatAssistSimulator({"response_cache_size": 8})
+    first = sim.chat_completions(request("What is your return policy?", temperature=0), AUTH).json()
+    second = sim.chat_completions(request("What is your return policy?", temperature=0), AUTH).json()
+    sim.chat_completions(request("What is your return policy?", temperature=0.7), AUTH)
+    assert first["choices"] == second["choices"]
+    assert first["id"] != second["id"]
+    stats = sim.response_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_cached_body_is_not_shared_with_callers():
+    sim = ChatAssistSimulator({"response_cache_size": 8})
+    body = request("Hi", temperature=0)
+    sim.chat_completions(body, AUTH).json()["choices"][0]["message"]["content"] = "mutated"
+    assert sim.chat_completions(body, AUTH).json()["choices"][0]["message"]["content"] != "mutated"
+
+
+def test_cache_is_off_by_default():
+    sim = ChatAssistSimulator()
+    sim.chat_completions(request("Hi", temperature=0), AUTH)
+    assert sim.response_cache_stats()["entries"] == 0
@@ -0,0 +1,104 @@
+import json
+
+from test_helpers import JSONLReporter, JUnitXMLReporter, run_n_times, run_test
+from test_helpers.runner import run_all_tests
+
+from conftest import AUTH, request
+
+G, R, Y, X, B = "\033[92m", "\033[91m", "\033[93m", "\033[0m", "\033[1m"
+
+
+def passes():
+    pass
+
+
+def bare_assert():
+    raise AssertionError()
+
+
+def bare_key_error():
+    raise KeyError()
+
+
+def value_error():
+    raise ValueError("bad value")
+
+
+def flaky():  # fails every second run
+    calls = []
+
+    def flaky_check():
+        calls.append(None)
+        if len(calls) % 2 == 0:
+            raise AssertionError("")
+
+    return flaky_check
+
+
+def test_run_all_tests_console_output(capsys):
+    summary = run_all_tests(passes, bare_assert, bare_key_error, value_error)
+    assert summary == {"passed": 1, "failed": 3, "total": 4}
+    assert capsys.readouterr().out == (
+        f"{B}Running 4 tests...{X}\n\n"
+        f"{G}{B}PASS{X} passes\n"
+        f"{R}{B}FAIL{X} bare_assert\n"
+        f"     {R}Assertion failed{X}\n"
+        f"{R}{B}ERROR{X} bare_key_error\n"
+        f"     {R}KeyError: {X}\n"
+        f"{R}{B}ERROR{X} value_error\n"
+        f"     {R}ValueError: bad value{X}\n"
+        f"\n{'=' * 50}\n"
+        f"{B}1 passed, {R}3 failed{X}\n"
+        f"\nFailed tests:\n"
+        f"  {R}✗{X} bare_assert\n"
+        f"  {R}✗{X} bare_key_error\n"
+        f"  {R}✗{X} value_error\n"
+    )
+
+
+def test_run_n_times_console_output(capsys):
+    summary = run_n_times(flaky(), n=4)
+    assert summary["failures"] == ["Assertion failed", "Assertion failed"]
+    assert summary["failure_counts"] == {"Assertion failed": 2}
+    assert capsys.readouterr().out == (
+        f"  Run   1/4: {G}PASS{X}\n"
+        f"  Run   2/4: {R}FAIL{X} — \n"
+        f"  Run   3/4: {G}PASS{X}\n"
+        f"  Run   4/4: {R}FAIL{X} — \n"
+        f"\n{B}{R}2/4 passed (50.0%){X} — flaky_check\n"
+        f"  Unique failure reasons (1):\n"
+        f"    [2x] Assertion failed\n"
+    )
+
+
+def test_jsonl_and_junit(tmp_path, sim):
+    def test_refund():
+        response = sim.chat_completions(request("How long do refunds take?"), AUTH)
+        assert response.status_code == 200
+
+    jsonl_path, junit_path = tmp_path / "runs.jsonl", tmp_path / "junit.xml"
+    with JSONLReporter(str(jsonl_path)) as jsonl, JUnitXMLReporter(str(junit_path)) as junit:
+        run_n_times(test_refund, n=2, reporters=[jsonl, junit], sim=sim, seed=10)
+        run_test(bare_key_error, reporters=[jsonl, junit])
+    lines = [json.loads(line) for line in jsonl_path.read_text().splitlines()]
+    assert [(line["type"], line["test"]) for line in lines] == [
+        ("run", "test_refund"), ("run", "test_refund"), ("summary", "test_refund"),
+        ("run", "bare_key_error"), ("summary", "bare_key_error"),
+    ]
+    assert [line["seed"] for line in lines[:2]] == [10, 11]
+    assert lines[0]["routes"] == ["completion"]
+    assert (lines[3]["outcome"], lines[3]["exception"], lines[3]["reason"]) == ("error", "KeyError", "")
+    xml = junit_path.read_text()
+    assert 'tests="3" failures="0" errors="1"' in xml
+    assert 'name="test_refund[2]"' in xml and '<property name="seed" value="11"/>' in xml
+    assert '<error type="KeyError" message=""></error>' in xml
+
+
+def test_seed_without_sim_is_ignored(tmp_path):
+    path = tmp_path / "runs.jsonl"
+    with JSONLReporter(str(path)) as jsonl:
+        assert run_test(passes, reporters=[jsonl], seed=1)
+        summary = run_n_times(passes, n=2, reporters=[jsonl], seed=5)
+    assert summary["passed"] == 2
+    runs = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["seed"] for r in runs if r["type"] == "run"] == [None, None, None]
@@ -0,0 +1,50 @@
+from chatassist_sim import ChatAssistSimulator
+
+from conftest import AUTH, request
+
+QUESTIONS = ["What is your return policy?", "Can you recommend a laptop?", "Hello there"]
+
+
+def contents(sim, questions, headers=AUTH):
+    return [
+        sim.chat_completions(request(q, temperature=1.0), headers).json()["choices"][0]["message"]["content"]
+        for q in questions
+    ]
+
+
+def test_per_request_seed_is_order_independent():
+    a, b = ChatAssistSimulator(), ChatAssistSimulator()
+    a.set_seed(7, per_request=True)
+    b.set_seed(7, per_request=True)
+    forward = contents(a, QUESTIONS)
+    backward = contents(b, ["warm-up"] + QUESTIONS[::-1])[1:]
+    assert forward == backward[::-1]
+
+
+def test_per_request_seed_replays_ids():
+    a, b = ChatAssistSimulator(), ChatAssistSimulator()
+    a.set_seed(7, per_request=True)
+    b.set_seed(7, per_request=True)
+    ra = a.chat_completions(request("Hi"), AUTH)
+    rb = b.chat_completions(request("Hi"), AUTH)
+    assert ra.json()["id"] == rb.json()["id"]
+    assert ra.headers["X-Request-Id"] == rb.headers["X-Request-Id"]
+
+
+def test_conversation_header_changes_the_draw():
+    sim = ChatAssistSimulator()
+    sim.set_seed(7, per_request=True)
+    ids = {
+        sim.chat_completions(request("Hi"), dict(AUTH, **{"X-Conversation-Id": str(i)})).json()["id"]
+        for i in range(5)
+    }
+    assert len(ids) == 5
+
+
+def test_shared_seed_depends_on_order():
+    a, b = ChatAssistSimulator(), ChatAssistSimulator()
+    a.set_seed(3)
+    b.set_seed(3)
+    assert contents(a, QUESTIONS * 3) == contents(b, QUESTIONS * 3)
+    a.set_seed(3)
+    assert a._per_request_seed is False
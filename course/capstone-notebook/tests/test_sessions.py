@@ -0,0 +1,73 @@
+import pytest
+
+from chatassist_sim import ChatAssistSimulator
+from chatassist_sim.sessions import SessionStore
+
+from conftest import AUTH, request
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def store(sim, content, conversation_id=None):
+    body = request(content, store=True)
+    if conversation_id is not None:
+        body = {"model": "chatassist-4", "conversation_id": conversation_id,
+                "messages": [{"role": "user", "content": content}]}
+    return sim.chat_completions(body, AUTH)
+
+
+def test_follow_up_replays_stored_history(sim):
+    first = store(sim, "Where is my order #4521?")
+    conversation_id = first.json()["conversation_id"]
+    assert first.headers["X-Conversation-Id"] == conversation_id
+    follow_up = store(sim, "Thanks, and when will it arrive?", conversation_id)
+    assert follow_up.status_code == 200
+    stats = sim.session_stats()
+    assert (stats["sessions"], stats["messages_sent"], stats["messages_replayed"]) == (1, 1, 2)
+
+
+def test_unknown_conversation_is_404(sim):
+    response = store(sim, "Hi", "conv-missing")
+    assert response.status_code == 404
+    assert response.json()["error"]["param"] == "conversation_id"
+
+
+def test_identical_first_requests_get_distinct_sessions_under_per_request_seed():
+    sim = ChatAssistSimulator()
+    sim.set_seed(0, per_request=True)
+    a = store(sim, "Hi").json()["conversation_id"]
+    b = store(sim, "Hi").json()["conversation_id"]
+    assert a != b
+    assert sim.session_stats()["sessions"] == 2
+    store(sim, "First conversation continues", a)
+    assert len(sim._sessions.get(a).messages) == 4
+    assert len(sim._sessions.get(b).messages) == 2
+
+    replay = ChatAssistSimulator()
+    replay.set_seed(0, per_request=True)
+    assert [store(replay, "Hi").json()["conversation_id"] for _ in range(2)] == [a, b]
+
+
+def test_store_refuses_to_overwrite_a_session():
+    sessions = SessionStore()
+    sessions.create("conv-1")
+    with pytest.raises(ValueError):
+        sessions.create("conv-1")
+
+
+def test_store_evicts_and_expires():
+    clock = Clock()
+    sessions = SessionStore(max_sessions=2, ttl_s=10, clock=clock)
+    for i in range(3):
+        sessions.create(f"conv-{i}")
+    assert sessions.get("conv-0") is None
+    clock.now = 11
+    assert sessions.get("conv-1") is None
+    stats = sessions.stats()
+    assert (stats["sessions"], stats["evictions"], stats["expirations"]) == (1, 1, 1)
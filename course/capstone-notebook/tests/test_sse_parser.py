@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from test_helpers import SSEEvent, SSEParser, aparse_sse, aparse_sse_lines, parse_sse, parse_sse_lines
+
+from conftest import AUTH, request
+
+RAW = (
+    'data: {"choices": [{"delta": {"content": "Hé"}}]}\n\n'
+    ": keep-alive\n\n"
+    "event: update\nid: 7\ndata: line one\ndata: line two\n\n"
+    "data: [DONE]\n\n"
+).encode()
+
+
+def test_raw_reads_split_anywhere():
+    for size in (1, 2, 5, len(RAW)):
+        reads = [RAW[i:i + size] for i in range(0, len(RAW), size)]
+        events = list(parse_sse(reads))
+        assert [e.data for e in events][1:] == ["line one\nline two", "[DONE]"]
+        assert events[0].choices()[0]["delta"]["content"] == "Hé"
+        assert (events[1].event, events[1].id) == ("update", "7")
+        assert events[-1].done
+
+
+def test_crlf_and_unterminated_final_event():
+    events = list(parse_sse([b"data: a\r", b"\n\r\ndata: b"]))
+    assert [e.data for e in events] == ["a", "b"]
+
+
+def test_lines_mode_rejoins_split_frames_and_skips_comments():
+    lines = ['data: {"choices": [{"index": 0', ', "delta": {}}]}', ": ping", "data: [DONE]"]
+    events = list(parse_sse_lines(lines))
+    assert [e.choices()[0]["index"] for e in events[:-1]] == [0]
+    assert events[-1].done
+
+
+def test_lazy_field_decoding():
+    event = SSEEvent('{"usage": {"total_tokens": 5}, "choices": [{"index": 1}]}')
+    assert event.usage() == {"total_tokens": 5}
+    assert event.choices() == [{"index": 1}]
+    assert event._json is None
+    assert SSEEvent('{"choices": []}').usage() is None
+
+
+def test_lazy_fields_skip_nested_keys():
+    payloads = [
+        '{"meta": {"usage": 1, "choices": 2}, "choices": [], "usage": {"total_tokens": 3}}',
+        '{"meta": [{"usage": "x"}], "note": "\\"usage\\": {\\"", "choices": [{"usage": 4}]}',
+        '{"meta": {"choices": [1]}}',
+    ]
+    for data in payloads:
+        expected = json.loads(data)
+        event = SSEEvent(data)
+        assert event.choices() == expected.get("choices", [])
+        assert SSEEvent(data).usage() == expected.get("usage")
+
+
+def test_parser_feed_returns_completed_events_only():
+    parser = SSEParser()
+    assert parser.feed("data: x") == []
+    assert [e.data for e in parser.feed("\n\n")] == ["x"]
+    assert parser.close() == []
+
+
+def content(lines):
+    events = list(parse_sse_lines(lines))
+    assert events[-1].done
+    return "".join(e.choices()[0]["delta"].get("content", "") for e in events[:-1])
+
+
+def test_simulator_stream_with_faults_parses(sim):
+    sim.set_seed(0, per_request=True)
+    body = request("What is your return policy?", stream=True)
+    clean = content(sim.chat_completions(body, AUTH).iter_lines())
+    with sim.inject_fault("stream_split", at=1), sim.inject_fault("stream_heartbeat", at=2):
+        response = sim.chat_completions(body, AUTH)
+    assert content(response.iter_lines()) == clean != ""
+
+
+def test_async_parsers():
+    async def reads():
+        for i in range(0, len(RAW), 3):
+            yield RAW[i:i + 3]
+
+    async def lines():
+        for line in ["data: 1", "data: 2", "data: [DONE]"]:
+            yield line
+
+    async def collect(events):
+        return [e.data async for e in events]
+
+    assert asyncio.run(collect(aparse_sse(reads())))[-1] == "[DONE]"
+    assert asyncio.run(collect(aparse_sse_lines(lines()))) == ["1", "2", "[DONE]"]
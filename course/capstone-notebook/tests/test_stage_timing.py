@@ -0,0 +1,58 @@
+from chatassist_sim import ChatAssistSimulator
+from chatassist_sim.instrumentation import LatencyHistogram, StageTimer
+
+from conftest import AUTH, request
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram()
+    for ns in (1, 3, 100, 1000):
+        histogram.record(ns)
+    summary = histogram.as_dict()
+    assert (summary["count"], summary["min_ns"], summary["max_ns"]) == (4, 1, 1000)
+    assert summary["buckets"] == {2: 1, 4: 1, 128: 1, 1024: 1}
+    assert summary["p50_ns"] == 4
+    assert summary["p99_ns"] == 1000
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_nested_stages_are_exclusive():
+    class Worker:
+        def outer(self):
+            return self.inner() + 1
+
+        def inner(self):
+            return sum(range(20_000))
+
+    worker = Worker()
+    timer = StageTimer()
+    timer.install(worker, {"outer": "outer", "inner": "inner"})
+    worker.outer()
+    timer.uninstall()
+    timings = timer.as_dict()
+    assert timings["outer"]["sum_ns"] + timings["inner"]["sum_ns"] == timings["total"]["sum_ns"]
+    assert timings["inner"]["sum_ns"] > timings["outer"]["sum_ns"]
+    assert "outer" not in vars(worker)
+
+
+def test_simulator_records_stages_only_while_enabled(sim):
+    sim.enable_stage_timing()
+    sim.chat_completions(request("What is your return policy?"), AUTH)
+    timings = sim.stage_timings()
+    for stage in ("request", "validation", "routing", "pool_selection", "body", "total"):
+        assert timings[stage]["count"] >= 1, stage
+    assert timings["total"]["count"] == 1
+    sim.disable_stage_timing()
+    assert not set(ChatAssistSimulator.TIMED_STAGES.values()) & set(vars(sim))
+    sim.chat_completions(request("Hi"), AUTH)
+    assert sim.stage_timings(reset=True)["total"]["count"] == 1
+    assert sim.stage_timings() == {}
+
+
+def test_prometheus_export(sim):
+    sim.enable_stage_timing()
+    sim.chat_completions(request("Hi"), AUTH)
+    text = sim.stage_timings_prometheus()
+    assert "# TYPE chatassist_sim_stage_seconds histogram" in text
+    assert 'chatassist_sim_stage_seconds_count{stage="total"} 1' in text
+    assert 'chatassist_sim_stage_seconds_bucket{stage="total",le="+Inf"} 1' in text
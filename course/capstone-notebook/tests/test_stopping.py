@@ -0,0 +1,86 @@
+import pytest
+
+from chatassist_sim import StreamingResponse
+from chatassist_sim.chunking import make_chunker
+from chatassist_sim.stopping import LimitedStream, StopMatcher, limit_text, normalize_stop
+from chatassist_sim.tokenizer import count_tokens
+
+from conftest import AUTH, request, sse_payloads
+
+
+def streamed(response):
+    payloads = sse_payloads(response.iter_lines())
+    content = "".join(p["choices"][0]["delta"].get("content") or "" for p in payloads)
+    return content, payloads[-1]["choices"][0]["finish_reason"]
+
+
+def test_normalize_stop():
+    assert normalize_stop(None) == ()
+    assert normalize_stop("END") == ("END",)
+    for bad in (["a"] * 5, [""], 3, ["a", 1]):
+        with pytest.raises(ValueError):
+            normalize_stop(bad)
+
+
+def test_stop_sequence_split_across_chunks():
+    matcher = StopMatcher(["STOP"])
+    assert matcher.feed("abc ST") == "abc "
+    assert matcher.feed("OP tail") == ""
+    assert matcher.stopped
+    assert list(LimitedStream(["abc S", "TO", "P tail"], stop=["STOP"])) == ["abc "]
+
+
+def test_partial_stop_is_released_at_end():
+    assert "".join(LimitedStream(["abc S", "T"], stop=["STOP"])) == "abc ST"
+
+
+def test_length_limit():
+    stream = LimitedStream(["abcd", "efgh"], max_chars=6)
+    assert "".join(stream) == "abcdef"
+    assert stream.finish_reason == "length"
+
+
+def test_limit_text_counts_tokens():
+    text = "one two three four five"
+    assert limit_text(text, 2) == ("one two", "length")
+    assert limit_text(text, 2, ["two"]) == ("one ", "stop")
+    assert limit_text(text) == (text, "stop")
+
+
+@pytest.mark.parametrize("chunking", ["word", "chars", "token", "sentence"])
+def test_stream_and_body_cut_at_the_same_place(chunking):
+    text = "Items can be returned within 30 days. Electronics within 15 days."
+    for limits in ({"max_tokens": 5}, {"stop": ["30"]}, {"stop": "days.", "max_tokens": 50}):
+        expected = limit_text(text, limits.get("max_tokens"), normalize_stop(limits.get("stop")))
+        response = StreamingResponse(
+            text=text, chunker=make_chunker(chunking, chars=7)[0], chunk_delay_ms=0,
+            max_tokens=limits.get("max_tokens"), stop=normalize_stop(limits.get("stop")),
+        )
+        assert streamed(response) == expected
+
+
+@pytest.mark.parametrize("content", ["What is your return policy?", "Where is order #12345?"])
+def test_every_route_honours_max_tokens(sim, content):
+    for stream in (False, True):
+        body = request(content, max_tokens=3, stream=stream, n=1)
+        body["response_format"] = {"type": "json_object"} if "return" in content else None
+        response = sim.chat_completions(body, AUTH)
+        if stream:
+            text, reason = streamed(response)
+        else:
+            choice = response.json()["choices"][0]
+            text, reason = choice["message"]["content"], choice["finish_reason"]
+        if reason != "tool_calls":
+            assert count_tokens(text or "") <= 3
+            assert reason == "length"
+
+
+def test_invalid_stop_is_a_400(sim):
+    response = sim.chat_completions(request("Hi", stop=["a", "b", "c", "d", "e"]), AUTH)
+    assert response.status_code == 400
+    assert response.json()["error"]["param"] == "stop"
+
+
+def test_default_stream_is_not_limited():
+    response = StreamingResponse(text="a b c", chunk_delay_ms=0)
+    assert streamed(response) == ("a b c", "stop")
@@ -0,0 +1,77 @@
+import asyncio
+import random
+
+import pytest
+
+from chatassist_sim import StreamFault, StreamingResponse, StreamInterrupted
+from chatassist_sim.stream_faults import EVENT_DROP, EVENT_LINE, EVENT_SLEEP, apply_stream_faults
+
+from conftest import AUTH, request, sse_payloads
+
+FRAMES = [("data: a", 0.0), ("data: b", 0.0), ("data: [DONE]", 0.0)]
+
+
+def events(*faults):
+    return list(apply_stream_faults(FRAMES, faults, random.Random(0)))
+
+
+def test_no_faults_passes_frames_through():
+    assert events() == [(EVENT_LINE, "data: a"), (EVENT_LINE, "data: b"), (EVENT_LINE, "data: [DONE]")]
+
+
+def test_disconnect_defaults_to_before_done():
+    assert events(StreamFault("disconnect")) == [(EVENT_LINE, "data: a"), (EVENT_LINE, "data: b")]
+
+
+def test_disconnect_can_raise():
+    *lines, (kind, exc) = events(StreamFault("disconnect", at=1, raise_error=True))
+    assert lines == [(EVENT_LINE, "data: a")]
+    assert kind == EVENT_DROP and isinstance(exc, StreamInterrupted)
+
+
+def test_stall_heartbeat_duplicate_split():
+    assert events(StreamFault("stall", at=1, delay=2.5))[1] == (EVENT_SLEEP, 2.5)
+    assert events(StreamFault("heartbeat", comment="ping"))[0] == (EVENT_LINE, ": ping")
+    assert events(StreamFault("duplicate", at=0))[:2] == [(EVENT_LINE, "data: a")] * 2
+    assert events(StreamFault("split", at=0))[:2] == [(EVENT_LINE, "dat"), (EVENT_LINE, "a: a")]
+
+
+def test_invalid_fault_arguments():
+    with pytest.raises(ValueError):
+        StreamFault("explode")
+    with pytest.raises(ValueError):
+        StreamFault("stall", probability=1.5)
+
+
+def test_probability_is_drawn_from_stream_rng():
+    fault = StreamFault("duplicate", probability=0.5)
+    assert events(fault) == events(fault)
+    assert len(events(StreamFault("duplicate", probability=1.0))) == 6
+
+
+def test_injected_disconnect_interrupts_sync_and_async_streams(sim):
+    with sim.inject_fault("stream_disconnect", at=2, raise_error=True):
+        response = sim.chat_completions(request(stream=True), AUTH)
+    with pytest.raises(StreamInterrupted):
+        list(response.iter_lines())
+
+    async def consume():
+        return [line async for line in response.aiter_lines()]
+
+    with pytest.raises(StreamInterrupted):
+        asyncio.run(consume())
+
+
+def test_injected_faults_stack_and_reset(sim):
+    with sim.inject_fault("stream_heartbeat"):
+        with sim.inject_fault("stream_duplicate", at=0):
+            lines = list(sim.chat_completions(request(stream=True), AUTH).iter_lines())
+    assert lines[0] == ": keep-alive" and lines[1] == lines[2]
+    assert "stream_faults" not in sim._fault_config
+
+
+def test_silent_disconnect_omits_done():
+    response = StreamingResponse(text="one two", chunk_delay_ms=0, faults=[StreamFault("disconnect")])
+    lines = list(response.iter_lines())
+    assert "data: [DONE]" not in lines
+    assert sse_payloads(lines)[-1]["choices"][0]["finish_reason"] == "stop"
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from test_helpers import StreamTimer, accumulate_stream, assert_p99_gap_below, assert_ttfb_below
+from test_helpers.streaming import percentile
+
+from conftest import AUTH, request
+
+
+def timer_with(start, arrivals):
+    timer = StreamTimer([], start=start)
+    timer.arrivals = arrivals
+    return timer
+
+
+def test_percentile_is_nearest_rank():
+    assert percentile([], 99) == 0.0
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+def test_timer_summary():
+    timer = timer_with(0.0, [0.1, 0.2, 0.5])
+    summary = timer.summary()
+    assert summary["ttfb"] == pytest.approx(0.1)
+    assert summary["gap_max"] == pytest.approx(0.3)
+    assert (summary["chunks"], summary["duration"]) == (3, 0.5)
+    assert summary["chunks_per_second"] == pytest.approx(6.0)
+
+
+def test_slo_assertions_pass_and_fail_with_report():
+    timer = timer_with(0.0, [0.1, 0.2, 0.5])
+    assert assert_ttfb_below(timer, 0.2) == pytest.approx(0.1)
+    with pytest.raises(AssertionError, match="TTFB 100.0ms is not below 50.0ms"):
+        assert_ttfb_below(timer, 0.05)
+    with pytest.raises(AssertionError, match="p99 chunk gap 300.0ms"):
+        assert_p99_gap_below(timer, 0.2)
+    with pytest.raises(AssertionError, match="no data received"):
+        assert_ttfb_below(timer_with(0.0, []), 1)
+
+
+def test_timer_measures_simulated_stalls(sim):
+    with sim.configure(chunk_delay_ms=1), sim.inject_fault("stream_stall", at=2, delay=0.05):
+        response = sim.chat_completions(request("What is your return policy?", stream=True), AUTH)
+    timer = StreamTimer(response.iter_lines())
+    acc = accumulate_stream(timer)
+    assert acc.done and timer.chunks > 3
+    assert max(timer.gaps) >= 0.05
+    assert_ttfb_below(timer, 0.05)
+    with pytest.raises(AssertionError):
+        assert_p99_gap_below(timer, 0.04)
+
+
+def test_timer_works_async(sim):
+    response = sim.chat_completions(request("Hi", stream=True), AUTH)
+
+    async def consume(timer):
+        return [line async for line in timer]
+
+    timer = StreamTimer(response.aiter_lines())
+    lines = asyncio.run(consume(timer))
+    assert timer.chunks == len(lines) > 0
@@ -0,0 +1,64 @@
+import json
+
+from test_helpers import StreamAccumulator, accumulate_stream
+
+from conftest import AUTH, request
+
+TOOLS = [{"type": "function", "function": {"name": "check_inventory"}}]
+
+
+def test_streamed_tool_call_matches_non_streaming(sim):
+    body = request("Is PROD-42 in stock?", tools=TOOLS, temperature=0)
+    expected = sim.chat_completions(body, AUTH).json()["choices"][0]
+    acc = accumulate_stream(sim.chat_completions(dict(body, stream=True), AUTH).iter_lines())
+    message = acc.message()
+    assert acc.finish_reason() == "tool_calls" == expected["finish_reason"]
+    assert message["content"] is None
+    call = message["tool_calls"][0]
+    assert call["function"] == expected["message"]["tool_calls"][0]["function"]
+    assert json.loads(call["function"]["arguments"]) == {"product_id": "PROD-42"}
+    assert call["id"].startswith("call-tc-")
+
+
+def test_streamed_tool_call_fragments(sim):
+    with sim.configure(stream_chunking="chars", stream_chunk_chars=4):
+        response = sim.chat_completions(request("Is PROD-42 in stock?", tools=TOOLS, stream=True), AUTH)
+    lines = [line for line in response.iter_lines() if line != "data: [DONE]"]
+    first = json.loads(lines[0][6:])["choices"][0]["delta"]["tool_calls"][0]
+    assert first["function"] == {"name": "check_inventory", "arguments": ""}
+    assert len(lines) > 3
+
+
+def test_streamed_follow_up_is_text(sim):
+    messages = [
+        {"role": "user", "content": "Where is order #12345?"},
+        {"role": "tool", "content": json.dumps({"order_id": "ORD-12345", "status": "shipped"})},
+    ]
+    body = {"model": "chatassist-4", "messages": messages, "tools": TOOLS, "stream": True}
+    acc = accumulate_stream(sim.chat_completions(body, AUTH).iter_lines())
+    assert acc.finish_reason() == "stop"
+    assert "ORD-12345" in acc.content()
+
+
+def test_streamed_structured_output_is_valid_json(sim):
+    body = request("I want to return my shoes", response_format={"type": "json_object"}, stream=True)
+    acc = accumulate_stream(sim.chat_completions(body, AUTH).iter_lines())
+    assert acc.done
+    assert json.loads(acc.content())["category"] == "returns"
+    assert acc.usage["completion_tokens"] > 0
+
+
+def test_accumulator_merges_fragments_by_index():
+    acc = StreamAccumulator()
+    acc.add_chunk({"choices": [{"index": 0, "delta": {"role": "assistant", "tool_calls": [
+        {"index": 1, "id": "b", "function": {"name": "g", "arguments": ""}},
+        {"index": 0, "id": "a", "function": {"name": "f", "arguments": "{\"x\""}},
+    ]}}]})
+    acc.add_chunk({"choices": [{"index": 0, "delta": {"tool_calls": [
+        {"index": 0, "function": {"arguments": ": 1}"}},
+    ]}, "finish_reason": "tool_calls"}]})
+    acc.add_line("data: [DONE]")
+    calls = acc.message()["tool_calls"]
+    assert [c["id"] for c in calls] == ["a", "b"]
+    assert calls[0]["function"]["arguments"] == '{"x": 1}'
+    assert acc.done and acc.chunks == 2
@@ -0,0 +1,131 @@
+import itertools
+import json
+
+import pytest
+
+from chatassist_sim import ChatAssistSimulator, StreamInterrupted
+from chatassist_sim.instrumentation import patch_method, restore_methods
+from chatassist_sim.tracing import Tracer
+
+from conftest import AUTH, request
+
+INSTRUMENTS = {
+    "timing": ("enable_stage_timing", "disable_stage_timing"),
+    "tracing": ("enable_tracing", "disable_tracing"),
+    "memory": ("enable_memory_profiling", "disable_memory_profiling"),
+}
+
+
+def patched(sim):
+    """Instance attributes that shadow methods, on the simulator and its caches."""
+    return {
+        name for obj in (sim, sim._conversations) for name, value in vars(obj).items()
+        if callable(value) and hasattr(value, "_patch_layer")
+    }
+
+
+def test_tracing_records_nested_spans(sim):
+    tracer = sim.enable_tracing()
+    sim.chat_completions(request("What is your return policy?"), AUTH)
+    sim.disable_tracing()
+    spans = {span["name"]: span for span in tracer.spans()}
+    root = spans["chat_completions"]
+    assert root["parent_id"] is None
+    assert root["attributes"]["route"] == "completion"
+    assert root["attributes"]["status_code"] == 200
+    assert spans["routing"]["parent_id"] == root["span_id"]
+    assert spans["pool_selection"]["attributes"]["pool"] == "return_policy"
+    assert {span["trace_id"] for span in spans.values()} == {root["trace_id"]}
+
+
+def test_error_and_stream_spans(sim):
+    tracer = sim.enable_tracing()
+    sim.chat_completions(request("Hi"), {})
+    with sim.inject_fault("stream_disconnect", at=1, raise_error=True):
+        response = sim.chat_completions(request("Hi", stream=True), AUTH)
+    with pytest.raises(StreamInterrupted):
+        list(response.iter_lines())
+    sim.disable_tracing()
+    spans = tracer.spans()
+    assert spans[0]["status"] == "error"
+    assert spans[0]["attributes"]["error_type"] == "authentication_error"
+    stream = next(span for span in spans if span["name"] == "stream")
+    assert stream["status"] == "error"
+    assert stream["attributes"]["chunks"] == 1
+
+
+def test_ring_buffer_drops_oldest_and_exports_jsonl(tmp_path, sim):
+    path = tmp_path / "spans.jsonl"
+    tracer = sim.enable_tracing(path=str(path), capacity=5, flush_interval_s=3600)
+    for _ in range(3):
+        sim.chat_completions(request("Hi"), AUTH)
+    assert len(tracer.spans()) == 5
+    assert tracer.dropped > 0
+    sim.disable_tracing()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == tracer.written == 5
+    assert tracer.spans() == []
+
+
+def test_restore_unlinks_a_wrapper_from_the_middle():
+    class Target:
+        def method(self):
+            return ["method"]
+
+    def tag(label):
+        def wrap(method):
+            return lambda *args: [label] + method(*args)
+        return wrap
+
+    target = Target()
+    a = patch_method(target, "method", tag("a"))
+    b = patch_method(target, "method", tag("b"))
+    c = patch_method(target, "method", tag("c"))
+    assert target.method() == ["c", "b", "a", "method"]
+    restore_methods([b])
+    assert target.method() == ["c", "a", "method"]
+    restore_methods([c])
+    assert target.method() == ["a", "method"]
+    restore_methods([a])
+    assert "method" not in vars(target)
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(INSTRUMENTS)))
+def test_disabling_in_any_order_restores_the_simulator(order):
+    sim = ChatAssistSimulator()
+    for name in INSTRUMENTS:
+        getattr(sim, INSTRUMENTS[name][0])()
+    sim.chat_completions(request("Hi"), AUTH)
+    for name in order:
+        getattr(sim, INSTRUMENTS[name][1])()
+    assert patched(sim) == set()
+    before = sim.stage_timings()
+    sim.chat_completions(request("Hi"), AUTH)
+    assert sim.stage_timings() == before
+
+
+def test_interleaved_disable_keeps_the_other_instrument_working():
+    sim = ChatAssistSimulator()
+    sim.enable_stage_timing()
+    tracer = sim.enable_tracing()
+    sim.disable_stage_timing()
+    sim.chat_completions(request("Hi"), AUTH)
+    assert sim.stage_timings() == {}
+    assert any(span["name"] == "chat_completions" for span in tracer.spans())
+    sim.disable_tracing()
+    assert patched(sim) == set()
+
+
+def test_tracer_records_exceptions():
+    class Target:
+        def boom(self):
+            raise KeyError("x")
+
+    target = Target()
+    tracer = Tracer()
+    tracer.install(target, {"boom": ("boom", None)})
+    with pytest.raises(KeyError):
+        target.boom()
+    tracer.close()
+    span = tracer.spans()[0]
+    assert (span["status"], span["attributes"]["exception"]) == ("error", "KeyError")